@@ -0,0 +1,39 @@
+#!/bin/python3
+
+# Benchmark of the query backends of oci_common.backends against the tenancy of the OCI config file.
+# For each resource type it prints the number of records, the number of API calls and the wall-clock time
+# of the per-compartment listing and of Resource Search (which falls back to listing for attachments).
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.clients import ClientPool
+from oci_common.backends import makeBackend, BACKENDS
+from oci_common.scan import ScanStats, DEFAULT_WORKERS
+from oci_common.topology import TopologyCache
+
+parser = argparse.ArgumentParser(description="This program compares the list and search backends on the current tenancy")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of parallel list calls. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--types", nargs="+", default=["volume", "bootvolume", "instance", "volumeattachment"], help="The resource types to fetch")
+args = parser.parse_args()
+
+clients = ClientPool(poolSize=args.workers)
+
+# Warm the topology first so that only the inventory calls are timed
+topology = TopologyCache(clients.get("identity"), clients.tenancy, clients.region)
+topology.getCompartments()
+topology.getAvailabilityDomains()
+
+print(f'{"type": <20} | {"backend": <7} | {"records": >7} | {"calls": >6} | {"seconds": >8}')
+for resourceType in args.types:
+	for name in BACKENDS:
+		stats = ScanStats()
+		backend = makeBackend(name, topology, clients, args.workers, stats)
+		start = time.perf_counter()
+		records = sum(1 for _ in backend.iterResources(resourceType, ("ocid", "name")))
+		elapsed = time.perf_counter() - start
+		calls = sum(row["count"] for row in stats.summary())
+		print(f"{resourceType: <20} | {name: <7} | {records: >7} | {calls: >6} | {elapsed: >8.2f}")
@@ -0,0 +1,72 @@
+#!/bin/python3
+
+# End-to-end benchmark of the inventory scripts against the in-process fake OCI of fake_oci.py.
+# Every script runs unmodified, with its clients replaced by the fake ones, on tenancies of several sizes;
+# for each scenario and script the number of API calls and the wall-clock time are printed.
+# No OCI access is needed.
+
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from oci_common.clients import injectFake
+from oci_common.scan import DEFAULT_WORKERS
+from fake_oci import FakeTenancy
+
+# Scenario -> size of the fake tenancy
+SCENARIOS = {
+	"small": {"compartments": 5, "instances": 50, "volumes": 100, "unattachedBootVolumes": 10},
+	"medium": {"compartments": 30, "instances": 500, "volumes": 1000, "unattachedBootVolumes": 50},
+	"large": {"compartments": 100, "instances": 3000, "volumes": 6000, "unattachedBootVolumes": 300}}
+
+# Script -> (path from the repository root, arguments besides the common ones)
+SCRIPTS = {
+	"find_unattached": ("storage-scripts/find_unattached.py", []),
+	"find_unattached_block_volumes": ("storage-scripts/find_unattached_block_volumes.py", []),
+	"find_unattached_boot_volumes": ("storage-scripts/find_unattached_boot_volumes.py", []),
+	"get_all_block_volume_types": ("get_all_block_volume_types/get_all_block_volume_types.py", []),
+	"osmh_get_all_updates": ("osmh_get_all_updates/osmh_get_all_updates.py", ["--all-waves", "--no-os-family-cache"])}
+
+parser = argparse.ArgumentParser(description="This program times the inventory scripts end to end against a fake OCI tenancy")
+parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=["small", "medium"], help="The tenancy sizes to test. Defaults to small medium")
+parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=list(SCRIPTS), help="The scripts to time. Defaults to all")
+parser.add_argument("--latency", type=float, default=0.02, help="The latency of every fake API call, in seconds. Defaults to 0.02")
+parser.add_argument("--page-size", type=int, default=100, help="The maximum number of records per page. Defaults to 100")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The --workers value passed to the scripts. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--rate", type=float, default=0, help="The --rate value passed to the scripts. Defaults to 0 (no limit), as the fake never throttles")
+parser.add_argument("--args", default="", help="Extra arguments passed to every script, e.g. \"--backend search\"")
+parser.add_argument("--per-call", action="store_true", help="Also print the number of calls of each API operation")
+args = parser.parse_args()
+
+def runScript(path, scriptArgs):
+	"""
+	This function runs a script as __main__ with the given arguments, discarding its output, and returns the elapsed seconds
+	"""
+	argv = sys.argv
+	sys.argv = [path] + scriptArgs
+	start = time.perf_counter()
+	try:
+		with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+			runpy.run_path(path, run_name="__main__")
+	finally:
+		sys.argv = argv
+	return time.perf_counter() - start
+
+print(f'{"scenario": <8} | {"script": <48} | {"calls": >6} | {"seconds": >8}')
+for scenario in args.scenarios:
+	tenancy = FakeTenancy(latency=args.latency, pageSize=args.page_size, **SCENARIOS[scenario])
+	injectFake(tenancy.config(), tenancy.factory)
+	for script in args.scripts:
+		path, scriptArgs = SCRIPTS[script]
+		tenancy.resetCalls()
+		elapsed = runScript(os.path.join(ROOT, path), scriptArgs + ["--workers", str(args.workers), "--rate", str(args.rate)] + args.args.split())
+		print(f"{scenario: <8} | {script: <48} | {tenancy.totalCalls(): >6} | {elapsed: >8.2f}")
+		if args.per_call:
+			for name, count in sorted(tenancy.calls.items()):
+				print(f'{"": <8} | {"  " + name: <48} | {count: >6} |')
@@ -0,0 +1,72 @@
+#!/bin/python3
+
+# Cold-start benchmark of the scripts: each one is run several times in a fresh interpreter with --help
+# (or the given arguments), and the median wall-clock time is checked against a budget.
+# The scripts must not import the OCI SDK before they call OCI, so a run that imports it also fails the check.
+# Exits with status 1 if any script is over budget or imports the SDK. No OCI access is needed.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_BUDGET = 0.15
+DEFAULT_RUNS = 5
+
+# Script -> path from the repository root
+SCRIPTS = {
+	"find_unattached": "storage-scripts/find_unattached.py",
+	"find_unattached_block_volumes": "storage-scripts/find_unattached_block_volumes.py",
+	"find_unattached_boot_volumes": "storage-scripts/find_unattached_boot_volumes.py",
+	"get_all_block_volume_types": "get_all_block_volume_types/get_all_block_volume_types.py",
+	"get_all_instances_os": "get_all_instances/get_all_instances_os.py",
+	"osmh_get_all_updates": "osmh_get_all_updates/osmh_get_all_updates.py",
+	"create_ipsec": "network-scripts/create_ipsec.py",
+	"run_multi_region": "multi_region/run_multi_region.py",
+	"inventory_daemon": "inventory_daemon/inventory_daemon.py"}
+
+parser = argparse.ArgumentParser(description="This program checks the cold-start time of the scripts against a budget")
+parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=list(SCRIPTS), help="The scripts to time. Defaults to all")
+parser.add_argument("--args", default="--help", help="The arguments passed to every script. Defaults to --help")
+parser.add_argument("--runs", "-n", type=int, default=DEFAULT_RUNS, help=f"The number of runs per script, of which the median is kept. Defaults to {DEFAULT_RUNS}")
+parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help=f"The maximum median time of a script, in seconds. Defaults to {DEFAULT_BUDGET}")
+parser.add_argument("--allow-sdk", action="store_true", help="Do not fail the scripts that import the OCI SDK, e.g. with arguments that make them call OCI")
+args = parser.parse_args()
+
+def timeRun(command):
+	"""
+	This function runs a command with its output discarded and returns the elapsed seconds
+	"""
+	start = time.perf_counter()
+	subprocess.run(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT)
+	return time.perf_counter() - start
+
+def importsSdk(command):
+	"""
+	This function tells if a Python command imports the oci package, according to -X importtime
+	"""
+	result = subprocess.run(command[:1] + ["-X", "importtime"] + command[1:], stdin=subprocess.DEVNULL,
+		stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=ROOT)
+	return any(line.split("|")[-1].strip() == "oci" for line in result.stderr.splitlines() if line.startswith("import time:"))
+
+#The interpreter alone, as a reference for the budget
+interpreter = statistics.median(timeRun([sys.executable, "-c", "pass"]) for _ in range(args.runs))
+print(f'{"script": <32} | {"median": >8} | {"max": >8} | {"sdk": >3} | status')
+print(f'{"(interpreter)": <32} | {interpreter: >8.3f} | {"": >8} | {"": >3} |')
+
+failures = 0
+for script in args.scripts:
+	command = [sys.executable, os.path.join(ROOT, SCRIPTS[script])] + args.args.split()
+	times = [timeRun(command) for _ in range(args.runs)]
+	sdk = importsSdk(command)
+	median = statistics.median(times)
+	problems = (["over budget"] if median > args.budget else []) + (["imports oci"] if sdk and not args.allow_sdk else [])
+	failures += bool(problems)
+	print(f'{script: <32} | {median: >8.3f} | {max(times): >8.3f} | {"yes" if sdk else "no": >3} | {", ".join(problems) or "ok"}')
+
+print(f"{len(args.scripts) - failures} of {len(args.scripts)} scripts within {args.budget}s" + ("" if args.allow_sdk else " without the OCI SDK"))
+sys.exit(1 if failures else 0)
@@ -0,0 +1,48 @@
+#!/bin/python3
+
+# Micro-benchmark of the unattached-volume diff on synthetic inputs.
+# It compares the former list-membership implementation (quadratic) with the
+# OCID-keyed join of oci_common.volumes. No OCI access is needed.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.volumes import joinAttachments
+
+parser = argparse.ArgumentParser(description="This program times the unattached-volume diff on synthetic inputs")
+parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="The numbers of volumes to test. Defaults to 1000 10000 100000")
+parser.add_argument("--legacy-max", type=int, default=10000, help="The largest size for which the quadratic implementation is timed. Defaults to 10000")
+args = parser.parse_args()
+
+def synthesize(size):
+	"""
+	This function returns `size` volumes and attachments for two thirds of them
+	"""
+	volumes = [{"ocid": f"ocid1.volume.oc1..{i:08d}", "name": f"vol-{i}"} for i in range(size)]
+	attachments = [{"instance_ocid": f"ocid1.instance.oc1..{i % 5000:08d}", "vol_ocid": f"ocid1.volume.oc1..{i:08d}"} for i in range(size) if i % 3]
+	return volumes, attachments
+
+def legacyDiff(volumes, attachments):
+	allOCIDs = [vol["ocid"] for vol in volumes]
+	attachedOCIDs = [att["vol_ocid"] for att in attachments]
+	unattachedOCIDs = [ocid for ocid in allOCIDs if ocid not in attachedOCIDs]
+	return [vol for vol in volumes if vol["ocid"] in unattachedOCIDs]
+
+def timeIt(func, *funcArgs):
+	start = time.perf_counter()
+	result = func(*funcArgs)
+	return time.perf_counter() - start, result
+
+print(f'{"volumes": >10} | {"attachments": >11} | {"legacy (s)": >10} | {"indexed (s)": >11}')
+for size in args.sizes:
+	volumes, attachments = synthesize(size)
+	indexedTime, (unattached, _) = timeIt(joinAttachments, volumes, attachments, "vol_ocid")
+	legacy = "skipped"
+	if size <= args.legacy_max:
+		legacyTime, legacyResult = timeIt(legacyDiff, volumes, attachments)
+		assert legacyResult == unattached
+		legacy = f"{legacyTime:.4f}"
+	print(f"{size: >10} | {len(attachments): >11} | {legacy: >10} | {indexedTime: >11.4f}")
@@ -0,0 +1,399 @@
+# In-process stand-in for the OCI services used by the scripts of this repository
+# (Identity, Compute, Block Storage, Virtual Network, Resource Search, OS Management Hub and Audit).
+# FakeTenancy synthesizes a tenancy of the requested size; its clients return SDK models in paginated
+# SDK responses after a configurable latency, and count every call.
+# Use it with oci_common.clients.injectFake(tenancy.config(), tenancy.factory), see bench_scripts.py.
+
+import random
+import re
+import threading
+import time
+
+import oci
+
+AVAILABILITY_DOMAINS = 3
+# Attributes of the fake resources that can change over time
+TRANSITION_ATTRIBUTES = ("lifecycle_state", "status")
+IMAGES = [("Oracle Linux", "8"), ("Oracle Linux", "9"), ("Canonical Ubuntu", "22.04"), ("Windows", "Server 2019 Standard")]
+
+class FakeTenancy:
+	""" A synthetic tenancy: `instances` instances spread over `compartments` compartments, each with a boot volume
+	and a VNIC, `volumes` block volumes of which `attachedShare` are attached, and `unattachedBootVolumes` boot volumes
+	left behind by terminated instances. Instances are tagged with `waves` patching waves and, except `unregisteredShare`
+	of them, registered to OS Management Hub.
+	Every call sleeps `latency` seconds and list calls return at most `pageSize` records per page.
+	Volume backups and IPSec connections become available and terminated volumes disappear `transitionDelay` seconds
+	after being requested, IPSec tunnels come up a few times later.
+	"""
+	def __init__(self, compartments=10, instances=100, volumes=200, unattachedBootVolumes=20, attachedShare=0.7,
+		waves=3, unregisteredShare=0.05, latency=0.02, pageSize=100, seed=0, region="eu-frankfurt-1", transitionDelay=1.0):
+		self.latency = latency
+		self.pageSize = pageSize
+		self.transitionDelay = transitionDelay
+		# (OCID, attribute) of a resource in transition -> (time of the change, final state)
+		self.transitions = {}
+		self.volumeBackups, self.bootVolumeBackups = [], []
+		self.region = region
+		self.calls = {}
+		self._lock = threading.Lock()
+		rand = random.Random(seed)
+
+		self.tenancyOCID = "ocid1.tenancy.oc1..faketenancy"
+		self.root = oci.identity.models.Compartment(id=self.tenancyOCID, name="fake-tenancy", compartment_id=None, lifecycle_state="ACTIVE")
+		self.compartments = [oci.identity.models.Compartment(id=f"ocid1.compartment.oc1..fake{c:05d}", name=f"compartment-{c}",
+			compartment_id=self.tenancyOCID, lifecycle_state="ACTIVE") for c in range(compartments)]
+		self.availabilityDomains = [oci.identity.models.AvailabilityDomain(id=f"ocid1.availabilitydomain.oc1..fake{a}",
+			name=f"Fake:{region.upper()}-AD-{a + 1}", compartment_id=self.tenancyOCID) for a in range(AVAILABILITY_DOMAINS)]
+		self.images = {f"ocid1.image.oc1..fake{i}": image for i, image in enumerate(IMAGES)}
+		imageOCIDs = list(self.images)
+
+		self.instances, self.bootVolumes, self.bootVolumeAttachments = [], [], []
+		self.vnicAttachments, self.vnics, self.waves, self.osFamilies = [], {}, {}, {}
+		for i in range(instances):
+			compartment = self.compartments[i % compartments].id
+			ad = self.availabilityDomains[i % AVAILABILITY_DOMAINS].name
+			imageOCID = imageOCIDs[rand.randrange(len(imageOCIDs))]
+			instance = oci.core.models.Instance(id=f"ocid1.instance.oc1..fake{i:06d}", display_name=f"instance-{i}",
+				compartment_id=compartment, availability_domain=ad, lifecycle_state="RUNNING", image_id=imageOCID)
+			self.instances.append(instance)
+			bootVolume = self._bootVolume(f"ocid1.bootvolume.oc1..fake{i:06d}", f"instance-{i} (Boot Volume)", compartment, ad)
+			self.bootVolumeAttachments.append(oci.core.models.BootVolumeAttachment(id=f"ocid1.instance.oc1..fakebva{i:06d}",
+				instance_id=instance.id, boot_volume_id=bootVolume.id, compartment_id=compartment, availability_domain=ad,
+				lifecycle_state="ATTACHED", display_name=None))
+			for n in range(2 if i % 4 == 0 else 1):
+				vnicOCID = f"ocid1.vnic.oc1..fake{i:06d}{n}"
+				self.vnicAttachments.append(oci.core.models.VnicAttachment(id=f"ocid1.vnicattachment.oc1..fake{i:06d}{n}",
+					instance_id=instance.id, vnic_id=vnicOCID, compartment_id=compartment, availability_domain=ad, lifecycle_state="ATTACHED"))
+				self.vnics[vnicOCID] = oci.core.models.Vnic(id=vnicOCID, is_primary=n == 0, compartment_id=compartment,
+					private_ip=f"10.{n}.{i // 250}.{i % 250 + 1}", public_ip=f"203.0.{i // 250}.{i % 250 + 1}" if i % 3 == 0 and n == 0 else None)
+			self.waves[instance.id] = f"wave_{i % waves}" if waves else None
+			if rand.random() >= unregisteredShare:
+				windows = self.images[imageOCID][0] == "Windows"
+				self.osFamilies[instance.id] = ("WINDOWS_SERVER_2019" if windows else "ORACLE_LINUX_8", rand.randrange(40))
+		for b in range(unattachedBootVolumes):
+			self._bootVolume(f"ocid1.bootvolume.oc1..fakeleft{b:06d}", f"terminated-{b} (Boot Volume)",
+				self.compartments[b % compartments].id, self.availabilityDomains[b % AVAILABILITY_DOMAINS].name)
+
+		self.drgs = [oci.core.models.Drg(id=f"ocid1.drg.oc1..fake{c:05d}", display_name=f"drg-{c}", compartment_id=compartment.id,
+			lifecycle_state="AVAILABLE") for c, compartment in enumerate(self.compartments)]
+		self.cpes = [oci.core.models.Cpe(id=f"ocid1.cpe.oc1..fake{c:05d}", display_name=f"cpe-{c}", compartment_id=compartment.id,
+			ip_address=f"198.51.{100 + c // 250}.{c % 250 + 1}") for c, compartment in enumerate(self.compartments)]
+		self.ipsecConnections, self.ipsecTunnels = [], {}
+
+		self.volumes, self.volumeAttachments = [], []
+		for v in range(volumes):
+			compartment = self.compartments[v % compartments].id
+			ad = self.availabilityDomains[v % AVAILABILITY_DOMAINS].name
+			volume = oci.core.models.Volume(id=f"ocid1.volume.oc1..fake{v:06d}", display_name=f"volume-{v}", compartment_id=compartment,
+				availability_domain=ad, lifecycle_state="AVAILABLE")
+			self.volumes.append(volume)
+			if instances and rand.random() < attachedShare:
+				instance = self.instances[rand.randrange(instances)]
+				self.volumeAttachments.append(oci.core.models.VolumeAttachment(id=f"ocid1.volumeattachment.oc1..fake{v:06d}",
+					instance_id=instance.id, volume_id=volume.id, compartment_id=instance.compartment_id,
+					availability_domain=instance.availability_domain, lifecycle_state="ATTACHED", display_name=None,
+					device=f"/dev/oracleoci/oraclevd{chr(98 + v % 20)}", attachment_type=rand.choice(["paravirtualized", "iscsi"])))
+
+	def _bootVolume(self, ocid, name, compartment, ad):
+		bootVolume = oci.core.models.BootVolume(id=ocid, display_name=name, compartment_id=compartment,
+			availability_domain=ad, lifecycle_state="AVAILABLE")
+		self.bootVolumes.append(bootVolume)
+		return bootVolume
+
+	def config(self):
+		return {"tenancy": self.tenancyOCID, "region": self.region}
+
+	def factory(self, name, config, **kwargs):
+		return FAKE_CLIENTS[name](self)
+
+	def resetCalls(self):
+		with self._lock:
+			self.calls = {}
+
+	def totalCalls(self):
+		with self._lock:
+			return sum(self.calls.values())
+
+	def call(self, name):
+		with self._lock:
+			self.calls[name] = self.calls.get(name, 0) + 1
+		time.sleep(self.latency)
+
+	def respond(self, name, data):
+		self.call(name)
+		return oci.response.Response(200, {"opc-request-id": "fake"}, data, None)
+
+	def respondPage(self, name, records, page=None, limit=None, collection=None):
+		"""
+		This function returns one page of `records`, wrapped in a collection model if the real API does so
+		"""
+		self.call(name)
+		start = int(page or 0)
+		end = start + min(limit or self.pageSize, self.pageSize)
+		headers = {"opc-request-id": "fake"}
+		if end < len(records):
+			headers["opc-next-page"] = str(end)
+		data = records[start:end]
+		return oci.response.Response(200, headers, collection(items=data) if collection else data, None)
+
+	def transition(self, resource, state, final, attribute="lifecycle_state", delay=None):
+		"""
+		This function puts an attribute of a resource in a transient state, replaced by `final` after `delay` seconds
+		(by default transitionDelay)
+		"""
+		with self._lock:
+			setattr(resource, attribute, state)
+			self.transitions[(resource.id, attribute)] = (time.monotonic() + (self.transitionDelay if delay is None else delay), final)
+
+	def settle(self, resources):
+		"""
+		This function applies the transitions due of the given resources and returns them
+		"""
+		with self._lock:
+			now = time.monotonic()
+			for resource in resources:
+				for attribute in TRANSITION_ATTRIBUTES:
+					key = (resource.id, attribute)
+					if key in self.transitions and now >= self.transitions[key][0]:
+						setattr(resource, attribute, self.transitions.pop(key)[1])
+		return resources
+
+	def notFound(self, name):
+		self.call(name)
+		return oci.exceptions.ServiceError(404, "NotAuthorizedOrNotFound", {"opc-request-id": "fake"}, "Not found (fake)")
+
+def inScope(resources, compartment_id=None, availability_domain=None, **kwargs):
+	return [r for r in resources if (compartment_id is None or r.compartment_id == compartment_id)
+		and (availability_domain is None or r.availability_domain == availability_domain)]
+
+class FakeIdentityClient:
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def list_compartments(self, compartment_id, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_compartments", self.tenancy.compartments, page, limit)
+
+	def get_compartment(self, compartment_id, **kwargs):
+		return self.tenancy.respond("get_compartment", self.tenancy.root)
+
+	def list_availability_domains(self, compartment_id, **kwargs):
+		return self.tenancy.respond("list_availability_domains", self.tenancy.availabilityDomains)
+
+	def list_region_subscriptions(self, tenancy_id, **kwargs):
+		return self.tenancy.respond("list_region_subscriptions", [oci.identity.models.RegionSubscription(
+			region_name=self.tenancy.region, region_key="FAK", is_home_region=True, status="READY")])
+
+class FakeComputeClient:
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def list_instances(self, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_instances", inScope(self.tenancy.instances, **kwargs), page, limit)
+
+	def list_volume_attachments(self, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_volume_attachments", inScope(self.tenancy.volumeAttachments, **kwargs), page, limit)
+
+	def list_boot_volume_attachments(self, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_boot_volume_attachments", inScope(self.tenancy.bootVolumeAttachments, **kwargs), page, limit)
+
+	def list_vnic_attachments(self, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_vnic_attachments", inScope(self.tenancy.vnicAttachments, **kwargs), page, limit)
+
+	def get_instance(self, instance_id, **kwargs):
+		for instance in self.tenancy.instances:
+			if instance.id == instance_id:
+				return self.tenancy.respond("get_instance", instance)
+		raise self.tenancy.notFound("get_instance")
+
+	def get_image(self, image_id, **kwargs):
+		if image_id not in self.tenancy.images:
+			raise self.tenancy.notFound("get_image")
+		operatingSystem, version = self.tenancy.images[image_id]
+		return self.tenancy.respond("get_image", oci.core.models.Image(id=image_id, operating_system=operatingSystem, operating_system_version=version))
+
+class FakeBlockstorageClient:
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def list_volumes(self, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_volumes", self.tenancy.settle(inScope(self.tenancy.volumes, **kwargs)), page, limit)
+
+	def list_boot_volumes(self, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_boot_volumes", self.tenancy.settle(inScope(self.tenancy.bootVolumes, **kwargs)), page, limit)
+
+	def list_volume_backups(self, compartment_id, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_volume_backups", self.tenancy.settle(inScope(self.tenancy.volumeBackups, compartment_id)), page, limit)
+
+	def list_boot_volume_backups(self, compartment_id, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_boot_volume_backups", self.tenancy.settle(inScope(self.tenancy.bootVolumeBackups, compartment_id)), page, limit)
+
+	def _find(self, name, resources, ocid):
+		for resource in resources:
+			if resource.id == ocid and resource.lifecycle_state not in ("TERMINATING", "TERMINATED"):
+				return resource
+		raise self.tenancy.notFound(name)
+
+	def create_volume_backup(self, create_volume_backup_details, **kwargs):
+		volume = self._find("create_volume_backup", self.tenancy.volumes, create_volume_backup_details.volume_id)
+		backup = oci.core.models.VolumeBackup(id=volume.id.replace("ocid1.volume.", "ocid1.volumebackup."), volume_id=volume.id,
+			compartment_id=volume.compartment_id, display_name=create_volume_backup_details.display_name, type=create_volume_backup_details.type)
+		self.tenancy.transition(backup, "CREATING", "AVAILABLE")
+		self.tenancy.volumeBackups.append(backup)
+		return self.tenancy.respond("create_volume_backup", backup)
+
+	def create_boot_volume_backup(self, create_boot_volume_backup_details, **kwargs):
+		bootVolume = self._find("create_boot_volume_backup", self.tenancy.bootVolumes, create_boot_volume_backup_details.boot_volume_id)
+		backup = oci.core.models.BootVolumeBackup(id=bootVolume.id.replace("ocid1.bootvolume.", "ocid1.bootvolumebackup."),
+			boot_volume_id=bootVolume.id, compartment_id=bootVolume.compartment_id,
+			display_name=create_boot_volume_backup_details.display_name, type=create_boot_volume_backup_details.type)
+		self.tenancy.transition(backup, "CREATING", "AVAILABLE")
+		self.tenancy.bootVolumeBackups.append(backup)
+		return self.tenancy.respond("create_boot_volume_backup", backup)
+
+	def delete_volume(self, volume_id, **kwargs):
+		self.tenancy.transition(self._find("delete_volume", self.tenancy.volumes, volume_id), "TERMINATING", "TERMINATED")
+		return self.tenancy.respond("delete_volume", None)
+
+	def delete_boot_volume(self, boot_volume_id, **kwargs):
+		self.tenancy.transition(self._find("delete_boot_volume", self.tenancy.bootVolumes, boot_volume_id), "TERMINATING", "TERMINATED")
+		return self.tenancy.respond("delete_boot_volume", None)
+
+	def get_volume(self, volume_id, **kwargs):
+		for volume in self.tenancy.volumes:
+			if volume.id == volume_id:
+				return self.tenancy.respond("get_volume", volume)
+		raise self.tenancy.notFound("get_volume")
+
+	def get_boot_volume(self, boot_volume_id, **kwargs):
+		for bootVolume in self.tenancy.bootVolumes:
+			if bootVolume.id == boot_volume_id:
+				return self.tenancy.respond("get_boot_volume", bootVolume)
+		raise self.tenancy.notFound("get_boot_volume")
+
+class FakeVirtualNetworkClient:
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def get_vnic(self, vnic_id, **kwargs):
+		if vnic_id not in self.tenancy.vnics:
+			raise self.tenancy.notFound("get_vnic")
+		return self.tenancy.respond("get_vnic", self.tenancy.vnics[vnic_id])
+
+	def list_private_ips(self, vnic_id=None, page=None, limit=None, **kwargs):
+		vnic = self.tenancy.vnics[vnic_id]
+		privateIPs = [oci.core.models.PrivateIp(id=f"ocid1.privateip.oc1..{vnic_id[-8:]}", vnic_id=vnic_id, ip_address=vnic.private_ip, is_primary=True)]
+		return self.tenancy.respondPage("list_private_ips", privateIPs, page, limit)
+
+	def get_public_ip_by_private_ip_id(self, get_public_ip_by_private_ip_id_details, **kwargs):
+		raise self.tenancy.notFound("get_public_ip_by_private_ip_id")
+
+	def list_drgs(self, compartment_id, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_drgs", inScope(self.tenancy.drgs, compartment_id), page, limit)
+
+	def list_cpes(self, compartment_id, page=None, limit=None, **kwargs):
+		return self.tenancy.respondPage("list_cpes", [c for c in self.tenancy.cpes if c.compartment_id == compartment_id], page, limit)
+
+	def create_ip_sec_connection(self, create_ip_sec_connection_details, **kwargs):
+		details = create_ip_sec_connection_details
+		with self.tenancy._lock:
+			index = len(self.tenancy.ipsecConnections)
+			connection = oci.core.models.IPSecConnection(id=f"ocid1.ipsecconnection.oc1..fake{index:05d}", display_name=details.display_name,
+				compartment_id=details.compartment_id, drg_id=details.drg_id, cpe_id=details.cpe_id, static_routes=details.static_routes)
+			self.tenancy.ipsecConnections.append(connection)
+			self.tenancy.ipsecTunnels[connection.id] = [oci.core.models.IPSecConnectionTunnel(id=f"ocid1.ipsectunnel.oc1..fake{index:05d}{t}",
+				display_name=tunnel.display_name, routing=tunnel.routing, ike_version=tunnel.ike_version, status="DOWN",
+				vpn_ip=f"192.0.2.{(2 * index + t) % 250 + 1}", compartment_id=details.compartment_id)
+				for t, tunnel in enumerate(details.tunnel_configuration)]
+		self.tenancy.transition(connection, "PROVISIONING", "AVAILABLE")
+		for tunnel in self.tenancy.ipsecTunnels[connection.id]:
+			self.tenancy.transition(tunnel, "DOWN", "UP", "status", self.tenancy.transitionDelay * (3 + index % 3))
+		return self.tenancy.respond("create_ip_sec_connection", connection)
+
+	def list_ip_sec_connections(self, compartment_id, page=None, limit=None, **kwargs):
+		connections = [c for c in self.tenancy.ipsecConnections if c.compartment_id == compartment_id]
+		return self.tenancy.respondPage("list_ip_sec_connections", self.tenancy.settle(connections), page, limit)
+
+	def get_ip_sec_connection(self, ipsc_id, **kwargs):
+		for connection in self.tenancy.settle(self.tenancy.ipsecConnections):
+			if connection.id == ipsc_id:
+				return self.tenancy.respond("get_ip_sec_connection", connection)
+		raise self.tenancy.notFound("get_ip_sec_connection")
+
+	def list_ip_sec_connection_tunnels(self, ipsc_id, page=None, limit=None, **kwargs):
+		if ipsc_id not in self.tenancy.ipsecTunnels:
+			raise self.tenancy.notFound("list_ip_sec_connection_tunnels")
+		return self.tenancy.respondPage("list_ip_sec_connection_tunnels", self.tenancy.settle(self.tenancy.ipsecTunnels[ipsc_id]), page, limit)
+
+class FakeResourceSearchClient:
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def search_resources(self, search_details, page=None, limit=None, **kwargs):
+		query = search_details.query
+		resourceTypes = [t.strip() for t in re.match(r"query ([\w, ]+) resources", query).group(1).split(",")]
+		if "definedTags" in query:
+			wave = re.search(r"definedTags\.value = '([^']*)'", query)
+			resources = [("instance", i) for i in self.tenancy.instances if self.tenancy.waves[i.id] and (not wave or self.tenancy.waves[i.id] == wave.group(1))]
+		else:
+			resourcesByType = {"volume": self.tenancy.volumes, "bootvolume": self.tenancy.bootVolumes, "instance": self.tenancy.instances,
+				"compartment": self.tenancy.compartments, "drg": self.tenancy.drgs, "cpe": self.tenancy.cpes}
+			resources = [(resourceType, r) for resourceType in resourceTypes for r in resourcesByType[resourceType]]
+		summaries = [oci.resource_search.models.ResourceSummary(identifier=r.id, display_name=getattr(r, "display_name", None) or getattr(r, "name", None),
+			compartment_id=r.compartment_id, availability_domain=getattr(r, "availability_domain", None), lifecycle_state=getattr(r, "lifecycle_state", None),
+			resource_type=resourceType, defined_tags={"patching": {"wave": self.tenancy.waves.get(r.id)}} if self.tenancy.waves.get(r.id) else {})
+			for resourceType, r in resources]
+		return self.tenancy.respondPage("search_resources", summaries, page, limit, oci.resource_search.models.ResourceSummaryCollection)
+
+class FakeManagedInstanceClient:
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def list_managed_instances(self, compartment_id=None, managed_instance_id=None, page=None, limit=None, **kwargs):
+		#Like the real API, which takes a single OCID and does not send a list as a multi-valued filter
+		if managed_instance_id is not None and not isinstance(managed_instance_id, str):
+			self.tenancy.call("list_managed_instances")
+			raise oci.exceptions.ServiceError(400, "InvalidParameter", {"opc-request-id": "fake"}, "managedInstanceId must be a single OCID (fake)")
+		instances = [i for i in self.tenancy.instances if i.id in self.tenancy.osFamilies
+			and (compartment_id is None or i.compartment_id == compartment_id)
+			and (managed_instance_id is None or i.id == managed_instance_id)]
+		summaries = [oci.os_management_hub.models.ManagedInstanceSummary(id=i.id, display_name=i.display_name,
+			compartment_id=i.compartment_id, os_family=self.tenancy.osFamilies[i.id][0]) for i in instances]
+		return self.tenancy.respondPage("list_managed_instances", summaries, page, limit, oci.os_management_hub.models.ManagedInstanceCollection)
+
+	def _updates(self, name, managed_instance_id, windows):
+		if managed_instance_id not in self.tenancy.osFamilies:
+			raise self.tenancy.notFound(name)
+		osFamily, count = self.tenancy.osFamilies[managed_instance_id]
+		if osFamily.startswith("WINDOWS") != windows:
+			self.tenancy.call(name)
+			raise oci.exceptions.ServiceError(400, "InvalidParameter", {"opc-request-id": "fake"}, "Wrong OS family (fake)")
+		return count
+
+	def list_managed_instance_updatable_packages(self, managed_instance_id, page=None, limit=None, **kwargs):
+		count = self._updates("list_managed_instance_updatable_packages", managed_instance_id, False)
+		packages = [oci.os_management_hub.models.UpdatablePackageSummary(display_name=f"package-{p}.el8.x86_64", name=f"package-{p}") for p in range(count)]
+		return self.tenancy.respondPage("list_managed_instance_updatable_packages", packages, page, limit, oci.os_management_hub.models.UpdatablePackageCollection)
+
+	def list_managed_instance_available_windows_updates(self, managed_instance_id, page=None, limit=None, **kwargs):
+		count = self._updates("list_managed_instance_available_windows_updates", managed_instance_id, True)
+		updates = [oci.os_management_hub.models.WindowsUpdateSummary(name=f"KB{5000000 + u}", update_id=f"fake-{u}") for u in range(count)]
+		return self.tenancy.respondPage("list_managed_instance_available_windows_updates", updates, page, limit, oci.os_management_hub.models.WindowsUpdateCollection)
+
+class FakeAuditClient:
+	""" The audit log of the fake tenancy is always empty: nothing changes between two runs
+	"""
+	def __init__(self, tenancy):
+		self.tenancy = tenancy
+
+	def list_events(self, compartment_id, start_time, end_time, page=None, **kwargs):
+		return self.tenancy.respondPage("list_events", [], page)
+
+# Client name of oci_common.clients -> fake client class
+FAKE_CLIENTS = {
+	"identity": FakeIdentityClient,
+	"compute": FakeComputeClient,
+	"storage": FakeBlockstorageClient,
+	"network": FakeVirtualNetworkClient,
+	"search": FakeResourceSearchClient,
+	"osmh": FakeManagedInstanceClient,
+	"audit": FakeAuditClient}
@@ -3,36 +3,61 @@
 # This script outputs a list of all the block volumes which are attached to any instance
 # and the respective attachment type (Paravirtualized or iSCSI)
 
-import oci
+import argparse
+import os
 import time
 import sys
 
-print("instance_name,volume_id,volume_name,device,type")
-
-config = oci.config.from_file()
-tenancy_id = config["tenancy"]
-
-iam_client = oci.identity.IdentityClient(config)
-storage_client = oci.core.BlockstorageClient(config)
-compute_client = oci.core.ComputeClient(config)
-
-# Search all compartments
-all_compartments = [tenancy_id]
-response = iam_client.list_compartments(
-	tenancy_id,
-	compartment_id_in_subtree=True,
-	access_level="ANY"
-	)
-for c in response.data:
-	all_compartments.append(c.id)
-
-for c in all_compartments:
-	attachments = compute_client.list_volume_attachments(compartment_id = c).data
-	for a in attachments:
-		instance_name = compute_client.get_instance(instance_id = a.instance_id)
-		try:
-			volume_name = storage_client.get_volume(volume_id = a.volume_id).data.display_name
-		except:
-			volume_name = storage_client.get_boot_volume(boot_volume_id = a.volume_id).data.display_name
-		finally:
-			print(f"{instance_name},{a.volume_id},{volume_name},{a.device},{a.attachment_type}")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.topology import addTopologyArguments, topologyFromArgs
+from oci_common.scan import ScanStats, DEFAULT_WORKERS
+from oci_common.reports import iterAttachmentTypes, ATTACHMENT_TYPES_COLUMNS
+from oci_common.output import addOutputArguments, makeWriter
+from oci_common.backends import addBackendArguments, makeBackend
+from oci_common.snapshot import addSnapshotArguments, refresherFromArgs
+from oci_common.daemon import addDaemonArguments, askDaemon
+
+parser = argparse.ArgumentParser(description="This program lists the block volumes attached to any instance and their attachment type")
+parser.add_argument("--lookup", action="store_true", help="Resolve instance and volume names with one GET per attachment instead of listing them once per compartment. Faster only when there are very few attachments")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of compartments listed in parallel. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--stats", action="store_true", help="Print the number of API calls, their latency and the wall-clock time to stderr")
+addTopologyArguments(parser)
+addBackendArguments(parser)
+addSnapshotArguments(parser)
+addThrottleArguments(parser)
+addProfileArguments(parser)
+addOutputArguments(parser, default="csv")
+addDaemonArguments(parser)
+args = parser.parse_args()
+apiProfile = profileFromArgs(args)
+
+#The header is written at once and every row as soon as it is known, except in an aligned table
+try:
+	writer = makeWriter(args.format, ATTACHMENT_TYPES_COLUMNS, args.output, not args.no_align)
+except ValueError as e:
+	parser.error(str(e))
+
+start = time.perf_counter()
+clients = ClientPool(poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
+
+# Count every call made by this script
+stats = ScanStats()
+rows = askDaemon(args, "/attachment-types")
+if rows is None:
+	topology = topologyFromArgs(args, clients)
+	backend = makeBackend(args.backend, topology, clients, args.workers, stats, refresherFromArgs(args, clients, args.workers))
+	rows = iterAttachmentTypes(backend, clients.get("compute"), clients.get("storage"), args.lookup, stats)
+
+for row in rows:
+	writer.write(row)
+writer.close()
+
+if args.stats:
+	stats.addWallClock(time.perf_counter() - start)
+	stats.printReport()
+	clients.throttle.printReport()
+
+writeProfileReports(args, apiProfile)
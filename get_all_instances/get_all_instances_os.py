@@ -0,0 +1,174 @@
+#!/bin/python3
+
+# This script exports all the running or stopped instances of the tenancy to a CSV file,
+# together with their image, operating system and IP addresses.
+# It is the in-process equivalent of get_all_instances_os.sh: instances and VNIC attachments are listed
+# once per compartment (compartments in parallel) and image lookups are cached, also between runs.
+# Unlike the shell script, all the attached VNICs and their secondary private IPs are reported:
+# the IP columns contain the addresses separated by spaces, those of the primary VNIC first.
+
+import argparse
+import csv
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool
+from oci_common.lazy import oci
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.pagination import iterRecords
+from oci_common.scan import iterParallel, scanParallel, DEFAULT_WORKERS
+from oci_common.topology import addTopologyArguments, topologyFromArgs
+from oci_common.cachefile import readJsonFile, writeJsonFile
+from oci_common.snapshot import addSnapshotArguments, refresherFromArgs
+
+DEFAULT_IMAGE_CACHE = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-images.json")
+
+parser = argparse.ArgumentParser(description="This program exports the running and stopped instances of the tenancy with their operating system and IPs to a CSV file")
+parser.add_argument("--output", "-o", help="The CSV file to write. Defaults to <tenancy name>_extraction_<timestamp>.csv")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of compartments processed in parallel. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--vnic-workers", type=int, default=DEFAULT_WORKERS, help=f"The number of VNICs resolved in parallel. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--image-cache", default=DEFAULT_IMAGE_CACHE, help=f"The file where the operating system of each image is remembered between runs. Defaults to {DEFAULT_IMAGE_CACHE}")
+parser.add_argument("--no-image-cache", action="store_true", help="Do not read nor write the image cache")
+addTopologyArguments(parser)
+addSnapshotArguments(parser)
+addThrottleArguments(parser)
+addProfileArguments(parser)
+args = parser.parse_args()
+apiProfile = profileFromArgs(args)
+
+clients = ClientPool(poolSize=max(args.workers, args.vnic_workers), throttle=throttleFromArgs(args, max(args.workers, args.vnic_workers)), apiProfile=apiProfile)
+compute_client = clients.get("compute")
+network_client = clients.get("network")
+topology = topologyFromArgs(args, clients)
+
+image_cache_file = None if args.no_image_cache else args.image_cache
+images = readJsonFile(image_cache_file) if image_cache_file else {}
+images_lock = threading.Lock()
+image_locks = {}
+new_images = False
+
+def get_image_os(image_id):
+	"""
+	This function returns the (operating system, version) of an image, calling the API only once per image
+	"""
+	global new_images
+	if not image_id:
+		return ("", "")
+	#One lock per image, so that concurrent compartments never fetch the same image twice
+	with images_lock:
+		image_lock = image_locks.setdefault(image_id, threading.Lock())
+	with image_lock:
+		if image_id in images:
+			return tuple(images[image_id])
+		try:
+			image = compute_client.get_image(image_id = image_id).data
+			image_os = (image.operating_system, image.operating_system_version)
+		except oci.exceptions.ServiceError as e:
+			if e.status != 404:
+				raise
+			#Deleted or inaccessible image
+			image_os = ("", "")
+		images[image_id] = list(image_os)
+		new_images = True
+	return image_os
+
+def resolve_vnic(vnic_id):
+	"""
+	This function returns a dictionary with the public and private IPs of a VNIC, including the secondary private IPs,
+	or None if the VNIC no longer exists
+	"""
+	try:
+		vnic = network_client.get_vnic(vnic_id = vnic_id).data
+		secondary_ips = [ip for ip in iterRecords(network_client.list_private_ips, vnic_id = vnic_id) if not ip.is_primary]
+	except oci.exceptions.ServiceError as e:
+		if e.status != 404:
+			raise
+		#Detached or deleted since the VNIC attachments were listed
+		return None
+	public_ips = [vnic.public_ip] if vnic.public_ip else []
+	private_ips = [vnic.private_ip] if vnic.private_ip else []
+	for ip in secondary_ips:
+		private_ips.append(ip.ip_address)
+		try:
+			public_ips.append(network_client.get_public_ip_by_private_ip_id(
+				oci.core.models.GetPublicIpByPrivateIpIdDetails(private_ip_id = ip.id)).data.ip_address)
+		except oci.exceptions.ServiceError as e:
+			#No public IP assigned to the secondary private IP
+			if e.status != 404:
+				raise
+	return {"vnic_id": vnic_id, "is_primary": bool(vnic.is_primary), "public": public_ips, "private": private_ips}
+
+def list_compartment_instances(comp_id, comp_name):
+	"""
+	This function returns the running and stopped instances of a compartment, with the OCIDs of their attached VNICs
+	"""
+	#Attached VNICs of every instance of the compartment (VNIC attachments belong to the compute API)
+	vnics = {}
+	for att in iterRecords(compute_client.list_vnic_attachments, compartment_id = comp_id):
+		if att.lifecycle_state == "ATTACHED":
+			vnics.setdefault(att.instance_id, []).append(att.vnic_id)
+
+	instances = []
+	for inst in iterRecords(compute_client.list_instances, compartment_id = comp_id):
+		if inst.lifecycle_state not in ("RUNNING", "STOPPED"):
+			continue
+		os_name, os_version = get_image_os(inst.image_id)
+		instances.append({
+			"row": [comp_name, comp_id, inst.display_name, inst.id, inst.image_id, os_name, os_version],
+			"vnic_ids": vnics.get(inst.id, [])})
+	return [instances]
+
+def join_ips(vnic_ids, resolved):
+	"""
+	This function returns the public and private IPs of a list of VNICs as two space-separated strings, primary VNIC first.
+	VNICs missing from `resolved` no longer exist and are left out.
+	"""
+	vnic_list = sorted((resolved[v] for v in vnic_ids if v in resolved), key = lambda vnic: not vnic["is_primary"])
+	public_ips = [ip for vnic in vnic_list for ip in vnic["public"]]
+	private_ips = [ip for vnic in vnic_list for ip in vnic["private"]]
+	return " ".join(public_ips), " ".join(private_ips)
+
+# Build output file name
+filename = args.output or f'{topology.getCompartments(includeRoot=True)[0]["name"]}_extraction_{time.strftime("%Y%m%d%H%M%S")}.csv'
+
+def fetch_rows(comp_ids):
+	"""
+	This function yields the CSV row of every instance of the given compartments, as a snapshot record
+	"""
+	#While the next compartments are listed, the VNICs of each listed compartment are resolved in parallel
+	for instances in iterParallel(list_compartment_instances, [(c, compartment_names[c]) for c in comp_ids], args.workers):
+		vnic_ids = [(vnic_id,) for inst in instances for vnic_id in inst["vnic_ids"]]
+		resolved = {vnic["vnic_id"]: vnic for vnic in scanParallel(lambda vnic_id: [resolve_vnic(vnic_id)], vnic_ids, args.vnic_workers) if vnic}
+		for inst in instances:
+			yield {
+				"ocid": inst["row"][3],
+				"compartment_ocid": inst["row"][1],
+				"row": inst["row"] + list(join_ips(inst["vnic_ids"], resolved))}
+
+compartment_names = {c["ocid"]: c["name"] for c in topology.getCompartments(activeOnly=True)}
+#With --snapshot, only the compartments changed since the last run are listed again
+refresher = refresherFromArgs(args, clients, args.workers)
+if refresher:
+	records = refresher.refresh("instance_row", list(compartment_names), fetch_rows)
+else:
+	records = fetch_rows(list(compartment_names))
+
+with open(filename, "w", newline="") as f:
+	writer = csv.writer(f, lineterminator="\n")
+	writer.writerow(["Compartment Name", "Compartment OCID", "Instance Name", "Instance OCID", "Image OCID", "Operating System", "OS Version", "Public IP", "Private IP"])
+	for record in records:
+		writer.writerow(record["row"])
+
+if image_cache_file and new_images:
+	writeJsonFile(image_cache_file, images)
+
+print(f"Instances exported to {filename}")
+if refresher and "instance_row" in refresher.delta:
+	delta = refresher.delta["instance_row"]
+	print(f'Changes since the last run: {len(delta["new"])} new, {len(delta["removed"])} removed instances')
+
+writeProfileReports(args, apiProfile)
@@ -0,0 +1,73 @@
+#!/bin/python3
+
+# This script keeps a warm in-memory inventory of the tenancy (compartments, volumes, boot volumes, attachments, instances
+# and the available security updates of the patching waves), refreshed in the background every --interval seconds,
+# and answers the reports of the other scripts from memory over a local HTTP API, on a Unix socket or a TCP port.
+# find_unattached.py, get_all_block_volume_types.py and osmh_get_all_updates.py given --daemon query it instead of crawling the tenancy.
+
+import argparse
+import os
+import signal
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.scan import DEFAULT_WORKERS
+from oci_common.topology import addTopologyArguments, topologyFromArgs
+from oci_common.backends import addBackendArguments, makeBackend
+from oci_common.snapshot import addSnapshotArguments, refresherFromArgs
+from oci_common.osmh import DEFAULT_TIMEOUT, DEFAULT_OS_FAMILY_CACHE
+from oci_common.daemon import DEFAULT_ADDRESS, DEFAULT_REFRESH_INTERVAL
+
+parser = argparse.ArgumentParser(description="This program keeps an inventory of the tenancy in memory and serves the reports of the other scripts over a local HTTP API")
+parser.add_argument("--listen", "-l", default=DEFAULT_ADDRESS, help=f"The Unix socket path, or HOST:PORT (no authentication, keep it local), to listen on. Defaults to {DEFAULT_ADDRESS}")
+parser.add_argument("--interval", "-i", type=int, default=DEFAULT_REFRESH_INTERVAL, help=f"How many seconds to wait between two refreshes of the inventory. Defaults to {DEFAULT_REFRESH_INTERVAL}")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of parallel list calls. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--no-osmh", action="store_true", help="Do not collect the available security updates of the patching waves")
+parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help=f"The maximum number of seconds spent on the updates of one instance. Defaults to {DEFAULT_TIMEOUT}")
+parser.add_argument("--os-family-cache", default=DEFAULT_OS_FAMILY_CACHE, help=f"The file where the OS family of each instance is remembered between runs. Defaults to {DEFAULT_OS_FAMILY_CACHE}")
+parser.add_argument("--no-os-family-cache", action="store_true", help="Do not read nor write the OS family cache")
+addTopologyArguments(parser)
+addBackendArguments(parser)
+addSnapshotArguments(parser)
+addThrottleArguments(parser)
+addProfileArguments(parser)
+args = parser.parse_args()
+apiProfile = profileFromArgs(args)
+#The HTTP server modules are only imported once the arguments are valid, so that --help and usage errors stay fast
+from oci_common.inventory import Inventory, makeServer, ENDPOINTS
+
+clients = ClientPool(poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
+topology = topologyFromArgs(args, clients)
+
+def refreshBackend():
+	"""
+	This function returns the backend of one refresh, with a new snapshot refresher so that every refresh checks the audit log again
+	"""
+	return makeBackend(args.backend, topology, clients, args.workers, refresher=refresherFromArgs(args, clients, args.workers))
+
+inventory = Inventory(refreshBackend, clients, topology, args.workers, not args.no_osmh, args.timeout,
+	None if args.no_os_family_cache else args.os_family_cache)
+try:
+	server = makeServer(args.listen, inventory)
+except OSError as e:
+	print(f"FATAL: cannot listen on {args.listen}: {e}")
+	sys.exit(1)
+
+#Let a service manager stop the daemon cleanly, so that the Unix socket is removed and the API reports are written
+signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+threading.Thread(target=inventory.runForever, args=(args.interval,), daemon=True).start()
+print(f"Listening on {args.listen}, refreshing every {args.interval}s. Endpoints:", file=sys.stderr)
+for path, description in ENDPOINTS.items():
+	print(f"  GET {path}: {description}", file=sys.stderr)
+print("  POST /refresh: refresh the inventory at once", file=sys.stderr, flush=True)
+try:
+	server.serve_forever()
+except KeyboardInterrupt:
+	pass
+finally:
+	server.server_close()
+	writeProfileReports(args, apiProfile)
@@ -0,0 +1,114 @@
+#!/bin/python3
+
+# This script runs one of the inventory reports of this repository on several profiles (tenancies) and regions
+# at the same time and merges the results into a single CSV, JSON Lines, table or Parquet output, with profile, tenancy and region columns.
+# Every region gets its own pool of clients, shared by all the calls made in that region.
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool, loadConfig, subscribedRegions
+from oci_common.lazy import oci
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.scan import iterParallel, DEFAULT_WORKERS
+from oci_common.topology import addTopologyArguments, topologyFromArgs
+from oci_common.backends import addBackendArguments, makeBackend
+from oci_common.reports import findUnattachedVolumes, iterAttachmentTypes, ATTACHMENT_TYPES_COLUMNS
+from oci_common.osmh import iterWaveUpdates, DEFAULT_TIMEOUT, DEFAULT_OS_FAMILY_CACHE
+from oci_common.output import addOutputArguments, makeWriter
+
+REPORT_COLUMNS = {
+	"unattached-block": ["ocid", "name"],
+	"unattached-boot": ["ocid", "name"],
+	"attachment-types": ATTACHMENT_TYPES_COLUMNS,
+	"osmh": ["instance", "ocid", "wave", "os_family", "updates"]}
+
+TARGET_COLUMNS = ["profile", "tenancy", "region"]
+
+parser = argparse.ArgumentParser(description="This program runs an inventory report on several profiles and regions concurrently and merges the results")
+parser.add_argument("report", choices=list(REPORT_COLUMNS), help="The report to run")
+parser.add_argument("--profile", "-p", action="append", help="A profile of ~/.oci/config. Can be repeated. Defaults to DEFAULT")
+parser.add_argument("--region", "-r", action="append", help="A region to query with every profile. Can be repeated. Defaults to the region of each profile")
+parser.add_argument("--all-regions", action="store_true", help="Query all the regions each tenancy is subscribed to")
+parser.add_argument("--wave", action="append", help="The patching wave number for the osmh report. Can be repeated. Defaults to all waves")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of parallel calls in each region. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--target-workers", type=int, default=DEFAULT_WORKERS, help=f"The number of regions queried at the same time. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help=f"The maximum number of seconds spent on one instance by the osmh report. Defaults to {DEFAULT_TIMEOUT}")
+parser.add_argument("--lookup", action="store_true", help="Resolve names with one GET per attachment in the attachment-types report")
+addTopologyArguments(parser)
+addBackendArguments(parser)
+addOutputArguments(parser, default="csv")
+addThrottleArguments(parser)
+addProfileArguments(parser)
+args = parser.parse_args()
+apiProfile = profileFromArgs(args)
+try:
+	writer = makeWriter(args.format, TARGET_COLUMNS + REPORT_COLUMNS[args.report], args.output, not args.no_align)
+except ValueError as e:
+	parser.error(str(e))
+
+# (profile, region) -> client pool
+pools = {}
+for profile in args.profile or [None]:
+	config = loadConfig(profile)
+	homePool = ClientPool(config, profile, poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
+	if args.all_regions:
+		regions = subscribedRegions(homePool)
+	else:
+		regions = args.region or [config.get("region")]
+	for region in regions:
+		pools[(homePool.profile, region)] = homePool if region == homePool.region else ClientPool(loadConfig(profile, region), profile, poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
+
+def runReport(pool):
+	"""
+	This function yields the records of the report for the profile and region of a client pool
+	"""
+	if args.report == "osmh":
+		waves = ["wave_" + str(wave) for wave in args.wave or []]
+		search_client = pool.get("search")
+		osmh_client = pool.get("osmh", timeout=(10, args.timeout))
+		for record, error in iterWaveUpdates(search_client, osmh_client, waves, args.workers, args.timeout, DEFAULT_OS_FAMILY_CACHE):
+			if error:
+				print(f"WARNING: {pool.profile}/{pool.region}: skipping {record['instance']} ({record['ocid']}): {error}", file=sys.stderr)
+				continue
+			yield record
+		return
+	compute_client = pool.get("compute")
+	storage_client = pool.get("storage")
+	topology = topologyFromArgs(args, pool)
+	backend = makeBackend(args.backend, topology, pool, args.workers)
+	if args.report == "attachment-types":
+		yield from iterAttachmentTypes(backend, compute_client, storage_client, args.lookup)
+	else:
+		unattachedVolumes, _ = findUnattachedVolumes(backend, args.report.split("-")[1])
+		yield from unattachedVolumes
+
+def runTarget(profile, region):
+	"""
+	This function returns the records of one profile and region with the target columns,
+	or no record if the region cannot be queried
+	"""
+	pool = pools[(profile, region)]
+	target = {"profile": profile, "tenancy": pool.tenancy, "region": region}
+	try:
+		return [dict(target, **record) for record in runReport(pool)]
+	except (oci.exceptions.ServiceError, oci.exceptions.RequestException) as e:
+		print(f"WARNING: skipping {profile}/{region}: {e}", file=sys.stderr)
+		return []
+	except Exception as e:
+		#Any other failure of one target, e.g. a cache file error, must not abort the merged run
+		print(f"WARNING: skipping {profile}/{region}: {type(e).__name__}: {e}", file=sys.stderr)
+		return []
+
+print(f"Running {args.report} on {len(pools)} region(s)...", file=sys.stderr)
+
+#The records of each region are written as soon as it and the regions before it are done
+for record in iterParallel(runTarget, list(pools), args.target_workers):
+	writer.write(record)
+	writer.flush()
+writer.close()
+
+writeProfileReports(args, apiProfile)
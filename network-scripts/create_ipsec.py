@@ -2,12 +2,18 @@
 
 #TODO prompt for user input if some required variables are missing
 
-import oci
 import argparse
 import sys
-import random
-import string
-import time
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.topology import addTopologyArguments, topologyFromArgs
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.scan import iterCompleted, DEFAULT_WORKERS
+from oci_common.ipsec import addNetworkIndexArguments, resolverFromArgs, createConnection, loadManifest, specFromManifest, printConfiguration
+from oci_common.ipsec import waitForConnection, iterAvailableConnections, iterTunnelChanges, isTunnelUsable, DEFAULT_PROVISIONING_TIMEOUT, DEFAULT_TUNNEL_TIMEOUT
 
 parser = argparse.ArgumentParser(description="This program creates a Site-to-site IPSec VPN")
 parser.add_argument("--compartment-name", "-c", help="The compartment in which the VPN will be created, specified by its name")
@@ -26,10 +32,20 @@ parser.add_argument("--ike", "-i", default="2", choices=["1", "2"], help="The IK
 parser.add_argument("--asn", help="The customer ASN")
 parser.add_argument("--inside-interface", "-T", action="append", help="The IP addresses for the OCI end of the inside tunnels interfaces. Must be either /30 or /31. Provide two routes by using two -T calls" )
 parser.add_argument("--outside-interface", "-t", action="append", help="The IP addresses for the CPE end of the inside tunnels interfaces. Must be either /30 or /31. Provide two routes by using two -t calls" )
+parser.add_argument("--manifest", "-m", help="Create all the connections of a JSON or YAML manifest instead of a single one, without prompting")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"With --manifest, the number of connections created in parallel. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--timeout", type=int, default=DEFAULT_PROVISIONING_TIMEOUT, help=f"How many seconds to wait for the connections to be provisioned. Defaults to {DEFAULT_PROVISIONING_TIMEOUT}")
+parser.add_argument("--wait-tunnels", action="store_true", help="Once the configuration is printed, print the status changes of the tunnels until each connection has a tunnel up")
+parser.add_argument("--tunnel-timeout", type=int, default=DEFAULT_TUNNEL_TIMEOUT, help=f"With --wait-tunnels, how many seconds to wait for the tunnels. Defaults to {DEFAULT_TUNNEL_TIMEOUT}")
+addTopologyArguments(parser)
+addNetworkIndexArguments(parser)
+addThrottleArguments(parser)
+addProfileArguments(parser)
 
 args = parser.parse_args()
+apiProfile = profileFromArgs(args)
 
-tenancyOCID = oci.config.from_file()["tenancy"]
+clients = ClientPool(poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
 compartmentName = args.compartment_name
 compartmentOCID = args.compartment_id
 cpeIP = args.cpe_ip
@@ -53,24 +69,90 @@ if not args.outside_interface:
 else:
     outsideIP = args.outside_interface
 
-iam_client = oci.identity.IdentityClient(oci.config.from_file())
-network_client = oci.core.VirtualNetworkClient(oci.config.from_file())
+network_client = clients.get("network")
+topology = topologyFromArgs(args, clients)
+resolver = resolverFromArgs(args, clients, topology, args.workers)
 
 def fatalExit(message) -> None:
     print(f"FATAL: {message}")
     sys.exit(1)
 
 def compartmentOCIDByName(compartmentName):
-    compartments = oci.pagination.list_call_get_all_results(
-        iam_client.list_compartments,
-        tenancyOCID,
-        compartment_id_in_subtree=True
-    ).data
-    for compartment in compartments:
-        if compartment.name == compartmentName:
-            return compartment.id
-    
-    return None
+    try:
+        return resolver.compartmentOCID(compartmentName)
+    except ValueError as e:
+        fatalExit(e)
+
+def streamTunnels(connectionNames):
+    """
+    This function prints the status changes of the tunnels of the given connections (OCID -> name) as they happen
+    and returns 0 if each connection has a usable tunnel before the tunnel timeout, 1 otherwise
+    """
+    usable = set()
+    for connectionOCID, tunnel, state in iterTunnelChanges(network_client, connectionNames, args.tunnel_timeout, args.workers):
+        status, bgpState = state
+        print(f"TUNNEL {tunnel.display_name}: {status}" + (f", BGP {bgpState}" if bgpState else ""), flush=True)
+        if isTunnelUsable(state) and connectionOCID not in usable:
+            usable.add(connectionOCID)
+            print(f"READY: IPSec {connectionNames[connectionOCID]} is up", flush=True)
+    for connectionOCID in connectionNames:
+        if connectionOCID not in usable:
+            print(f"WARNING: no tunnel of IPSec {connectionNames[connectionOCID]} is up after {args.tunnel_timeout} seconds")
+    return 0 if len(usable) == len(connectionNames) else 1
+
+def createFromManifest(manifestPath):
+    """
+    This function creates all the connections of a manifest and returns the exit status of the script.
+    Every connection is validated and resolved before any is created, then all of them are created in parallel
+    and waited for together.
+    """
+    try:
+        entries = loadManifest(manifestPath)
+    except (OSError, ValueError) as e:
+        fatalExit(e)
+    specs, errors = [], []
+    for entry in entries:
+        try:
+            specs.append(specFromManifest(entry, resolver))
+        except ValueError as e:
+            errors.append(str(e))
+    names = [spec["name"] for spec in specs]
+    errors += [f"{name}: duplicate name" for name in sorted(set(n for n in names if names.count(n) > 1))]
+    if errors:
+        fatalExit("invalid manifest, no connection was created\n  " + "\n  ".join(errors))
+
+    connections = {}
+    failed = 0
+    for spec, result, error in iterCompleted(lambda spec: createConnection(network_client, spec), specs, args.workers):
+        if error:
+            print(f"ERROR: creation of IPSec {spec['name']} failed: {error}")
+            failed += 1
+            continue
+        connection, secret = result
+        connections[connection.id] = (spec, secret)
+        print(f"Creation of IPSec {spec['name']} requested, provisioning...")
+
+    waited = {connectionOCID: spec["compartment_ocid"] for connectionOCID, (spec, _) in connections.items()}
+    available = {}
+    for connectionOCID, state in iterAvailableConnections(network_client, waited, args.timeout):
+        spec, secret = connections[connectionOCID]
+        if state != "AVAILABLE":
+            print(f"WARNING: IPSec {spec['name']} is {state or 'still provisioning'}, please check manually.")
+            failed += 1
+            continue
+        print(f"SUCCESS: IPSec {spec['name']} created.", flush=True)
+        tunnels = network_client.list_ip_sec_connection_tunnels(ipsc_id = connectionOCID).data
+        printConfiguration(spec, tunnels, secret)
+        available[connectionOCID] = spec["name"]
+    print(f"{len(specs) - failed} of {len(specs)} IPSec connections created", flush=True)
+    if args.wait_tunnels and available and streamTunnels(available):
+        failed += 1
+    return 1 if failed else 0
+
+if args.manifest:
+    status = createFromManifest(args.manifest)
+    writeProfileReports(args, apiProfile)
+    sys.exit(status)
 
 if len(insideIP) == 0 or len(insideIP) == 2:
     pass
@@ -123,35 +205,23 @@ if not drgOCID and not drgName:
     drgName = input("INPUT REQUIRED! Please provide the name of the DRG: ")
 
 if not drgOCID and drgName:
-    drgList = network_client.list_drgs(compartment_id=compartmentOCID)
-    for drg in drgList.data:
-        if drg.display_name == drgName:
-            drgOCID = drg.id
-            break
-    else:
-        fatalExit(f"{drgName} not found in the specified compartment")
-elif drgOCID:
-    pass
+    try:
+        drgOCID = resolver.drgOCID(drgName, compartmentOCID)
+    except ValueError as e:
+        fatalExit(e)
+    if not drgOCID:
+        fatalExit(f"{drgName} not found in the tenancy")
 
 if not cpeIP and not cpeOCID:
     cpeIP = input("INPUT REQUIRED! Please provide the IP address of the CPE: ")
 
-cpeList = network_client.list_cpes(compartment_id=compartmentOCID)
-if not cpeOCID and cpeIP:
-    for cpe in cpeList.data:
-        if cpe.ip_address == cpeIP:
-            cpeOCID = cpe.id
-            break
-    else:
-        fatalExit(f"No CPE with IP {cpeIP} found in the specified compartment")
-
-if not cpeIP:
-    for cpe in cpeList.data:
-        if cpe.id == cpeOCID:
-            cpeIP == cpe.ip_address
-            break
-        else:
-            pass
+try:
+    foundOCID, foundIP = resolver.cpe(cpeIP, cpeOCID, compartmentOCID)
+except ValueError as e:
+    fatalExit(e)
+if not cpeOCID and not foundOCID:
+    fatalExit(f"No CPE with IP {cpeIP} found in the tenancy")
+cpeOCID, cpeIP = cpeOCID or foundOCID, foundIP or cpeIP
 
 # Make static routes required or automatically populated
 if not ipsecRoutes:
@@ -193,241 +263,27 @@ if isPolicy:
 if isStatic:
     routingType = "STATIC"
 
-tunnelNames = ["T1-" + ipsecName, "T2-" + ipsecName]
+spec = {"name": ipsecName, "compartment_ocid": compartmentOCID, "drg_ocid": drgOCID, "cpe_ocid": cpeOCID, "cpe_ip": cpeIP,
+    "routing": routingType, "ike": ikeVer, "routes": ipsecRoutes, "local_routes": ipsecLocalRoutes or [], "asn": asn,
+    "inside_ips": insideIP, "outside_ips": outsideIP}
+ipsecConnection, tunnelSecret = createConnection(network_client, spec)
+print(f"Creation of IPSec {ipsecName} requested, provisioning...")
 
-tunnelSecret = "".join(random.choices(string.ascii_uppercase + string.ascii_lowercase + string.digits, k=64))
-
-if isStatic:
-    create_ip_sec_connection_response = network_client.create_ip_sec_connection(
-        create_ip_sec_connection_details=oci.core.models.CreateIPSecConnectionDetails(
-            compartment_id=compartmentOCID,
-            cpe_id=cpeOCID,
-            drg_id=drgOCID,
-            static_routes=ipsecRoutes,
-            display_name=ipsecName,
-            tunnel_configuration=[
-                #Tunnel1
-                oci.core.models.CreateIPSecConnectionTunnelDetails(
-                    display_name=tunnelNames[0],
-                    routing=routingType,
-                    ike_version=ikeVer,
-                    shared_secret=tunnelSecret,
-                    oracle_initiation="INITIATOR_OR_RESPONDER",
-                    nat_translation_enabled="AUTO",
-                    phase_one_config=oci.core.models.PhaseOneConfigDetails(
-                        is_custom_phase_one_config=True,
-                        authentication_algorithm="SHA2_384",
-                        encryption_algorithm="AES_256_CBC",
-                        diffie_helman_group="GROUP20",
-                        lifetime_in_seconds=28800),
-                    phase_two_config=oci.core.models.PhaseTwoConfigDetails(
-                        is_custom_phase_two_config=True,
-                        authentication_algorithm="HMAC_SHA2_256_128",
-                        encryption_algorithm="AES_256_GCM",
-                        lifetime_in_seconds=3600,
-                        is_pfs_enabled=True,
-                        pfs_dh_group="GROUP5"),
-                    dpd_config=oci.core.models.DpdConfig(
-                        dpd_mode="INITIATE_AND_RESPOND",
-                        dpd_timeout_in_sec=20)),
-                #Tunnel2
-                oci.core.models.CreateIPSecConnectionTunnelDetails(
-                    display_name=tunnelNames[1],
-                    routing=routingType,
-                    ike_version=ikeVer,
-                    shared_secret=tunnelSecret,
-                    oracle_initiation="INITIATOR_OR_RESPONDER",
-                    nat_translation_enabled="AUTO",
-                    phase_one_config=oci.core.models.PhaseOneConfigDetails(
-                        is_custom_phase_one_config=True,
-                        authentication_algorithm="SHA2_384",
-                        encryption_algorithm="AES_256_CBC",
-                        diffie_helman_group="GROUP20",
-                        lifetime_in_seconds=28800),
-                    phase_two_config=oci.core.models.PhaseTwoConfigDetails(
-                        is_custom_phase_two_config=True,
-                        authentication_algorithm="HMAC_SHA2_256_128",
-                        encryption_algorithm="AES_256_GCM",
-                        lifetime_in_seconds=3600,
-                        is_pfs_enabled=True,
-                        pfs_dh_group="GROUP5"),
-                    dpd_config=oci.core.models.DpdConfig(
-                        dpd_mode="INITIATE_AND_RESPOND",
-                        dpd_timeout_in_sec=20))]))
-    print(f"Creation of IPSec {ipsecName} requested, provisioning...")
-elif isPolicy:
-    create_ip_sec_connection_response = network_client.create_ip_sec_connection(
-        create_ip_sec_connection_details=oci.core.models.CreateIPSecConnectionDetails(
-            compartment_id=compartmentOCID,
-            cpe_id=cpeOCID,
-            drg_id=drgOCID,
-            static_routes=ipsecRoutes,
-            display_name=ipsecName,
-            tunnel_configuration=[
-                #Tunnel1
-                oci.core.models.CreateIPSecConnectionTunnelDetails(
-                    display_name=tunnelNames[0],
-                    routing=routingType,
-                    ike_version=ikeVer,
-                    shared_secret=tunnelSecret,
-                    oracle_initiation="INITIATOR_OR_RESPONDER",
-                    nat_translation_enabled="AUTO",
-                    phase_one_config=oci.core.models.PhaseOneConfigDetails(
-                        is_custom_phase_one_config=True,
-                        authentication_algorithm="SHA2_384",
-                        encryption_algorithm="AES_256_CBC",
-                        diffie_helman_group="GROUP20",
-                        lifetime_in_seconds=28800),
-                    phase_two_config=oci.core.models.PhaseTwoConfigDetails(
-                        is_custom_phase_two_config=True,
-                        authentication_algorithm="HMAC_SHA2_256_128",
-                        encryption_algorithm="AES_256_GCM",
-                        lifetime_in_seconds=3600,
-                        is_pfs_enabled=True,
-                        pfs_dh_group="GROUP5"),
-                    encryption_domain_config=oci.core.models.CreateIPSecTunnelEncryptionDomainDetails(
-                        oracle_traffic_selector=ipsecLocalRoutes,
-                        cpe_traffic_selector=ipsecRoutes),
-                    dpd_config=oci.core.models.DpdConfig(
-                        dpd_mode="INITIATE_AND_RESPOND",
-                        dpd_timeout_in_sec=20)),
-                #Tunnel2
-                oci.core.models.CreateIPSecConnectionTunnelDetails(
-                    display_name=tunnelNames[1],
-                    routing=routingType,
-                    ike_version=ikeVer,
-                    shared_secret=tunnelSecret,
-                    oracle_initiation="INITIATOR_OR_RESPONDER",
-                    nat_translation_enabled="AUTO",
-                    phase_one_config=oci.core.models.PhaseOneConfigDetails(
-                        is_custom_phase_one_config=True,
-                        authentication_algorithm="SHA2_384",
-                        encryption_algorithm="AES_256_CBC",
-                        diffie_helman_group="GROUP20",
-                        lifetime_in_seconds=28800),
-                    phase_two_config=oci.core.models.PhaseTwoConfigDetails(
-                        is_custom_phase_two_config=True,
-                        authentication_algorithm="HMAC_SHA2_256_128",
-                        encryption_algorithm="AES_256_GCM",
-                        lifetime_in_seconds=3600,
-                        is_pfs_enabled=True,
-                        pfs_dh_group="GROUP5"),
-                    encryption_domain_config=oci.core.models.CreateIPSecTunnelEncryptionDomainDetails(
-                        oracle_traffic_selector=ipsecLocalRoutes,
-                        cpe_traffic_selector=ipsecRoutes),
-                    dpd_config=oci.core.models.DpdConfig(
-                        dpd_mode="INITIATE_AND_RESPOND",
-                        dpd_timeout_in_sec=20))]))
-    print(f"Creation of IPSec {ipsecName} requested, provisioning...")
-elif isBGP:
-    create_ip_sec_connection_response = network_client.create_ip_sec_connection(
-        create_ip_sec_connection_details=oci.core.models.CreateIPSecConnectionDetails(
-            compartment_id=compartmentOCID,
-            cpe_id=cpeOCID,
-            drg_id=drgOCID,
-            static_routes=ipsecRoutes,
-            display_name=ipsecName,
-            tunnel_configuration=[
-                #Tunnel1
-                oci.core.models.CreateIPSecConnectionTunnelDetails(
-                    display_name=tunnelNames[0],
-                    routing=routingType,
-                    ike_version=ikeVer,
-                    shared_secret=tunnelSecret,
-                    bgp_session_config=oci.core.models.CreateIPSecTunnelBgpSessionDetails(
-                        oracle_interface_ip=insideIP[0],
-                        customer_interface_ip=outsideIP[0],
-                        customer_bgp_asn=asn),
-                    oracle_initiation="INITIATOR_OR_RESPONDER",
-                    nat_translation_enabled="AUTO",
-                    phase_one_config=oci.core.models.PhaseOneConfigDetails(
-                        is_custom_phase_one_config=True,
-                        authentication_algorithm="SHA2_384",
-                        encryption_algorithm="AES_256_CBC",
-                        diffie_helman_group="GROUP20",
-                        lifetime_in_seconds=28800),
-                    phase_two_config=oci.core.models.PhaseTwoConfigDetails(
-                        is_custom_phase_two_config=True,
-                        authentication_algorithm="HMAC_SHA2_256_128",
-                        encryption_algorithm="AES_256_GCM",
-                        lifetime_in_seconds=3600,
-                        is_pfs_enabled=True,
-                        pfs_dh_group="GROUP5"),
-                    dpd_config=oci.core.models.DpdConfig(
-                        dpd_mode="INITIATE_AND_RESPOND",
-                        dpd_timeout_in_sec=20)),
-                #Tunnel2
-                oci.core.models.CreateIPSecConnectionTunnelDetails(
-                    display_name=tunnelNames[1],
-                    routing=routingType,
-                    ike_version=ikeVer,
-                    shared_secret=tunnelSecret,
-                    bgp_session_config=oci.core.models.CreateIPSecTunnelBgpSessionDetails(
-                        oracle_interface_ip=insideIP[1],
-                        customer_interface_ip=outsideIP[1],
-                        customer_bgp_asn=asn),
-                    oracle_initiation="INITIATOR_OR_RESPONDER",
-                    nat_translation_enabled="AUTO",
-                    phase_one_config=oci.core.models.PhaseOneConfigDetails(
-                        is_custom_phase_one_config=True,
-                        authentication_algorithm="SHA2_384",
-                        encryption_algorithm="AES_256_CBC",
-                        diffie_helman_group="GROUP20",
-                        lifetime_in_seconds=28800),
-                    phase_two_config=oci.core.models.PhaseTwoConfigDetails(
-                        is_custom_phase_two_config=True,
-                        authentication_algorithm="HMAC_SHA2_256_128",
-                        encryption_algorithm="AES_256_GCM",
-                        lifetime_in_seconds=3600,
-                        is_pfs_enabled=True,
-                        pfs_dh_group="GROUP5"),
-                    dpd_config=oci.core.models.DpdConfig(
-                        dpd_mode="INITIATE_AND_RESPOND",
-                        dpd_timeout_in_sec=20))]))
-    print(f"Creation of IPSec {ipsecName} requested, provisioning...")
-
-time.sleep(25)
-
-ipsecOCID = create_ip_sec_connection_response.data.id
-ipsecLifecycle = network_client.get_ip_sec_connection(ipsecOCID).data.lifecycle_state
-if ipsecLifecycle.upper() == 'AVAILABLE':
+ipsecOCID = ipsecConnection.id
+ipsecLifecycle = waitForConnection(network_client, ipsecOCID, args.timeout)
+if ipsecLifecycle == 'AVAILABLE':
     print(f'SUCCESS: IPSec {ipsecName} created.')
 else:
-    print(f'WARNING: There might be some problems creating the IPSec, please check manually.')
+    print(f'WARNING: IPSec {ipsecName} is {ipsecLifecycle or f"still provisioning after {args.timeout} seconds"}, please check manually.')
+    writeProfileReports(args, apiProfile)
     sys.exit(1)
 
 tunnels = network_client.list_ip_sec_connection_tunnels(ipsc_id = ipsecOCID).data
-tunnelOCIDs = [tunnel.id for tunnel in tunnels]
-
-tunnelNamesAndIP = {tunnels[0].display_name: tunnels[0].vpn_ip, tunnels[1].display_name: tunnels[1].vpn_ip}
 
 print ('Below you can find the configuration file. Please provide this file to the networking team entrusted with configuring the actual Customer-Premises equipment.')
-print('|--------------------------------|-----------------------------------------------------------------------|')
-print(f'| {"CPE IP": <30} | {cpeIP: <70}|')
-print(f'| {"IKE version": <30} | {ikeVer: <70}|')
-print(f'| {"Routing Type": <30} | {routingType.replace("POLICY","STATIC"): <70}|')
-if ipsecLocalRoutes:
-    for elem in ipsecLocalRoutes:
-        print(f'| {"OCI-advertised route": <30} | {elem: <70}|')
-for tun in tunnelNames:
-    tunnelIndex = 0
-    print(f'| {tun: <103}|')
-    print(f'| {"  Tunnel IP endpoint": <30} | {tunnelNamesAndIP[tun]: <70}|')
-    print(f'| {"Shared Secret": <30} | {tunnelSecret: <70}|')
-    if len(insideIP) > 0:
-        print(f'| {"  Oracle interface IP": <30} | {insideIP[tunnelIndex]: <70}|')
-    if len(outsideIP) > 0:
-        print(f'| {"  CPE interface IP": <30} | {outsideIP[tunnelIndex]: <70}|')
-    print(f'| {"  Phase 1 info": <30} | {" ": <70}|')
-    print(f'| {"    Authentication algorithm": <30} | {"SHA2-384": <70}|')
-    print(f'| {"    Encryption algorithm": <30} | {"AES-256-CBC": <70}|')
-    print(f'| {"    DH Group": <30} | {"group 20 (ECP 384-bit random)": <70}|')
-    print(f'| {"    IKE lifetime": <30} | {"28800 seconds (8 hours)": <70}|')
-    print(f'| {"  Phase 2 info": <30} | {" ": <70}|')
-    print(f'| {"    Authentication algorithm": <30} | {"HMAC-SHA-256-128": <70}|')
-    print(f'| {"    Encryption algorithm": <30} | {"AES-256-GCM": <70}|')
-    print(f'| {"    Perfect-forward secrecy": <30} | {"Enabled": <70}|')
-    print(f'| {"    DH Group": <30} | {"group 5 (MODP 1536-bit)": <70}|')
-    print(f'| {"    IPSec lifetime": <30} | {"3600 seconds (1 hour)": <70}|')
-    tunnelIndex += 1
-print ('|========================================================================================================|')
+printConfiguration(spec, tunnels, tunnelSecret)
+sys.stdout.flush()
+
+status = streamTunnels({ipsecOCID: ipsecName}) if args.wait_tunnels else 0
+writeProfileReports(args, apiProfile)
+sys.exit(status)
@@ -0,0 +1,3 @@
+# Helpers shared by the stand-alone scripts of this repository.
+# Scripts add the repository root to sys.path and import the modules they need,
+# e.g. "from oci_common import scan".
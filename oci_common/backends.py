@@ -0,0 +1,199 @@
+# Query backends returning tenancy-wide inventories of volumes, boot volumes, instances and attachments.
+# ListBackend lists every compartment (and availability domain when the API requires it),
+# SearchBackend uses a handful of paginated Resource Search calls and falls back to
+# ListBackend for the resource types and fields that are not in the search index.
+
+from oci_common.lazy import oci
+from oci_common.pagination import iterRecords
+from oci_common.scan import iterParallel, timedMethod, DEFAULT_WORKERS
+from oci_common.snapshot import SnapshotBackend
+
+BACKENDS = ["list", "search"]
+
+# Fields of the search index, as named in the records returned by the backends
+SEARCH_FIELDS = ("ocid", "name", "compartment_ocid", "availability_domain", "lifecycle_state", "time_created")
+# Resource types of this module and their name in the search query language
+SEARCH_TYPES = {"volume": "volume", "bootvolume": "bootvolume", "instance": "instance"}
+
+def resourceDict(resource):
+	return {
+		"ocid": resource.id,
+		"name": resource.display_name,
+		"compartment_ocid": resource.compartment_id,
+		"availability_domain": resource.availability_domain,
+		"lifecycle_state": resource.lifecycle_state,
+		"time_created": str(resource.time_created)}
+
+def instanceDict(instance):
+	instanceDict = resourceDict(instance)
+	instanceDict["image_ocid"] = instance.image_id
+	return instanceDict
+
+def volumeAttachmentDict(att):
+	attachmentDict = resourceDict(att)
+	attachmentDict["instance_ocid"] = att.instance_id
+	attachmentDict["volume_ocid"] = att.volume_id
+	attachmentDict["device"] = att.device
+	attachmentDict["attachment_type"] = att.attachment_type
+	return attachmentDict
+
+def bootVolumeAttachmentDict(att):
+	attachmentDict = resourceDict(att)
+	attachmentDict["instance_ocid"] = att.instance_id
+	attachmentDict["volume_ocid"] = att.boot_volume_id
+	return attachmentDict
+
+def searchDict(resource):
+	return {
+		"ocid": resource.identifier,
+		"name": resource.display_name,
+		"compartment_ocid": resource.compartment_id,
+		"availability_domain": resource.availability_domain,
+		"lifecycle_state": resource.lifecycle_state,
+		"time_created": str(resource.time_created)}
+
+class ListBackend:
+	""" Lists the resources compartment by compartment, using a bounded thread pool.
+	Only the calls that require an availability domain are split per availability domain.
+	"""
+	name = "list"
+
+	def __init__(self, topology, compute_client, storage_client, workers=DEFAULT_WORKERS, stats=None):
+		self.topology = topology
+		self.workers = workers
+		self.stats = stats
+		# resource type -> (list method, is the availability domain required, record converter)
+		self.listCalls = {
+			"volume": (storage_client.list_volumes, False, resourceDict),
+			"bootvolume": (storage_client.list_boot_volumes, False, resourceDict),
+			"instance": (compute_client.list_instances, False, instanceDict),
+			"volumeattachment": (compute_client.list_volume_attachments, False, volumeAttachmentDict),
+			"bootvolumeattachment": (compute_client.list_boot_volume_attachments, True, bootVolumeAttachmentDict)}
+
+	def iterResources(self, resourceType, fields=SEARCH_FIELDS, compartments=None):
+		"""
+		This function yields one dictionary per resource of the given type in the whole tenancy,
+		or only in the given compartment OCIDs
+		"""
+		for _, record in self._iterTagged({resourceType: compartments}):
+			yield record
+
+	def collectResources(self, resourceTypes):
+		"""
+		This function returns the resources of several types, keyed by type, listing all of them in a single traversal
+		of the compartments. `resourceTypes` is a list of types, or a dictionary of type -> compartment OCIDs to list.
+		"""
+		if not isinstance(resourceTypes, dict):
+			resourceTypes = {resourceType: None for resourceType in resourceTypes}
+		resources = {resourceType: [] for resourceType in resourceTypes}
+		for resourceType, record in self._iterTagged(resourceTypes):
+			resources[resourceType].append(record)
+		return resources
+
+	def _iterTagged(self, compartmentsByType):
+		"""
+		This function yields (resource type, record) tuples, with one task per type, compartment
+		(and availability domain when required) in the same thread pool
+		"""
+		allCompartments = None
+		tasks = []
+		for resourceType, compartments in compartmentsByType.items():
+			if compartments is None:
+				if allCompartments is None:
+					allCompartments = [c["ocid"] for c in self.topology.getCompartments(includeRoot=True, activeOnly=True)]
+				compartments = allCompartments
+			if self.listCalls[resourceType][1]:
+				tasks += [(resourceType, c, ad["name"]) for c in compartments for ad in self.topology.getAvailabilityDomains()]
+			else:
+				tasks += [(resourceType, c, None) for c in compartments]
+
+		listMethods = {}
+		for resourceType in compartmentsByType:
+			listMethod = self.listCalls[resourceType][0]
+			listMethods[resourceType] = timedMethod(listMethod, self.stats) if self.stats is not None else listMethod
+
+		def listCompartment(resourceType, compartmentOCID, adName):
+			convert = self.listCalls[resourceType][2]
+			kwargs = {"compartment_id": compartmentOCID}
+			if adName:
+				kwargs["availability_domain"] = adName
+			return [(resourceType, convert(r)) for r in iterRecords(listMethods[resourceType], **kwargs)]
+
+		return iterParallel(listCompartment, tasks, self.workers)
+
+class SearchBackend:
+	""" Fetches the resources tenancy-wide with Resource Search structured queries.
+	Resource types or fields that are not in the search index are delegated to `fallback`.
+	"""
+	name = "search"
+
+	def __init__(self, search_client, fallback, stats=None):
+		self.search_resources = timedMethod(search_client.search_resources, stats) if stats else search_client.search_resources
+		self.fallback = fallback
+
+	def isSearchable(self, resourceType, fields):
+		return resourceType in SEARCH_TYPES and set(fields) <= set(SEARCH_FIELDS)
+
+	def iterResources(self, resourceType, fields=SEARCH_FIELDS, compartments=None):
+		"""
+		This function yields one dictionary per resource of the given type in the whole tenancy,
+		or only in the given compartment OCIDs (the search is tenancy-wide, the other compartments are filtered out)
+		"""
+		if not self.isSearchable(resourceType, fields):
+			return self.fallback.iterResources(resourceType, fields, compartments)
+		return self._searchType(resourceType, compartments)
+
+	def collectResources(self, resourceTypes):
+		"""
+		This function returns the resources of several types, keyed by type.
+		`resourceTypes` is a list of types, or a dictionary of type -> compartment OCIDs to fetch.
+		"""
+		if not isinstance(resourceTypes, dict):
+			resourceTypes = {resourceType: None for resourceType in resourceTypes}
+		searchable = [t for t in resourceTypes if self.isSearchable(t, SEARCH_FIELDS)]
+		resources = self.fallback.collectResources({t: c for t, c in resourceTypes.items() if t not in searchable})
+		for resourceType in searchable:
+			resources[resourceType] = list(self._searchType(resourceType, resourceTypes[resourceType]))
+		return resources
+
+	def _searchType(self, resourceType, compartments=None):
+		compartments = None if compartments is None else set(compartments)
+		for record in self._search(f"query {SEARCH_TYPES[resourceType]} resources"):
+			if compartments is None or record["compartment_ocid"] in compartments:
+				yield record
+
+	def _search(self, query):
+		search_details = oci.resource_search.models.StructuredSearchDetails(type="Structured", query=query)
+		for resource in iterRecords(self.search_resources, search_details):
+			yield searchDict(resource)
+
+class MemoryBackend:
+	""" Serves resources already fetched, keyed by type, e.g. to compute several reports from a single traversal of the tenancy.
+	"""
+	name = "memory"
+
+	def __init__(self, resources):
+		self.resources = resources
+
+	def iterResources(self, resourceType, fields=None, compartments=None):
+		for record in self.resources[resourceType]:
+			if compartments is None or record["compartment_ocid"] in compartments:
+				yield record
+
+	def collectResources(self, resourceTypes):
+		return {resourceType: list(self.resources[resourceType]) for resourceType in resourceTypes}
+
+def addBackendArguments(parser):
+	parser.add_argument("--backend", choices=BACKENDS, default="list", help="How the inventory is fetched: per-compartment listing (list) or tenancy-wide Resource Search (search). Defaults to list")
+
+def makeBackend(name, topology, clients, workers=DEFAULT_WORKERS, stats=None, refresher=None):
+	"""
+	This function returns the backend called `name`. With a snapshot refresher (see oci_common.snapshot),
+	the inventory is served from the snapshot and only the changed compartments are fetched with that backend.
+	"""
+	backend = ListBackend(topology, clients.get("compute"), clients.get("storage"), workers, stats)
+	if name == "search":
+		backend = SearchBackend(clients.get("search"), backend, stats)
+	if refresher:
+		backend = SnapshotBackend(refresher, backend, topology)
+	return backend
@@ -0,0 +1,69 @@
+# Small JSON files used to persist caches between runs.
+# Files are replaced atomically through a unique temporary file, and updateJsonFile serializes the read-merge-write
+# of the threads of a process, so that the regions of a multi-region run do not lose each other's entries.
+
+import json
+import os
+import tempfile
+import threading
+
+# Absolute path -> lock serializing the updates of that file in this process
+_locks = {}
+_locksLock = threading.Lock()
+
+def readJsonFile(path):
+	"""
+	This function returns the content of a JSON file, or an empty dictionary if it is missing or unreadable
+	"""
+	try:
+		with open(path) as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+def writeTextFile(path, text, shared=False):
+	"""
+	This function atomically replaces a text file, creating its folder if needed.
+	The file is only readable by its owner, unless `shared` is set: it then gets the permissions of a file created
+	with open(), for files read by other processes such as a node_exporter running as its own user.
+	"""
+	folder = os.path.dirname(os.path.abspath(path))
+	os.makedirs(folder, exist_ok=True)
+	fd, tmpFile = tempfile.mkstemp(dir=folder, prefix=os.path.basename(path) + ".", suffix=".tmp")
+	try:
+		if shared:
+			#The umask can only be read by setting it
+			umask = os.umask(0o022)
+			os.umask(umask)
+			os.fchmod(fd, 0o666 & ~umask)
+		with os.fdopen(fd, "w") as f:
+			f.write(text)
+		os.replace(tmpFile, path)
+	except BaseException:
+		if os.path.exists(tmpFile):
+			os.remove(tmpFile)
+		raise
+
+def writeJsonFile(path, data, shared=False):
+	"""
+	This function atomically replaces a JSON file, creating its folder if needed (see writeTextFile for `shared`)
+	"""
+	writeTextFile(path, json.dumps(data), shared)
+
+def fileLock(path):
+	"""
+	This function returns the lock serializing the updates of a file by the threads of this process
+	"""
+	with _locksLock:
+		return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+def updateJsonFile(path, update):
+	"""
+	This function reads a JSON file, calls update(data) to modify its content in place and writes it back,
+	while no other thread of this process updates the same file. It returns the written content.
+	"""
+	with fileLock(path):
+		data = readJsonFile(path)
+		update(data)
+		writeJsonFile(path, data)
+		return data
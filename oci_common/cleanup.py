@@ -0,0 +1,234 @@
+# Bulk clean-up of unattached volumes: optional backup, then termination.
+# The create and delete calls are issued in parallel with a bounded thread pool, and all the pending backups and
+# terminations are tracked together by one polling loop that lists each compartment once per round,
+# instead of one blocking waiter per volume. Progress is saved to a checkpoint file so that an interrupted run can resume:
+# every change of state is appended to the file as one JSON line, and the file is compacted at the end of the run.
+
+import json
+import os
+import sys
+import threading
+import time
+
+from oci_common.cachefile import fileLock, writeTextFile
+from oci_common.lazy import oci
+from oci_common.pagination import iterRecords
+from oci_common.scan import scanParallel, DEFAULT_WORKERS
+
+DEFAULT_CHECKPOINT_FILE = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-cleanup.jsonl")
+DEFAULT_POLL_INTERVAL = 15
+DEFAULT_CLEANUP_TIMEOUT = 3600
+
+# Volume type -> API of its backups and of its termination (model classes by name, so that the SDK is imported on first use)
+VOLUME_OPERATIONS = {
+	"block": {
+		"createBackup": ("create_volume_backup", "CreateVolumeBackupDetails", "volume_id"),
+		"listBackups": "list_volume_backups",
+		"delete": ("delete_volume", "volume_id"),
+		"list": "list_volumes"},
+	"boot": {
+		"createBackup": ("create_boot_volume_backup", "CreateBootVolumeBackupDetails", "boot_volume_id"),
+		"listBackups": "list_boot_volume_backups",
+		"delete": ("delete_boot_volume", "boot_volume_id"),
+		"list": "list_boot_volumes"}}
+
+# Checkpoint states of a volume
+PENDING = "pending"
+BACKING_UP = "backing_up"
+DELETING = "deleting"
+DELETED = "deleted"
+FAILED = "failed"
+
+class VolumeCleanup:
+	""" Backs up (if `backup` is set) and terminates volumes given as dictionaries with the keys ocid, name,
+	compartment_ocid and type ("block" or "boot").
+	The state of every volume is kept in `checkpointFile`, if given, under `key` (the tenancy and region), so that
+	volumes already terminated in a previous run are skipped and volumes left backing up or terminating are waited for.
+	Volumes that failed are tried again, unless `retryFailed` is False. With `dryRun`, the planned actions are only printed.
+	"""
+	def __init__(self, storage_client, workers=DEFAULT_WORKERS, backup=False, checkpointFile=None, dryRun=False,
+		pollInterval=DEFAULT_POLL_INTERVAL, timeout=DEFAULT_CLEANUP_TIMEOUT, file=sys.stdout, key="", retryFailed=True):
+		self.storage_client = storage_client
+		self.workers = workers
+		self.backup = backup
+		self.checkpointFile = checkpointFile
+		self.dryRun = dryRun
+		self.pollInterval = pollInterval
+		self.timeout = timeout
+		self.file = file
+		self.key = key
+		self.retryFailed = retryFailed
+		self.checkpoint = {ocid: entry for (entryKey, ocid), entry in self._readCheckpoint().items() if entryKey == key}
+		self._journal = None
+		self._lock = threading.Lock()
+
+	def _readCheckpoint(self):
+		"""
+		This function returns the last entry of every (key, volume OCID) of the checkpoint file
+		"""
+		entries = {}
+		if not self.checkpointFile or not os.path.exists(self.checkpointFile):
+			return entries
+		with open(self.checkpointFile) as f:
+			for line in f:
+				try:
+					entry = json.loads(line)
+					entries[(entry.pop("key"), entry.pop("ocid"))] = entry
+				except (ValueError, KeyError, AttributeError):
+					#A line cut short by an interruption
+					continue
+		return entries
+
+	def _compactCheckpoint(self):
+		"""
+		This function rewrites the checkpoint file with only the last entry of every volume
+		"""
+		with fileLock(self.checkpointFile):
+			if self._journal:
+				self._journal.close()
+				self._journal = None
+			entries = self._readCheckpoint()
+			writeTextFile(self.checkpointFile, "".join(json.dumps(dict(entry, key=key, ocid=ocid)) + "\n" for (key, ocid), entry in entries.items()))
+
+	def _setState(self, volume, state, **details):
+		with self._lock:
+			entry = self.checkpoint.setdefault(volume["ocid"], {
+				"name": volume["name"], "type": volume["type"], "compartment_ocid": volume["compartment_ocid"]})
+			entry.update(details, state=state)
+			if self.checkpointFile:
+				#One line per change instead of rewriting the whole file, flushed so that an interrupted run loses nothing
+				if self._journal is None:
+					os.makedirs(os.path.dirname(os.path.abspath(self.checkpointFile)), exist_ok=True)
+					self._journal = open(self.checkpointFile, "a")
+				self._journal.write(json.dumps(dict(entry, key=self.key, ocid=volume["ocid"])) + "\n")
+				self._journal.flush()
+			print(f'{state: <10} {volume["type"]: <5} {volume["ocid"]} {volume["name"]}{" " + details["error"] if "error" in details else ""}', file=self.file)
+
+	def _state(self, volume):
+		return self.checkpoint.get(volume["ocid"], {}).get("state", PENDING)
+
+	def run(self, volumes):
+		"""
+		This function cleans up the given volumes and returns the number of volumes per final state
+		"""
+		if self.retryFailed:
+			for vol in volumes:
+				if self._state(vol) == FAILED:
+					#Started again from the backup if it is the backup that failed, as it has no backup_ocid then
+					self.checkpoint[vol["ocid"]].update(state=PENDING, error=None)
+		#Volumes still backing up or terminating in the checkpoint are only waited for. A terminating volume is not
+		#reported as unattached, so it is resumed even if the new listing no longer shows it; a volume backing up is,
+		#so if it is missing it was attached again or removed meanwhile, and it must not be terminated
+		listed = {vol["ocid"] for vol in volumes}
+		for ocid, entry in self.checkpoint.items():
+			if entry["state"] == BACKING_UP and ocid not in listed:
+				print(f'Skipping {entry["type"]} volume {ocid} {entry["name"]}: backing up in a previous run but no longer unattached', file=self.file)
+		volumes = [vol for vol in volumes if self._state(vol) not in (DELETED, FAILED)] + [
+			{"ocid": ocid, "name": entry["name"], "type": entry["type"], "compartment_ocid": entry["compartment_ocid"]}
+			for ocid, entry in self.checkpoint.items() if entry["state"] == DELETING and ocid not in listed]
+		if self.dryRun:
+			for vol in volumes:
+				if self._state(vol) != PENDING:
+					action = "wait for"
+				elif self.backup and not self.checkpoint.get(vol["ocid"], {}).get("backup_ocid"):
+					action = "back up and terminate"
+				else:
+					action = "terminate"
+				print(f'Would {action} {vol["type"]} volume {vol["ocid"]} {vol["name"]}', file=self.file)
+			return {"planned": len(volumes)}
+
+		try:
+			#A volume whose backup completed in a previous run is not backed up again
+			toBackUp = [vol for vol in volumes if self.backup and self._state(vol) == PENDING and not self.checkpoint.get(vol["ocid"], {}).get("backup_ocid")]
+			scanParallel(self._createBackup, [(vol,) for vol in toBackUp], self.workers)
+			toDelete = [vol for vol in volumes if self._state(vol) == PENDING]
+			scanParallel(self._delete, [(vol,) for vol in toDelete], self.workers)
+			self._track([vol for vol in volumes if self._state(vol) in (BACKING_UP, DELETING)])
+		finally:
+			if self.checkpointFile:
+				self._compactCheckpoint()
+
+		counts = {}
+		for vol in volumes:
+			counts[self._state(vol)] = counts.get(self._state(vol), 0) + 1
+		return counts
+
+	def _createBackup(self, volume):
+		methodName, detailsClassName, idField = VOLUME_OPERATIONS[volume["type"]]["createBackup"]
+		try:
+			details = getattr(oci.core.models, detailsClassName)(**{idField: volume["ocid"]}, display_name=f'{volume["name"]} (before termination)', type="FULL")
+			backup = getattr(self.storage_client, methodName)(details).data
+			self._setState(volume, BACKING_UP, backup_ocid=backup.id)
+		except oci.exceptions.ServiceError as e:
+			self._setState(volume, FAILED, error=f"backup: {e.code} {e.message}")
+		except Exception as e:
+			#Connection errors are not retried for a non-idempotent call, the volume is tried again by the next run
+			self._setState(volume, FAILED, error=f"backup: {type(e).__name__}: {e}")
+		return []
+
+	def _delete(self, volume):
+		methodName, idField = VOLUME_OPERATIONS[volume["type"]]["delete"]
+		try:
+			getattr(self.storage_client, methodName)(**{idField: volume["ocid"]})
+			self._setState(volume, DELETING)
+		except oci.exceptions.ServiceError as e:
+			if e.status == 404:
+				self._setState(volume, DELETED)
+			else:
+				self._setState(volume, FAILED, error=f"delete: {e.code} {e.message}")
+		except Exception as e:
+			self._setState(volume, FAILED, error=f"delete: {type(e).__name__}: {e}")
+		return []
+
+	def _track(self, volumes):
+		"""
+		This function polls the pending backups and terminations until all of them are done or the timeout expires.
+		Each round lists the backups or volumes of each compartment once, whatever the number of volumes waited for.
+		"""
+		deadline = time.monotonic() + self.timeout
+		pending = list(volumes)
+		while pending:
+			if time.monotonic() > deadline:
+				#Their state is kept, so that the next run with the same checkpoint waits for them again
+				print(f"{len(pending)} volume(s) still pending after {self.timeout}s, run again to resume", file=self.file)
+				return
+			time.sleep(self.pollInterval)
+			# (list method, compartment) -> {resource OCID: lifecycle state}
+			listings = {}
+			for vol in pending:
+				operations = VOLUME_OPERATIONS[vol["type"]]
+				listings[(operations["listBackups" if self._state(vol) == BACKING_UP else "list"], vol["compartment_ocid"])] = None
+			listed = scanParallel(self._listStates, list(listings), self.workers)
+			for key, states in listed:
+				listings[key] = states
+
+			readyToDelete = []
+			for vol in pending:
+				operations = VOLUME_OPERATIONS[vol["type"]]
+				if self._state(vol) == BACKING_UP:
+					backupState = listings[(operations["listBackups"], vol["compartment_ocid"])].get(self.checkpoint[vol["ocid"]]["backup_ocid"])
+					if backupState == "AVAILABLE":
+						self._setState(vol, PENDING)
+						readyToDelete.append(vol)
+					elif backupState in ("FAULTY", "TERMINATED"):
+						self._setState(vol, FAILED, error=f"backup is {backupState}", backup_ocid=None)
+				else:
+					if listings[(operations["list"], vol["compartment_ocid"])].get(vol["ocid"], "TERMINATED") == "TERMINATED":
+						self._setState(vol, DELETED)
+			scanParallel(self._delete, [(vol,) for vol in readyToDelete], self.workers)
+			pending = [vol for vol in pending if self._state(vol) in (BACKING_UP, DELETING)]
+
+	def _listStates(self, methodName, compartmentOCID):
+		states = {r.id: r.lifecycle_state for r in iterRecords(getattr(self.storage_client, methodName), compartment_id = compartmentOCID)}
+		return [((methodName, compartmentOCID), states)]
+
+def addCleanupArguments(parser):
+	group = parser.add_mutually_exclusive_group()
+	group.add_argument("--terminate-ask", action="store_true", help="Terminate the unattached volumes after a confirmation")
+	group.add_argument("--terminate-force", action="store_true", help="Terminate the unattached volumes without confirmation")
+	parser.add_argument("--backup", action="store_true", help="With --terminate-*, create a full backup of every volume before terminating it")
+	parser.add_argument("--dry-run", action="store_true", help="With --terminate-*, only print what would be done")
+	parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_FILE, help=f"With --terminate-*, the file where the progress is saved for each tenancy and region, so that an interrupted run resumes where it stopped. Defaults to {DEFAULT_CHECKPOINT_FILE}")
+	parser.add_argument("--skip-failed", action="store_true", help="With --terminate-*, do not try again the volumes whose backup or termination failed in a previous run with the same checkpoint")
+	parser.add_argument("--cleanup-timeout", type=int, default=DEFAULT_CLEANUP_TIMEOUT, help=f"With --terminate-*, how many seconds to wait for the backups and terminations. Defaults to {DEFAULT_CLEANUP_TIMEOUT}")
+	parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help=f"With --terminate-*, how many seconds to wait between two checks of the pending backups and terminations. Defaults to {DEFAULT_POLL_INTERVAL}")
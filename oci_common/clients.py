@@ -0,0 +1,147 @@
+# OCI configuration and client pools shared by the scripts of this repository.
+# The configuration is parsed once per pool, each client is created on first use and shared by all the threads,
+# with an HTTP connection pool large enough for the parallel scans.
+# Neither the configuration nor the clients are loaded before they are needed, so that creating a pool
+# does not import the OCI SDK (see oci_common.lazy).
+
+import importlib
+import threading
+import time
+
+from oci_common.lazy import Lazy, oci
+from oci_common.scan import DEFAULT_WORKERS
+from oci_common.throttle import Throttle
+
+# Client name -> (module of the oci package, class)
+CLIENTS = {
+	"identity": ("identity", "IdentityClient"),
+	"compute": ("core", "ComputeClient"),
+	"storage": ("core", "BlockstorageClient"),
+	"network": ("core", "VirtualNetworkClient"),
+	"search": ("resource_search", "ResourceSearchClient"),
+	"osmh": ("os_management_hub", "ManagedInstanceClient"),
+	"audit": ("audit", "AuditClient")}
+# Same as oci.config.DEFAULT_PROFILE, without importing the SDK
+DEFAULT_PROFILE = "DEFAULT"
+
+# Set by injectFake: (config, factory) used instead of ~/.oci/config and the SDK clients
+_fake = None
+
+def injectFake(config, factory):
+	"""
+	This function makes every client pool created afterwards use `config` instead of ~/.oci/config
+	and factory(name, config, **kwargs) instead of the SDK client classes, e.g. to run the scripts against a local fake
+	"""
+	global _fake
+	_fake = (config, factory)
+
+def loadConfig(profile=None, region=None):
+	"""
+	This function loads a profile (DEFAULT if None) of ~/.oci/config, optionally overriding its region
+	"""
+	config = dict(_fake[0]) if _fake else oci.config.from_file(profile_name=profile or DEFAULT_PROFILE)
+	if region:
+		config = dict(config, region=region)
+	return config
+
+def sizeConnectionPool(client, size):
+	"""
+	This function lets `size` threads share the HTTPS connections of a client instead of the default 10
+	"""
+	session = getattr(getattr(client, "base_client", None), "session", None)
+	if session is None:
+		return
+	adapter = session.adapters.get("https://")
+	if adapter is None or getattr(adapter, "_pool_maxsize", 0) >= size:
+		return
+	#Same adapter class, so that the OCI specific transport behavior is kept
+	session.mount("https://", type(adapter)(
+		pool_connections=getattr(adapter, "_pool_connections", 10),
+		pool_maxsize=size,
+		max_retries=adapter.max_retries,
+		pool_block=getattr(adapter, "_pool_block", False)))
+
+class PooledClient:
+	""" Proxy of an OCI client whose public methods go through the throttle of the pool
+	and, if the pool has one, are recorded in its API profile (see oci_common.profiling).
+	The client may be a Lazy proxy, created by the first call.
+	"""
+	def __init__(self, client, throttle, profile=None):
+		self._client = client
+		self._throttle = throttle
+		self._profile = profile
+
+	def __getattr__(self, name):
+		attribute = getattr(self._client, name)
+		if name.startswith("_") or not callable(attribute):
+			return attribute
+
+		def wrapper(*args, **kwargs):
+			start = time.perf_counter()
+			result, error, retries, seconds = self._throttle.attempt(attribute, args, kwargs)
+			if self._profile is not None:
+				self._profile.record(name, seconds, time.perf_counter() - start - seconds, retries, result, error)
+			if error is not None:
+				raise error
+			return result
+		wrapper.__name__ = name
+		return wrapper
+
+class ClientPool:
+	""" The OCI clients of one profile and region.
+	Each client is created on first use and then shared by all the threads working on that region,
+	so that its HTTP connections are reused. `poolSize` is the number of connections kept per client.
+	All the calls go through `throttle` (see oci_common.throttle), by default a Throttle allowing `poolSize` calls in flight,
+	and are recorded in `apiProfile` if given.
+	"""
+	def __init__(self, config=None, profile=None, region=None, poolSize=DEFAULT_WORKERS, throttle=None, apiProfile=None):
+		self._config = config
+		self._configRegion = region
+		self.profile = profile or DEFAULT_PROFILE
+		self.poolSize = poolSize
+		self.throttle = throttle or Throttle(maxConcurrency=poolSize)
+		self.apiProfile = apiProfile
+		self._clients = {}
+		self._lock = threading.Lock()
+		self._configLock = threading.Lock()
+
+	@property
+	def config(self):
+		with self._configLock:
+			if self._config is None:
+				self._config = loadConfig(self.profile, self._configRegion)
+			return self._config
+
+	@property
+	def region(self):
+		return self.config.get("region")
+
+	@property
+	def tenancy(self):
+		return self.config["tenancy"]
+
+	def get(self, name, **kwargs):
+		"""
+		This function returns the client called `name` (see CLIENTS), created with the optional keyword arguments on its first call
+		"""
+		key = (name, tuple(sorted(kwargs.items())))
+		with self._lock:
+			if key not in self._clients:
+				self._clients[key] = PooledClient(Lazy(lambda: self._create(name, kwargs)), self.throttle, self.apiProfile)
+			return self._clients[key]
+
+	def _create(self, name, kwargs):
+		if _fake:
+			return _fake[1](name, self.config, **kwargs)
+		moduleName, className = CLIENTS[name]
+		client = getattr(importlib.import_module("oci." + moduleName), className)(self.config, **kwargs)
+		sizeConnectionPool(client, self.poolSize)
+		return client
+
+def subscribedRegions(pool):
+	"""
+	This function returns the names of the regions the tenancy of a client pool is subscribed to, home region first
+	"""
+	subscriptions = pool.get("identity").list_region_subscriptions(pool.tenancy).data
+	subscriptions = [s for s in subscriptions if s.status == "READY"]
+	return [s.region_name for s in sorted(subscriptions, key=lambda s: not s.is_home_region)]
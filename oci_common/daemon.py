@@ -0,0 +1,81 @@
+# Client of the inventory daemon (inventory_daemon.py, see oci_common.inventory): the scripts given --daemon ask it first
+# and only crawl the tenancy themselves if it cannot answer. The HTTP client is only imported when a daemon is queried.
+
+import json
+import os
+import re
+import sys
+import time
+import urllib.parse
+
+DEFAULT_ADDRESS = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-inventory.sock")
+# How many seconds a script waits for the answer of the daemon before crawling the tenancy itself
+DEFAULT_CLIENT_TIMEOUT = 10
+# How many seconds the daemon waits between two refreshes of its inventory
+DEFAULT_REFRESH_INTERVAL = 900
+# How old the inventory of the daemon may be, in seconds: two refreshes at the default interval of the daemon
+DEFAULT_MAX_AGE = 2 * DEFAULT_REFRESH_INTERVAL
+
+def tcpAddress(address):
+	"""
+	This function returns the (host, port) of a HOST:PORT or :PORT address (host 127.0.0.1), or None for a Unix socket path
+	"""
+	match = re.fullmatch(r"([\w.-]*):(\d+)", address)
+	if not match:
+		return None
+	return match.group(1) or "127.0.0.1", int(match.group(2))
+
+def queryDaemon(address, path, params=None, timeout=DEFAULT_CLIENT_TIMEOUT):
+	"""
+	This function returns the JSON answer of the daemon listening on `address` to a GET of `path`.
+	It raises an OSError if the daemon cannot be reached or cannot answer.
+	"""
+	import http.client
+	import socket
+	tcp = tcpAddress(address)
+	if tcp:
+		connection = http.client.HTTPConnection(*tcp, timeout=timeout)
+	else:
+		#A connection given an open socket does not connect by itself
+		connection = http.client.HTTPConnection("localhost", timeout=timeout)
+		connection.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		connection.sock.settimeout(timeout)
+	try:
+		if not tcp:
+			connection.sock.connect(address)
+		connection.request("GET", path + ("?" + urllib.parse.urlencode(params, doseq=True) if params else ""))
+		response = connection.getresponse()
+		body = json.loads(response.read())
+	except (http.client.HTTPException, ValueError) as e:
+		raise OSError(f"invalid answer: {e}")
+	finally:
+		connection.close()
+	if response.status != 200:
+		raise OSError(body.get("error") or f"HTTP {response.status}")
+	return body
+
+def addDaemonArguments(parser):
+	parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, help=f"Ask the inventory daemon (inventory_daemon.py) listening on this Unix socket or HOST:PORT, and only crawl the tenancy if it cannot answer. Defaults to {DEFAULT_ADDRESS}")
+	parser.add_argument("--daemon-max-age", type=int, default=DEFAULT_MAX_AGE, help=f"With --daemon, crawl the tenancy if the inventory of the daemon is older than this many seconds. Defaults to {DEFAULT_MAX_AGE}")
+
+def askDaemon(args, path, params=None):
+	"""
+	This function returns the records answered by the daemon given with --daemon, or None if there is none or it cannot answer,
+	in which case a warning is printed and the script crawls the tenancy itself
+	"""
+	if not args.daemon:
+		return None
+	try:
+		answer = queryDaemon(args.daemon, path, params)
+	except OSError as e:
+		print(f"WARNING: inventory daemon at {args.daemon} unavailable ({e}), crawling the tenancy", file=sys.stderr)
+		return None
+	if answer.get("last_error"):
+		print(f"WARNING: the last refresh of the inventory daemon failed ({answer['last_error']}), crawling the tenancy", file=sys.stderr)
+		return None
+	age = time.time() - answer["refreshed_at"]
+	if age > args.daemon_max_age:
+		print(f"WARNING: the inventory of the daemon is {age:.0f}s old, crawling the tenancy", file=sys.stderr)
+		return None
+	print(f"Inventory of the daemon at {args.daemon}, as of {age:.0f}s ago", file=sys.stderr)
+	return answer["records"]
@@ -0,0 +1,198 @@
+# The inventory served by inventory_daemon.py: a warm in-memory inventory of the tenancy, refreshed in the background,
+# and the local HTTP API answering the reports of the scripts from memory, on a Unix socket or a TCP port.
+
+import http.server
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import urllib.parse
+
+from oci_common.backends import MemoryBackend
+from oci_common.daemon import tcpAddress, DEFAULT_REFRESH_INTERVAL
+from oci_common.osmh import iterWaveUpdates, DEFAULT_TIMEOUT
+from oci_common.reports import findUnattachedVolumesByType, iterAttachmentTypes, VOLUME_TYPES
+from oci_common.scan import DEFAULT_WORKERS
+
+# Resource types kept in memory, fetched together in a single traversal of the tenancy
+INVENTORY_TYPES = ["volume", "bootvolume", "instance", "volumeattachment", "bootvolumeattachment"]
+# Path -> description of the GET endpoints
+ENDPOINTS = {
+	"/status": "age, duration and size of the inventory",
+	"/compartments": "the active compartments, root included",
+	"/unattached": "the unattached volumes, of the types given by ?type=block&type=boot (default both)",
+	"/attachment-types": "the volume attachments and their type",
+	"/wave-updates": "the available security updates of the instances of the waves given by ?wave=wave_1 (default all)"}
+
+class Inventory:
+	""" In-memory inventory of a tenancy, rebuilt as a whole by refresh() and read by any number of threads.
+	makeBackend() must return the query backend of one refresh (see oci_common.backends); the wave updates are only
+	collected if `osmh` is set. A refresh that fails keeps the previous inventory.
+	"""
+	def __init__(self, makeBackend, clients, topology, workers=DEFAULT_WORKERS, osmh=True, osmhTimeout=DEFAULT_TIMEOUT,
+		osFamilyCache=None, file=sys.stderr):
+		self.makeBackend = makeBackend
+		self.clients = clients
+		self.topology = topology
+		self.workers = workers
+		self.osmh = osmh
+		self.osmhTimeout = osmhTimeout
+		self.osFamilyCache = osFamilyCache
+		self.file = file
+		self.state = None
+		self.lastError = None
+		self.refreshing = False
+		self._wake = threading.Event()
+
+	def refresh(self):
+		"""
+		This function fetches the whole inventory and computes all the reports, then replaces the previous inventory at once
+		"""
+		start = time.time()
+		resources = self.makeBackend().collectResources(INVENTORY_TYPES)
+		backend = MemoryBackend(resources)
+		unattached = findUnattachedVolumesByType(backend, list(VOLUME_TYPES))
+		state = {
+			"refreshed_at": start,
+			"counts": {resourceType: len(records) for resourceType, records in resources.items()},
+			"compartments": self.topology.getCompartments(includeRoot=True, activeOnly=True),
+			"unattached": [dict(vol, type=volumeType) for volumeType in VOLUME_TYPES for vol in unattached[volumeType][0]],
+			"attachment_types": list(iterAttachmentTypes(backend, self.clients.get("compute"), self.clients.get("storage"))),
+			"wave_updates": self._waveUpdates() if self.osmh else None}
+		state["counts"]["compartment"] = len(state["compartments"])
+		state["refresh_seconds"] = time.time() - start
+		#Readers keep the dictionary they got, so swapping it is enough
+		self.state = state
+
+	def _waveUpdates(self):
+		records = []
+		osmh_client = self.clients.get("osmh", timeout=(10, self.osmhTimeout))
+		for record, error in iterWaveUpdates(self.clients.get("search"), osmh_client, [], self.workers, self.osmhTimeout, self.osFamilyCache):
+			if error:
+				print(f"WARNING: skipping {record['instance']} ({record['ocid']}): {error}", file=self.file)
+			else:
+				records.append(record)
+		return records
+
+	def runForever(self, interval=DEFAULT_REFRESH_INTERVAL):
+		"""
+		This function refreshes the inventory every `interval` seconds, or at once when requestRefresh() is called
+		"""
+		while True:
+			self.refreshing = True
+			try:
+				self.refresh()
+				self.lastError = None
+				counts = ", ".join(f"{count} {resourceType}" for resourceType, count in self.state["counts"].items())
+				print(f"Inventory refreshed in {self.state['refresh_seconds']:.1f}s: {counts}", file=self.file, flush=True)
+			except Exception as e:
+				#Any failure, e.g. an expired session or a network outage, must not stop the daemon
+				self.lastError = str(e)
+				print(f"WARNING: refresh failed, keeping the previous inventory: {e}", file=self.file, flush=True)
+			self.refreshing = False
+			self._wake.wait(interval)
+			self._wake.clear()
+
+	def requestRefresh(self):
+		self._wake.set()
+
+	def answer(self, path, params):
+		"""
+		This function returns the (HTTP status, JSON body) of a GET of one of ENDPOINTS with the given query parameters
+		"""
+		state = self.state
+		if path == "/status":
+			status = {"ready": state is not None, "refreshing": self.refreshing, "last_error": self.lastError}
+			if state:
+				status.update(refreshed_at=state["refreshed_at"], refresh_seconds=state["refresh_seconds"], counts=state["counts"])
+			return 200, status
+		if path not in ENDPOINTS:
+			return 404, {"error": f"unknown path {path}, expected one of {', '.join(ENDPOINTS)}"}
+		if state is None:
+			return 503, {"error": "the first refresh of the inventory is not done yet"}
+		if path == "/compartments":
+			records = state["compartments"]
+		elif path == "/unattached":
+			volumeTypes = params.get("type") or list(VOLUME_TYPES)
+			records = [vol for vol in state["unattached"] if vol["type"] in volumeTypes]
+		elif path == "/attachment-types":
+			records = state["attachment_types"]
+		else:
+			if state["wave_updates"] is None:
+				return 404, {"error": "this daemon does not collect the wave updates (--no-osmh)"}
+			waves = params.get("wave")
+			records = [record for record in state["wave_updates"] if not waves or record["wave"] in waves]
+		#The error of the last refresh, if any, tells the clients that the records may be stale
+		return 200, {"refreshed_at": state["refreshed_at"], "last_error": self.lastError, "records": records}
+
+class InventoryRequestHandler(http.server.BaseHTTPRequestHandler):
+	""" JSON API of the inventory of the server: GET one of ENDPOINTS, or POST /refresh to refresh it at once
+	"""
+	def do_GET(self):
+		url = urllib.parse.urlsplit(self.path)
+		self._reply(*self.server.inventory.answer(url.path, urllib.parse.parse_qs(url.query)))
+
+	def do_POST(self):
+		if urllib.parse.urlsplit(self.path).path != "/refresh":
+			self._reply(404, {"error": "only /refresh accepts POST"})
+			return
+		self.server.inventory.requestRefresh()
+		self._reply(202, {"refresh": "requested"})
+
+	def _reply(self, status, body):
+		data = json.dumps(body).encode()
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def log_message(self, format, *args):
+		#Only the refreshes are logged
+		pass
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	""" HTTP server on a Unix socket, removed when the server is closed
+	"""
+	daemon_threads = True
+
+	def get_request(self):
+		#BaseHTTPRequestHandler expects a (host, port) client address
+		request, _ = super().get_request()
+		return request, ("local", 0)
+
+	def server_close(self):
+		super().server_close()
+		if os.path.exists(self.server_address):
+			os.remove(self.server_address)
+
+def makeServer(address, inventory):
+	"""
+	This function returns the HTTP server of an inventory, listening on a Unix socket path or a HOST:PORT address.
+	The Unix socket is only accessible to the current user. It raises an OSError if the address is in use.
+	"""
+	tcp = tcpAddress(address)
+	if tcp:
+		server = http.server.ThreadingHTTPServer(tcp, InventoryRequestHandler)
+	else:
+		if os.path.exists(address):
+			probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+			try:
+				probe.connect(address)
+			except OSError:
+				#Left by a daemon that did not exit cleanly
+				os.remove(address)
+			else:
+				raise OSError(f"another daemon is listening on {address}")
+			finally:
+				probe.close()
+		umask = os.umask(0o177)
+		try:
+			server = UnixHTTPServer(address, InventoryRequestHandler)
+		finally:
+			os.umask(umask)
+	server.inventory = inventory
+	return server
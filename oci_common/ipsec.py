@@ -0,0 +1,461 @@
+# Site-to-Site VPN helpers shared by create_ipsec.py: the IPSec connection and tunnel details with the phase 1 and
+# phase 2 parameters suggested by Oracle, the resolution of compartment, DRG and CPE names, the connection manifests
+# of the batch mode and the printed CPE configuration.
+
+import json
+import os
+import secrets
+import string
+import sys
+import threading
+import time
+
+from oci_common.cachefile import readJsonFile, updateJsonFile
+from oci_common.lazy import Lazy, oci
+from oci_common.pagination import iterRecords
+from oci_common.scan import scanParallel, DEFAULT_WORKERS
+
+ROUTING_TYPES = {"static": "STATIC", "policy": "POLICY", "bgp": "BGP"}
+DEFAULT_BGP_INSIDE_IPS = ["10.0.1.2/30", "10.0.2.2/30"]
+DEFAULT_BGP_OUTSIDE_IPS = ["10.0.1.1/30", "10.0.2.1/30"]
+DEFAULT_PROVISIONING_TIMEOUT = 900
+DEFAULT_TUNNEL_TIMEOUT = 3600
+DEFAULT_INDEX_TTL = 86400
+DEFAULT_INDEX_FILE = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-network-index.json")
+# Delay before the first poll of a resource, doubled after every poll without change up to the maximum
+FIRST_POLL_DELAY = 2
+MAX_POLL_DELAY = 30
+# Lifecycle states of the resources that no longer exist
+GONE_STATES = ("DELETED", "TERMINATED", "TERMINATING", "DELETING")
+
+# Keys of a connection in a manifest
+MANIFEST_KEYS = {"name", "compartment_name", "compartment_id", "drg_name", "drg_id", "cpe_ip", "cpe_id", "routing", "ike",
+	"routes", "local_routes", "asn", "inside_interfaces", "outside_interfaces"}
+
+def newSharedSecret():
+	alphabet = string.ascii_uppercase + string.ascii_lowercase + string.digits
+	return "".join(secrets.choice(alphabet) for _ in range(64))
+
+def tunnelDetails(spec, index, secret):
+	"""
+	This function returns the details of the tunnel `index` (0 or 1) of a connection
+	"""
+	details = oci.core.models.CreateIPSecConnectionTunnelDetails(
+		display_name=f"T{index + 1}-{spec['name']}",
+		routing=spec["routing"],
+		ike_version=spec["ike"],
+		shared_secret=secret,
+		oracle_initiation="INITIATOR_OR_RESPONDER",
+		nat_translation_enabled="AUTO",
+		phase_one_config=oci.core.models.PhaseOneConfigDetails(
+			is_custom_phase_one_config=True,
+			authentication_algorithm="SHA2_384",
+			encryption_algorithm="AES_256_CBC",
+			diffie_helman_group="GROUP20",
+			lifetime_in_seconds=28800),
+		phase_two_config=oci.core.models.PhaseTwoConfigDetails(
+			is_custom_phase_two_config=True,
+			authentication_algorithm="HMAC_SHA2_256_128",
+			encryption_algorithm="AES_256_GCM",
+			lifetime_in_seconds=3600,
+			is_pfs_enabled=True,
+			pfs_dh_group="GROUP5"),
+		dpd_config=oci.core.models.DpdConfig(
+			dpd_mode="INITIATE_AND_RESPOND",
+			dpd_timeout_in_sec=20))
+	if spec["routing"] == "BGP":
+		details.bgp_session_config = oci.core.models.CreateIPSecTunnelBgpSessionDetails(
+			oracle_interface_ip=spec["inside_ips"][index],
+			customer_interface_ip=spec["outside_ips"][index],
+			customer_bgp_asn=spec["asn"])
+	elif spec["routing"] == "POLICY":
+		details.encryption_domain_config = oci.core.models.CreateIPSecTunnelEncryptionDomainDetails(
+			oracle_traffic_selector=spec["local_routes"],
+			cpe_traffic_selector=spec["routes"])
+	return details
+
+def connectionDetails(spec, secret):
+	"""
+	This function returns the details of the IPSec connection described by a connection spec, a dictionary with the keys
+	name, compartment_ocid, drg_ocid, cpe_ocid, routing (STATIC, POLICY or BGP), ike (V1 or V2), routes, local_routes,
+	asn, inside_ips and outside_ips
+	"""
+	return oci.core.models.CreateIPSecConnectionDetails(
+		compartment_id=spec["compartment_ocid"],
+		cpe_id=spec["cpe_ocid"],
+		drg_id=spec["drg_ocid"],
+		static_routes=spec["routes"],
+		display_name=spec["name"],
+		tunnel_configuration=[tunnelDetails(spec, 0, secret), tunnelDetails(spec, 1, secret)])
+
+def createConnection(network_client, spec):
+	"""
+	This function requests the creation of an IPSec connection and returns it with the shared secret of its tunnels
+	"""
+	secret = newSharedSecret()
+	connection = network_client.create_ip_sec_connection(create_ip_sec_connection_details=connectionDetails(spec, secret)).data
+	return connection, secret
+
+class NetworkResolver:
+	""" Resolves compartment names, DRG names and CPE IP addresses to OCIDs, in any compartment of the tenancy.
+	The lookups use an index built with a single tenancy-wide Resource Search query for the compartments, DRGs and CPEs,
+	plus one list of the CPEs (for their IP addresses) in each compartment that has some.
+	If `cacheFile` is given, the index is persisted to that JSON file and reused by later runs for `ttl` seconds.
+	A DRG or CPE lookup that misses lists the compartment of the connection, as the search index lags behind the creations,
+	and a lookup that still misses rebuilds the index once, in case the resource was created after the index was built.
+	"""
+	def __init__(self, search_client, network_client, topology, tenancyOCID, region=None, ttl=DEFAULT_INDEX_TTL, cacheFile=None, workers=DEFAULT_WORKERS):
+		self.search_client = search_client
+		self.network_client = network_client
+		self.topology = topology
+		self.key = f"{tenancyOCID}/{region}" if region else tenancyOCID
+		self.ttl = ttl
+		self.cacheFile = cacheFile
+		self.workers = workers
+		self._index = None
+		self._rebuilt = False
+		self._lock = threading.RLock()
+
+	def compartmentOCID(self, compartmentName):
+		"""
+		This function returns the OCID of the compartment called `compartmentName`, or None if there is none.
+		It raises a ValueError if several compartments have that name.
+		"""
+		ocids = self._lookup(lambda index: index["compartments"].get(compartmentName))
+		if ocids and len(ocids) > 1:
+			raise ValueError(f"compartment {compartmentName} is ambiguous: {len(ocids)} compartments have that name, specify its OCID")
+		#The root compartment is not in the search index
+		return ocids[0] if ocids else self.topology.compartmentOCIDByName(compartmentName)
+
+	def drgOCID(self, drgName, compartmentOCID=None):
+		"""
+		This function returns the OCID of the DRG called `drgName`, preferably the one in `compartmentOCID` if several have
+		that name, or None if there is none. It raises a ValueError if several DRGs have that name and none is in `compartmentOCID`.
+		"""
+		def direct():
+			return [[drg.id, drg.compartment_id] for drg in self._listCompartment(self.network_client.list_drgs, compartmentOCID)
+				if drg.display_name == drgName] or None
+		return self._pickIndexed(self._lookup(lambda index: index["drgs"].get(drgName), direct), direct, compartmentOCID, f"DRG {drgName}")
+
+	def cpe(self, cpeIP=None, cpeOCID=None, compartmentOCID=None):
+		"""
+		This function returns the (OCID, IP address) of the CPE with the given OCID, or else with the given IP address
+		(preferably the one in `compartmentOCID`), or (None, None) if there is none
+		"""
+		if cpeOCID:
+			ip = self._lookup(lambda index: next((ip for ip, entries in index["cpes"].items() for ocid, _ in entries if ocid == cpeOCID), None),
+				lambda: next((cpe.ip_address for cpe in self._listCompartment(self.network_client.list_cpes, compartmentOCID) if cpe.id == cpeOCID), None))
+			return (cpeOCID, ip) if ip else (None, None)
+		def direct():
+			return [[cpe.id, cpe.compartment_id] for cpe in self._listCompartment(self.network_client.list_cpes, compartmentOCID)
+				if cpe.ip_address == cpeIP] or None
+		ocid = self._pickIndexed(self._lookup(lambda index: index["cpes"].get(cpeIP), direct), direct, compartmentOCID, f"CPE {cpeIP}")
+		return (ocid, cpeIP) if ocid else (None, None)
+
+	def invalidate(self):
+		with self._lock:
+			self._index = None
+			if self.cacheFile:
+				updateJsonFile(self.cacheFile, lambda stored: stored.pop(self.key, None))
+
+	def _pickIndexed(self, entries, direct, compartmentOCID, label):
+		"""
+		This function picks among the [OCID, compartment OCID] entries found in the index (see _pick). If none is in
+		`compartmentOCID`, the entries listed by direct() in that compartment are added first: the one intended may have
+		been created too recently to be indexed, while another compartment has a resource with the same name or IP address.
+		"""
+		if compartmentOCID and entries and not any(compartment == compartmentOCID for _, compartment in entries):
+			entries = entries + (direct() or [])
+		return self._pick(entries, compartmentOCID, label)
+
+	def _pick(self, entries, compartmentOCID, label):
+		if not entries:
+			return None
+		inCompartment = [ocid for ocid, compartment in entries if compartment == compartmentOCID]
+		if inCompartment:
+			return inCompartment[0]
+		if len(entries) > 1:
+			raise ValueError(f"{label} is ambiguous: {len(entries)} match in different compartments, specify its OCID or its compartment")
+		return entries[0][0]
+
+	def _listCompartment(self, listMethod, compartmentOCID):
+		"""
+		This function returns the existing resources of a compartment, none if no compartment is given.
+		It is the fallback of the lookups of resources too recent for the search index.
+		"""
+		if not compartmentOCID:
+			return []
+		return [r for r in iterRecords(listMethod, compartment_id=compartmentOCID) if getattr(r, "lifecycle_state", None) not in GONE_STATES]
+
+	def _lookup(self, find, direct=None):
+		"""
+		This function returns find(index), or else direct() if given, rebuilding the index once per run if both return None
+		"""
+		with self._lock:
+			result = find(self._get())
+			if result is None and direct:
+				result = direct()
+			if result is None and not self._rebuilt:
+				self.invalidate()
+				self._rebuilt = True
+				result = find(self._get())
+			return result
+
+	def _get(self):
+		if self._index is None:
+			stored = readJsonFile(self.cacheFile).get(self.key) if self.cacheFile else None
+			if stored and time.time() - stored.get("built_at", 0) < self.ttl:
+				self._index = stored
+			else:
+				self._index = self._build()
+				if self.cacheFile:
+					updateJsonFile(self.cacheFile, lambda data: data.update({self.key: self._index}))
+		return self._index
+
+	def _build(self):
+		index = {"built_at": time.time(), "compartments": {}, "drgs": {}, "cpes": {}}
+		cpeCompartments = set()
+		search_details = oci.resource_search.models.StructuredSearchDetails(type="Structured", query="query compartment, drg, cpe resources")
+		for resource in iterRecords(self.search_client.search_resources, search_details):
+			if resource.lifecycle_state in GONE_STATES:
+				continue
+			resourceType = resource.resource_type.lower()
+			if resourceType == "compartment":
+				index["compartments"].setdefault(resource.display_name, []).append(resource.identifier)
+			elif resourceType == "drg":
+				index["drgs"].setdefault(resource.display_name, []).append([resource.identifier, resource.compartment_id])
+			elif resourceType == "cpe":
+				cpeCompartments.add(resource.compartment_id)
+
+		def listCpes(compartmentOCID):
+			return list(iterRecords(self.network_client.list_cpes, compartment_id=compartmentOCID))
+
+		for cpe in scanParallel(listCpes, [(c,) for c in sorted(cpeCompartments)], self.workers):
+			index["cpes"].setdefault(cpe.ip_address, []).append([cpe.id, cpe.compartment_id])
+		return index
+
+def addNetworkIndexArguments(parser):
+	parser.add_argument("--network-index", nargs="?", const=DEFAULT_INDEX_FILE, help=f"Persist the index of the compartments, DRGs and CPEs to a file and reuse it in later runs. Defaults to {DEFAULT_INDEX_FILE}")
+	parser.add_argument("--network-index-ttl", type=int, default=DEFAULT_INDEX_TTL, help=f"How many seconds the persisted index stays valid. A lookup that misses rebuilds it anyway. Defaults to {DEFAULT_INDEX_TTL}")
+
+def resolverFromArgs(args, clients, topology, workers=DEFAULT_WORKERS):
+	#Created on first use, as the tenancy and region require the configuration of the pool
+	return Lazy(lambda: NetworkResolver(clients.get("search"), clients.get("network"), topology, clients.tenancy, clients.region,
+		args.network_index_ttl, args.network_index, workers))
+
+def loadManifest(path):
+	"""
+	This function returns the connections of a JSON or YAML manifest: either a list of connections, or a dictionary
+	with a `connections` list and optional `defaults` applied to every connection. YAML requires PyYAML.
+	"""
+	with open(path) as f:
+		if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+			try:
+				import yaml
+			except ImportError:
+				raise ValueError(f"{path}: reading YAML manifests requires PyYAML (pip install pyyaml), or use a JSON manifest")
+			manifest = yaml.safe_load(f)
+		else:
+			manifest = json.load(f)
+	if isinstance(manifest, list):
+		manifest = {"connections": manifest}
+	if not isinstance(manifest, dict) or not isinstance(manifest.get("connections"), list):
+		raise ValueError(f"{path}: expected a list of connections or a dictionary with a connections list")
+	defaults = manifest.get("defaults") or {}
+	connections = []
+	for index, entry in enumerate(manifest["connections"]):
+		entry = dict(defaults, **entry)
+		unknown = set(entry) - MANIFEST_KEYS
+		if unknown:
+			raise ValueError(f"{path}: connection {index + 1}: unknown keys {', '.join(sorted(unknown))}")
+		connections.append(entry)
+	return connections
+
+def specFromManifest(entry, resolver):
+	"""
+	This function validates a manifest connection and returns its connection spec (see connectionDetails),
+	with the names resolved to OCIDs. It raises a ValueError describing the first problem found.
+	"""
+	name = entry.get("name")
+	if not name:
+		raise ValueError("missing name")
+	routing = ROUTING_TYPES.get(str(entry.get("routing", "")).lower())
+	if not routing:
+		raise ValueError(f"{name}: routing must be one of {', '.join(ROUTING_TYPES)}")
+	ike = str(entry.get("ike", "2"))
+	if ike not in ("1", "2"):
+		raise ValueError(f"{name}: ike must be 1 or 2")
+	routes = list(entry.get("routes") or [])
+	localRoutes = list(entry.get("local_routes") or [])
+	insideIPs = list(entry.get("inside_interfaces") or [])
+	outsideIPs = list(entry.get("outside_interfaces") or [])
+	if len(insideIPs) != len(outsideIPs) or len(insideIPs) not in (0, 2):
+		raise ValueError(f"{name}: provide two inside_interfaces and two outside_interfaces, or none of them")
+	if not routes:
+		raise ValueError(f"{name}: at least one route to on-premise is required")
+	if routing == "BGP":
+		if not entry.get("asn"):
+			raise ValueError(f"{name}: asn is required with bgp routing")
+		if not insideIPs:
+			insideIPs, outsideIPs = list(DEFAULT_BGP_INSIDE_IPS), list(DEFAULT_BGP_OUTSIDE_IPS)
+	if routing == "POLICY" and (not localRoutes or len(localRoutes) + len(routes) == 2):
+		raise ValueError(f"{name}: policy routing requires local_routes and at least three CIDRs among local_routes and routes")
+
+	compartmentOCID = entry.get("compartment_id") or (entry.get("compartment_name") and resolver.compartmentOCID(entry["compartment_name"]))
+	if not compartmentOCID:
+		raise ValueError(f"{name}: compartment {entry.get('compartment_name') or ''} not found")
+	drgOCID = entry.get("drg_id") or (entry.get("drg_name") and resolver.drgOCID(entry["drg_name"], compartmentOCID))
+	if not drgOCID:
+		raise ValueError(f"{name}: DRG {entry.get('drg_name') or ''} not found")
+	if not entry.get("cpe_id") and not entry.get("cpe_ip"):
+		raise ValueError(f"{name}: cpe_ip or cpe_id is required")
+	cpeOCID, cpeIP = resolver.cpe(entry.get("cpe_ip"), entry.get("cpe_id"), compartmentOCID)
+	if not entry.get("cpe_id") and not cpeOCID:
+		raise ValueError(f"{name}: no CPE with IP {entry['cpe_ip']} found")
+	cpeOCID, cpeIP = entry.get("cpe_id") or cpeOCID, cpeIP or entry.get("cpe_ip")
+
+	return {"name": name, "compartment_ocid": compartmentOCID, "drg_ocid": drgOCID, "cpe_ocid": cpeOCID, "cpe_ip": cpeIP,
+		"routing": routing, "ike": "V" + ike, "routes": routes, "local_routes": localRoutes, "asn": entry.get("asn") and str(entry["asn"]),
+		"inside_ips": insideIPs, "outside_ips": outsideIPs}
+
+class Poller:
+	""" Paces the polls of a resource until a deadline, `timeout` seconds from now: the delay between two polls starts
+	at `first` and doubles up to `maximum`, and goes back to `first` after a change so that the next steps are seen quickly.
+	"""
+	def __init__(self, timeout, first=FIRST_POLL_DELAY, maximum=MAX_POLL_DELAY):
+		self.deadline = time.monotonic() + timeout
+		self.first = first
+		self.maximum = maximum
+		self.delay = first
+
+	def wait(self):
+		"""
+		This function sleeps until the next poll and returns False, without sleeping, once the deadline has passed
+		"""
+		remaining = self.deadline - time.monotonic()
+		if remaining <= 0:
+			return False
+		time.sleep(min(self.delay, remaining))
+		self.delay = min(self.delay * 2, self.maximum)
+		return True
+
+	def reset(self):
+		self.delay = self.first
+
+def connectionState(network_client, connectionOCID):
+	"""
+	This function returns the lifecycle state of an IPSec connection, or None if it is not found yet:
+	a connection just created can be missing for a while from the reads of the API
+	"""
+	try:
+		return network_client.get_ip_sec_connection(ipsc_id = connectionOCID).data.lifecycle_state
+	except oci.exceptions.ServiceError as e:
+		if e.status == 404:
+			return None
+		raise
+
+def waitForConnection(network_client, connectionOCID, timeout=DEFAULT_PROVISIONING_TIMEOUT):
+	"""
+	This function waits for an IPSec connection being provisioned and returns its lifecycle state as soon as it is
+	AVAILABLE or failed, or None if it is still provisioning (or not found yet) at the timeout
+	"""
+	poller = Poller(timeout)
+	while poller.wait():
+		state = connectionState(network_client, connectionOCID)
+		if state not in (None, "PROVISIONING"):
+			return state
+	return None
+
+def iterAvailableConnections(network_client, connections, timeout=DEFAULT_PROVISIONING_TIMEOUT):
+	"""
+	This function waits for IPSec connections being provisioned and yields a (connection OCID, lifecycle state) tuple
+	for each of them as soon as it is AVAILABLE or failed, or with the state None if it is still provisioning at the timeout.
+	`connections` maps the OCID of each connection to its compartment. Each poll lists every compartment once,
+	whatever the number of connections waited for. A connection missing from the list is read directly, and is
+	waited for again if it is not found either.
+	"""
+	pending = dict(connections)
+	poller = Poller(timeout)
+	while pending and poller.wait():
+		states = {}
+		for compartmentOCID in set(pending.values()):
+			states.update((c.id, c.lifecycle_state) for c in iterRecords(network_client.list_ip_sec_connections, compartment_id=compartmentOCID))
+		for connectionOCID in list(pending):
+			state = states.get(connectionOCID) or connectionState(network_client, connectionOCID)
+			if state not in (None, "PROVISIONING"):
+				del pending[connectionOCID]
+				poller.reset()
+				yield connectionOCID, state
+	for connectionOCID in pending:
+		yield connectionOCID, None
+
+def tunnelState(tunnel):
+	"""
+	This function returns the (status, BGP state) of a tunnel, the BGP state being None if the tunnel does not use BGP
+	"""
+	bgpState = tunnel.bgp_session_info.bgp_state if tunnel.routing == "BGP" and tunnel.bgp_session_info else None
+	return tunnel.status, bgpState
+
+def isTunnelUsable(state):
+	status, bgpState = state
+	return status == "UP" and bgpState in (None, "UP")
+
+def iterTunnelChanges(network_client, connectionOCIDs, timeout=DEFAULT_TUNNEL_TIMEOUT, workers=DEFAULT_WORKERS):
+	"""
+	This function polls the tunnels of IPSec connections and yields a (connection OCID, tunnel, state) tuple
+	with the first state of every tunnel and then every time it changes (see tunnelState), until each connection
+	has a usable tunnel (see isTunnelUsable) or the timeout expires
+	"""
+	states = {}
+	waited = set(connectionOCIDs)
+	poller = Poller(timeout)
+
+	def listTunnels(connectionOCID):
+		return [(connectionOCID, tunnel) for tunnel in iterRecords(network_client.list_ip_sec_connection_tunnels, ipsc_id = connectionOCID)]
+
+	while waited:
+		changed = False
+		for connectionOCID, tunnel in scanParallel(listTunnels, [(c,) for c in sorted(waited)], workers):
+			state = tunnelState(tunnel)
+			if states.get(tunnel.id) != state:
+				states[tunnel.id] = state
+				changed = True
+				yield connectionOCID, tunnel, state
+			if isTunnelUsable(state):
+				waited.discard(connectionOCID)
+		if changed:
+			poller.reset()
+		if waited and not poller.wait():
+			return
+
+def printConfiguration(spec, tunnels, secret, file=sys.stdout):
+	"""
+	This function prints the configuration of the CPE end of a connection, given its tunnels
+	"""
+	tunnelNamesAndIP = {tunnel.display_name: tunnel.vpn_ip for tunnel in tunnels}
+	print('|--------------------------------|-----------------------------------------------------------------------|', file=file)
+	print(f'| {"CPE IP": <30} | {spec["cpe_ip"] or "": <70}|', file=file)
+	print(f'| {"IKE version": <30} | {spec["ike"]: <70}|', file=file)
+	print(f'| {"Routing Type": <30} | {spec["routing"].replace("POLICY","STATIC"): <70}|', file=file)
+	for elem in spec["local_routes"]:
+		print(f'| {"OCI-advertised route": <30} | {elem: <70}|', file=file)
+	for tunnelIndex, tun in enumerate([f"T1-{spec['name']}", f"T2-{spec['name']}"]):
+		print(f'| {tun: <103}|', file=file)
+		print(f'| {"  Tunnel IP endpoint": <30} | {tunnelNamesAndIP.get(tun) or "": <70}|', file=file)
+		print(f'| {"Shared Secret": <30} | {secret: <70}|', file=file)
+		if spec["inside_ips"]:
+			print(f'| {"  Oracle interface IP": <30} | {spec["inside_ips"][tunnelIndex]: <70}|', file=file)
+		if spec["outside_ips"]:
+			print(f'| {"  CPE interface IP": <30} | {spec["outside_ips"][tunnelIndex]: <70}|', file=file)
+		print(f'| {"  Phase 1 info": <30} | {" ": <70}|', file=file)
+		print(f'| {"    Authentication algorithm": <30} | {"SHA2-384": <70}|', file=file)
+		print(f'| {"    Encryption algorithm": <30} | {"AES-256-CBC": <70}|', file=file)
+		print(f'| {"    DH Group": <30} | {"group 20 (ECP 384-bit random)": <70}|', file=file)
+		print(f'| {"    IKE lifetime": <30} | {"28800 seconds (8 hours)": <70}|', file=file)
+		print(f'| {"  Phase 2 info": <30} | {" ": <70}|', file=file)
+		print(f'| {"    Authentication algorithm": <30} | {"HMAC-SHA-256-128": <70}|', file=file)
+		print(f'| {"    Encryption algorithm": <30} | {"AES-256-GCM": <70}|', file=file)
+		print(f'| {"    Perfect-forward secrecy": <30} | {"Enabled": <70}|', file=file)
+		print(f'| {"    DH Group": <30} | {"group 5 (MODP 1536-bit)": <70}|', file=file)
+		print(f'| {"    IPSec lifetime": <30} | {"3600 seconds (1 hour)": <70}|', file=file)
+	print('|========================================================================================================|', file=file)
@@ -0,0 +1,30 @@
+# Deferred imports and objects, so that the scripts start, print their help and prompt for input
+# without paying for the OCI SDK (a noticeable part of a second, more on slow disks) until they actually call OCI.
+# Modules of oci_common use "from oci_common.lazy import oci" instead of "import oci".
+
+import importlib
+import threading
+
+class Lazy:
+	""" Proxy of the object returned by factory(), which is called on first access to one of its attributes
+	and at most once, even if several threads use the proxy at the same time.
+	"""
+	def __init__(self, factory):
+		self._factory = factory
+		self._object = None
+		self._lock = threading.Lock()
+
+	def __getattr__(self, name):
+		if self._object is None:
+			with self._lock:
+				if self._object is None:
+					self._object = self._factory()
+		return getattr(self._object, name)
+
+def lazyImport(moduleName):
+	"""
+	This function returns a proxy of a module that is only imported when one of its attributes is first used
+	"""
+	return Lazy(lambda: importlib.import_module(moduleName))
+
+oci = lazyImport("oci")
@@ -0,0 +1,91 @@
+# Available security updates of the instances of patching waves, from OS Management Hub
+
+import os
+
+from oci_common.cachefile import readJsonFile, updateJsonFile
+from oci_common.lazy import oci
+from oci_common.pagination import iterRecords
+from oci_common.scan import iterCompleted, DEFAULT_WORKERS
+
+DEFAULT_TIMEOUT = 120
+DEFAULT_OS_FAMILY_CACHE = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-os-family.json")
+WINDOWS_UPDATES_PAGE_SIZE = 100
+
+def searchWaveInstances(search_client, waves):
+	"""
+	This function returns the instances tagged with one of the given waves (or with any wave if `waves` is empty)
+	as dictionaries with the keys ocid, name, compartment_ocid and wave, keyed by OCID
+	"""
+	instances = {}
+	for wave in waves or [None]:
+		condition = "definedTags.namespace = 'patching' && definedTags.key = 'wave'"
+		if wave:
+			condition += f" && definedTags.value = '{wave}'"
+		search_details = oci.resource_search.models.StructuredSearchDetails(
+			type="Structured",
+			query=f"query instance resources where ({condition})")
+		for vm in iterRecords(search_client.search_resources, search_details):
+			instances[vm.identifier] = {
+				"ocid": vm.identifier,
+				"name": vm.display_name,
+				"compartment_ocid": vm.compartment_id,
+				"wave": wave or (vm.defined_tags or {}).get("patching", {}).get("wave")}
+	return instances
+
+def getOsFamilies(osmh_client, instances, cacheFile=None):
+	"""
+	This function returns the OS family of the given instances, keyed by OCID.
+	Instances that are not in the cache file are looked up by listing the managed instances of their compartments,
+	as list_managed_instances only filters on a single managed instance OCID;
+	instances not registered to OS Management Hub are missing from the result.
+	"""
+	osFamilies = readJsonFile(cacheFile) if cacheFile else {}
+	missing = {}
+	found = {}
+	for vm in instances.values():
+		if vm["ocid"] not in osFamilies:
+			missing.setdefault(vm["compartment_ocid"], set()).add(vm["ocid"])
+	for compartmentOCID, vms in missing.items():
+		for mi in iterRecords(osmh_client.list_managed_instances, compartment_id = compartmentOCID):
+			if mi.id in vms:
+				found[mi.id] = mi.os_family
+	osFamilies.update(found)
+	if cacheFile and missing:
+		#Merged into the current file, which other threads may have updated since it was read
+		updateJsonFile(cacheFile, lambda stored: stored.update(found))
+	return {vm: osFamilies[vm] for vm in instances if vm in osFamilies}
+
+def getUpdates(osmh_client, vm, osFamily):
+	"""
+	This function returns the names of the available security updates of a registered instance
+	"""
+	updates = []
+	if osFamily.startswith("WINDOWS"):
+		for elem in iterRecords(osmh_client.list_managed_instance_available_windows_updates,
+			managed_instance_id = vm,
+			classification_type = ["SECURITY"],
+			pageSize = WINDOWS_UPDATES_PAGE_SIZE):
+			updates.append(elem.name)
+	else:
+		for elem in iterRecords(osmh_client.list_managed_instance_updatable_packages,
+			managed_instance_id = vm,
+			classification_type = ["SECURITY"]):
+			updates.append(elem.display_name)
+	return updates
+
+def iterWaveUpdates(search_client, osmh_client, waves, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, osFamilyCache=None):
+	"""
+	This function queries the registered instances of the waves in parallel and yields a (record, error) tuple
+	for each of them as soon as it completes. Records have the keys instance, ocid, wave, os_family and updates.
+	"""
+	instances = searchWaveInstances(search_client, waves)
+	#Know up front which update query applies to each instance
+	osFamilies = getOsFamilies(osmh_client, instances, osFamilyCache)
+	for vm, updates, error in iterCompleted(lambda vm: getUpdates(osmh_client, vm, osFamilies[vm]), list(osFamilies), workers, timeout):
+		record = {
+			"instance": instances[vm]["name"],
+			"ocid": vm,
+			"wave": instances[vm]["wave"],
+			"os_family": osFamilies[vm],
+			"updates": updates}
+		yield record, error
@@ -0,0 +1,155 @@
+# Record writers shared by the scripts of this repository: aligned or streamed text tables, CSV, JSON Lines and Parquet.
+# Every writer emits the records as they are produced, so that memory stays constant whatever the size of the inventory,
+# except the aligned table, which needs all the rows to size its columns.
+
+import csv
+import json
+import sys
+
+FORMATS = ["table", "csv", "jsonl", "parquet"]
+# Number of rows per Parquet row group
+PARQUET_BATCH_SIZE = 10000
+
+def textValue(value):
+	"""
+	This function returns a record value as text: lists are joined with spaces and None is empty
+	"""
+	if value is None:
+		return ""
+	if isinstance(value, (list, tuple)):
+		return " ".join(str(v) for v in value)
+	return str(value)
+
+class TextWriter:
+	""" Base of the writers of text formats. The file is closed by close() if `ownsFile` is set, otherwise only flushed.
+	"""
+	def __init__(self, columns, file=sys.stdout, ownsFile=False):
+		self.columns = columns
+		self.file = file
+		self.ownsFile = ownsFile
+
+	def flush(self):
+		self.file.flush()
+
+	def close(self):
+		if self.ownsFile:
+			self.file.close()
+		else:
+			self.file.flush()
+
+class TableWriter(TextWriter):
+	""" Text table with a header and a separating line.
+	If `align` is set, the rows are kept until close() to size the columns, otherwise they are printed as they come.
+	"""
+	def __init__(self, columns, file=sys.stdout, align=True, ownsFile=False):
+		super().__init__(columns, file, ownsFile)
+		self.align = align
+		self.rows = []
+		self.widths = [len(c) for c in columns]
+		if not align:
+			self._print(columns)
+			self._print(["-" * len(c) for c in columns])
+
+	def write(self, record):
+		row = [textValue(record.get(c)) for c in self.columns]
+		if self.align:
+			self.rows.append(row)
+			self.widths = [max(w, len(v)) for w, v in zip(self.widths, row)]
+		else:
+			self._print(row)
+
+	def close(self):
+		if self.align:
+			self._print(self.columns)
+			self._print(["-" * w for w in self.widths])
+			for row in self.rows:
+				self._print(row)
+			self.rows = []
+		super().close()
+
+	def _print(self, row):
+		if self.align:
+			print(" | ".join(v.ljust(w) for v, w in zip(row, self.widths)), file=self.file)
+		else:
+			print(" | ".join(row), file=self.file)
+
+class CsvWriter(TextWriter):
+	def __init__(self, columns, file=sys.stdout, header=True, ownsFile=False):
+		super().__init__(columns, file, ownsFile)
+		self.writer = csv.writer(file, lineterminator="\n")
+		if header:
+			self.writer.writerow(columns)
+
+	def write(self, record):
+		self.writer.writerow([textValue(record.get(c)) for c in self.columns])
+
+class JsonLinesWriter(TextWriter):
+	""" One JSON object per record and line, with the given columns only, or every key of the records if columns is None
+	"""
+	def write(self, record):
+		if self.columns is not None:
+			record = {c: record.get(c) for c in self.columns}
+		self.file.write(json.dumps(record) + "\n")
+
+class ParquetWriter:
+	""" Parquet file with one string column per column, written one row group of `batchSize` rows at a time. Requires pyarrow.
+	"""
+	def __init__(self, columns, path, batchSize=PARQUET_BATCH_SIZE):
+		try:
+			import pyarrow
+			import pyarrow.parquet
+		except ImportError:
+			raise ValueError("the parquet format requires pyarrow (pip install pyarrow)")
+		self.pyarrow = pyarrow
+		self.columns = columns
+		self.batchSize = batchSize
+		self.schema = pyarrow.schema([(c, pyarrow.string()) for c in columns])
+		self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+		self.batch = {c: [] for c in columns}
+		self.size = 0
+
+	def write(self, record):
+		for c in self.columns:
+			value = record.get(c)
+			self.batch[c].append(None if value is None else textValue(value))
+		self.size += 1
+		if self.size >= self.batchSize:
+			self._flush()
+
+	def flush(self):
+		#The rows are written by row groups only
+		pass
+
+	def close(self):
+		self._flush()
+		self.writer.close()
+
+	def _flush(self):
+		if self.size:
+			self.writer.write_table(self.pyarrow.Table.from_pydict(self.batch, schema=self.schema))
+			self.batch = {c: [] for c in self.columns}
+			self.size = 0
+
+def makeWriter(outputFormat, columns, output=None, align=True, file=sys.stdout):
+	"""
+	This function returns a writer of the given format, writing to the `output` file if given, otherwise to `file`.
+	It raises a ValueError if the format cannot be written.
+	"""
+	if outputFormat == "parquet":
+		if not output:
+			raise ValueError("the parquet format requires --output")
+		return ParquetWriter(columns, output)
+	ownsFile = bool(output)
+	if ownsFile:
+		file = open(output, "w", newline="")
+	if outputFormat == "table":
+		return TableWriter(columns, file, align, ownsFile=ownsFile)
+	if outputFormat == "csv":
+		return CsvWriter(columns, file, ownsFile=ownsFile)
+	return JsonLinesWriter(columns, file, ownsFile)
+
+def addOutputArguments(parser, default="table", formats=FORMATS):
+	parser.add_argument("--format", "-f", choices=formats, default=default, help=f"The output format. Defaults to {default}")
+	parser.add_argument("--output", "-o", help="The file to write the records to. Defaults to the standard output, except for parquet which requires it")
+	if "table" in formats:
+		parser.add_argument("--no-align", action="store_true", help="With --format table, print each row as soon as it is known instead of aligning the columns")
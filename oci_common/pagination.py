@@ -0,0 +1,28 @@
+# Generator-based pagination of OCI list calls.
+# Records are yielded page by page as the responses arrive, so callers can start working
+# on the first page while memory only ever holds one page.
+
+def iterPages(listMethod, *args, pageSize=None, **kwargs):
+	"""
+	This function calls listMethod until the last page and yields the records of each page as a list
+	"""
+	if pageSize:
+		kwargs["limit"] = pageSize
+	page = None
+	while True:
+		if page:
+			kwargs["page"] = page
+		response = listMethod(*args, **kwargs)
+		# Some services wrap the records in a collection object (e.g. Resource Search, OS Management Hub)
+		data = response.data
+		yield data if isinstance(data, list) else data.items
+		page = response.next_page
+		if not response.has_next_page or not page:
+			return
+
+def iterRecords(listMethod, *args, pageSize=None, **kwargs):
+	"""
+	This function yields every record returned by listMethod, following the pagination tokens
+	"""
+	for records in iterPages(listMethod, *args, pageSize=pageSize, **kwargs):
+		yield from records
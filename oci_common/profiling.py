@@ -0,0 +1,127 @@
+# Per-run profile of the OCI API calls: every call made through a ClientPool is recorded with its operation name,
+# latency, number of pages and bytes received and number of retries. At the end of a run the profile can be printed
+# as a table and written to a JSON file or to a Prometheus textfile (for the node_exporter textfile collector).
+
+import os
+import sys
+import threading
+import time
+
+from oci_common.cachefile import writeJsonFile, writeTextFile
+from oci_common.scan import percentile
+
+# Operations that return one page of a paginated collection
+PAGINATED_PREFIXES = ("list_", "search_")
+METRIC_PREFIX = "oci_utilities"
+
+class ApiProfile:
+	""" Collects the API calls of a run. It is safe to share one instance between threads and client pools.
+	"""
+	def __init__(self, script=None):
+		self.script = script or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+		self.started = time.perf_counter()
+		self.operations = {}
+		self._lock = threading.Lock()
+
+	def record(self, operation, seconds, waited=0.0, retries=0, response=None, error=None):
+		"""
+		This function records one call, including its retries: `seconds` is the time spent waiting for the service
+		and `waited` the time spent waiting for the rate and concurrency limits and between the retries
+		"""
+		headers = getattr(response, "headers", None) or {}
+		with self._lock:
+			op = self.operations.setdefault(operation, {"latencies": [], "waited": 0.0, "pages": 0, "bytes": 0, "retries": 0, "errors": 0})
+			op["latencies"].append(seconds)
+			op["waited"] += waited
+			op["retries"] += retries
+			if error is not None:
+				op["errors"] += 1
+			elif operation.startswith(PAGINATED_PREFIXES):
+				op["pages"] += 1
+			op["bytes"] += int(headers.get("content-length") or 0)
+
+	def summary(self):
+		"""
+		This function returns one dictionary per operation, the most time-consuming first
+		"""
+		rows = []
+		with self._lock:
+			items = [(name, dict(op, latencies=sorted(op["latencies"]))) for name, op in self.operations.items()]
+		for name, op in items:
+			values = op["latencies"]
+			rows.append({
+				"operation": name,
+				"calls": len(values),
+				"pages": op["pages"],
+				"retries": op["retries"],
+				"errors": op["errors"],
+				"bytes": op["bytes"],
+				"total_s": round(sum(values), 3),
+				"waited_s": round(op["waited"], 3),
+				"p50_ms": round(percentile(values, 50) * 1000, 1),
+				"p95_ms": round(percentile(values, 95) * 1000, 1),
+				"max_ms": round(values[-1] * 1000, 1)})
+		return sorted(rows, key=lambda row: -row["total_s"])
+
+	def elapsed(self):
+		return time.perf_counter() - self.started
+
+	def printReport(self, file=sys.stderr):
+		rows = self.summary()
+		columns = ["operation", "calls", "pages", "retries", "errors", "bytes", "total_s", "waited_s", "p50_ms", "p95_ms", "max_ms"]
+		table = [columns] + [[str(row[c]) for c in columns] for row in rows]
+		widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+		print(f"\nAPI calls of {self.script}: {sum(row['calls'] for row in rows)} in {self.elapsed():.2f}s", file=file)
+		for line in table:
+			print(" | ".join(value.ljust(w) if i == 0 else value.rjust(w) for i, (value, w) in enumerate(zip(line, widths))), file=file)
+
+	def writeJson(self, path):
+		writeJsonFile(path, {"script": self.script, "timestamp": int(time.time()), "elapsed_s": round(self.elapsed(), 3), "operations": self.summary()}, shared=True)
+
+	def writePrometheus(self, path):
+		"""
+		This function atomically replaces a Prometheus textfile with the figures of the run.
+		The file only holds the last run, so they are gauges rather than counters.
+		"""
+		metrics = [
+			("api_calls_last_run", "gauge", "API calls of the last run, including the failed ones", "calls"),
+			("api_pages_last_run", "gauge", "Pages received by the list and search calls of the last run", "pages"),
+			("api_retries_last_run", "gauge", "Retries of throttled or failed calls in the last run", "retries"),
+			("api_errors_last_run", "gauge", "Calls of the last run that failed after their retries", "errors"),
+			("api_received_bytes_last_run", "gauge", "Response bytes of the last run, as reported by Content-Length", "bytes"),
+			("api_latency_seconds_last_run", "gauge", "Time spent waiting for the service in the last run, retries included", "total_s"),
+			("api_wait_seconds_last_run", "gauge", "Time spent in the last run waiting for the client-side rate and concurrency limits and between retries", "waited_s")]
+		rows = self.summary()
+		lines = []
+		for name, kind, description, key in metrics:
+			lines.append(f"# HELP {METRIC_PREFIX}_{name} {description}")
+			lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+			for row in rows:
+				lines.append(f'{METRIC_PREFIX}_{name}{{script="{self.script}",operation="{row["operation"]}"}} {row[key]}')
+		lines.append(f"# HELP {METRIC_PREFIX}_run_seconds Wall-clock time of the last run")
+		lines.append(f"# TYPE {METRIC_PREFIX}_run_seconds gauge")
+		lines.append(f'{METRIC_PREFIX}_run_seconds{{script="{self.script}"}} {self.elapsed():.3f}')
+		writeTextFile(path, "\n".join(lines) + "\n", shared=True)
+
+def addProfileArguments(parser):
+	parser.add_argument("--api-report", action="store_true", help="Print to stderr the API calls of the run per operation: calls, pages, retries, errors, bytes and latency")
+	parser.add_argument("--api-report-json", metavar="FILE", help="Write the API calls of the run to a JSON file")
+	parser.add_argument("--api-report-prom", metavar="FILE", help="Write the API calls of the run to a Prometheus textfile")
+
+def profileFromArgs(args):
+	if not (args.api_report or args.api_report_json or args.api_report_prom):
+		return None
+	return ApiProfile()
+
+def writeProfileReports(args, profile):
+	"""
+	This function emits the reports requested on the command line, if any
+	"""
+	if profile is None:
+		return
+	if args.api_report:
+		profile.printReport()
+	if args.api_report_json:
+		profile.writeJson(args.api_report_json)
+	if args.api_report_prom:
+		profile.writePrometheus(args.api_report_prom)
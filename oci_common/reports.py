@@ -0,0 +1,87 @@
+# Inventory reports shared by the scripts of this repository and the multi-region runner
+
+from oci_common.lazy import oci
+from oci_common.scan import timedMethod
+from oci_common.volumes import joinAttachments, isAttached
+
+# Volume type -> (resource type, attachment type) in the query backends
+VOLUME_TYPES = {"block": ("volume", "volumeattachment"), "boot": ("bootvolume", "bootvolumeattachment")}
+
+TERMINATED_STATES = ("TERMINATING", "TERMINATED")
+
+ATTACHMENT_TYPES_COLUMNS = ["instance_name", "volume_id", "volume_name", "device", "type"]
+
+def findUnattachedVolumes(backend, volumeType):
+	"""
+	This function returns the unattached volumes of the given type ("block" or "boot") as dictionaries with
+	the keys ocid, name and compartment_ocid, followed by the attached ones, which also have an instance_ocids key.
+	Volumes being or already terminated are left out.
+	"""
+	return findUnattachedVolumesByType(backend, [volumeType])[volumeType]
+
+def findUnattachedVolumesByType(backend, volumeTypes):
+	"""
+	This function returns the (unattached, attached) volumes of each of the given types, keyed by type.
+	The volumes and attachments of all the types are fetched together, in a single traversal of the tenancy.
+	"""
+	resourceTypes = [resourceType for volumeType in volumeTypes for resourceType in VOLUME_TYPES[volumeType]]
+	resources = backend.collectResources(resourceTypes)
+	result = {}
+	for volumeType in volumeTypes:
+		resourceType, attachmentType = VOLUME_TYPES[volumeType]
+		volumes = [{"ocid": vol["ocid"], "name": vol["name"], "compartment_ocid": vol["compartment_ocid"]}
+			for vol in resources[resourceType] if vol.get("lifecycle_state") not in TERMINATED_STATES]
+		result[volumeType] = joinAttachments(volumes, resources[attachmentType], "volume_ocid")
+	return result
+
+class NameResolver:
+	""" OCID -> display name tables of instances and volumes.
+	The tables are filled with one listing per resource type (unless `lookup` is set),
+	names missing from them are fetched with a memoized GET.
+	"""
+	def __init__(self, backend, compute_client, storage_client, lookup=False, stats=None):
+		self.get_instance = compute_client.get_instance
+		self.get_volume = storage_client.get_volume
+		self.get_boot_volume = storage_client.get_boot_volume
+		if stats is not None:
+			self.get_instance = timedMethod(self.get_instance, stats)
+			self.get_volume = timedMethod(self.get_volume, stats)
+			self.get_boot_volume = timedMethod(self.get_boot_volume, stats)
+		self.instanceNames = {}
+		self.volumeNames = {}
+		if not lookup:
+			self.instanceNames.update(self._listNames(backend, "instance"))
+			self.volumeNames.update(self._listNames(backend, "volume"))
+			self.volumeNames.update(self._listNames(backend, "bootvolume"))
+
+	def _listNames(self, backend, resourceType):
+		return {r["ocid"]: r["name"] for r in backend.iterResources(resourceType, ("ocid", "name"))}
+
+	def instanceName(self, instanceOCID):
+		if instanceOCID not in self.instanceNames:
+			self.instanceNames[instanceOCID] = self.get_instance(instance_id = instanceOCID).data.display_name
+		return self.instanceNames[instanceOCID]
+
+	def volumeName(self, volumeOCID):
+		if volumeOCID not in self.volumeNames:
+			try:
+				self.volumeNames[volumeOCID] = self.get_volume(volume_id = volumeOCID).data.display_name
+			except oci.exceptions.ServiceError:
+				self.volumeNames[volumeOCID] = self.get_boot_volume(boot_volume_id = volumeOCID).data.display_name
+		return self.volumeNames[volumeOCID]
+
+def iterAttachmentTypes(backend, compute_client, storage_client, lookup=False, stats=None):
+	"""
+	This function yields one dictionary per volume attachment with the ATTACHMENT_TYPES_COLUMNS keys.
+	Detaching and detached attachments are left out.
+	"""
+	names = NameResolver(backend, compute_client, storage_client, lookup, stats)
+	for a in backend.iterResources("volumeattachment", ("instance_ocid", "volume_ocid", "device", "attachment_type", "lifecycle_state")):
+		if not isAttached(a):
+			continue
+		yield {
+			"instance_name": names.instanceName(a["instance_ocid"]),
+			"volume_id": a["volume_ocid"],
+			"volume_name": names.volumeName(a["volume_ocid"]),
+			"device": a["device"],
+			"type": a["attachment_type"]}
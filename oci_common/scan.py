@@ -0,0 +1,141 @@
+# Bounded thread-pool engine used to fan out OCI list calls
+# (e.g. one call per compartment x availability domain pair)
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+DEFAULT_WORKERS = 8
+# How often iterCompleted checks the running tasks for timeouts, in seconds
+TIMEOUT_POLL_INTERVAL = 0.5
+
+class ScanStats:
+	""" Collects the wall-clock time of a scan and the latency of every call it issued.
+	It is safe to share one instance between the worker threads.
+	"""
+	def __init__(self):
+		self.latencies = {}
+		self.wallClock = 0.0
+		self._lock = threading.Lock()
+
+	def record(self, name, seconds):
+		with self._lock:
+			self.latencies.setdefault(name, []).append(seconds)
+
+	def addWallClock(self, seconds):
+		with self._lock:
+			self.wallClock += seconds
+
+	def summary(self):
+		"""
+		This function returns one dictionary per call name with the number of calls and the latency percentiles, in milliseconds
+		"""
+		rows = []
+		with self._lock:
+			items = sorted(self.latencies.items())
+		for name, values in items:
+			values = sorted(values)
+			rows.append({
+				"call": name,
+				"count": len(values),
+				"total_ms": round(sum(values) * 1000, 1),
+				"mean_ms": round(sum(values) / len(values) * 1000, 1),
+				"p50_ms": round(percentile(values, 50) * 1000, 1),
+				"p95_ms": round(percentile(values, 95) * 1000, 1),
+				"max_ms": round(values[-1] * 1000, 1)})
+		return rows
+
+	def printReport(self, file=sys.stderr):
+		rows = self.summary()
+		print(f"Wall-clock: {self.wallClock:.2f}s, {sum(row['count'] for row in rows)} calls", file=file)
+		for row in rows:
+			print(f'{row["call"]}: {row["count"]} calls, total {row["total_ms"]}ms, '
+				f'mean {row["mean_ms"]}ms, p50 {row["p50_ms"]}ms, p95 {row["p95_ms"]}ms, max {row["max_ms"]}ms', file=file)
+
+def percentile(sortedValues, pct):
+	if not sortedValues:
+		return 0.0
+	index = min(len(sortedValues) - 1, int(round(pct / 100 * (len(sortedValues) - 1))))
+	return sortedValues[index]
+
+def iterParallel(func, tasks, workers=DEFAULT_WORKERS, stats=None, name=None):
+	"""
+	This function calls func(*task) for every task using at most `workers` threads.
+	Every call must return an iterable of records, which is consumed inside the worker thread.
+	Records are yielded in the order of `tasks` as soon as the calls before them have completed,
+	so the merged result is the same whatever the completion order of the calls.
+	"""
+	name = name or func.__name__
+	tasks = list(tasks)
+
+	def timedCall(task):
+		start = time.perf_counter()
+		try:
+			return list(func(*task))
+		finally:
+			if stats is not None:
+				stats.record(name, time.perf_counter() - start)
+
+	start = time.perf_counter()
+	try:
+		with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+			for result in pool.map(timedCall, tasks):
+				yield from result
+	finally:
+		if stats is not None:
+			stats.addWallClock(time.perf_counter() - start)
+
+def scanParallel(func, tasks, workers=DEFAULT_WORKERS, stats=None, name=None):
+	"""
+	This function is the same as iterParallel but returns the merged records as a list
+	"""
+	return list(iterParallel(func, tasks, workers, stats, name))
+
+def iterCompleted(func, items, workers=DEFAULT_WORKERS, timeout=None):
+	"""
+	This function calls func(item) for every item using at most `workers` threads
+	and yields an (item, result, error) tuple for each of them as soon as it completes.
+	A call still running `timeout` seconds after it started is yielded with a TimeoutError and abandoned:
+	its thread keeps running in the background, so the clients used by func should also have a timeout.
+	"""
+	items = list(items)
+	startTimes = {}
+
+	def run(index):
+		startTimes[index] = time.monotonic()
+		return func(items[index])
+
+	pool = ThreadPoolExecutor(max_workers=max(1, workers))
+	futures = {pool.submit(run, index): index for index in range(len(items))}
+	pending = set(futures)
+	try:
+		while pending:
+			done, pending = wait(pending, timeout=TIMEOUT_POLL_INTERVAL if timeout else None, return_when=FIRST_COMPLETED)
+			for future in done:
+				item = items[futures[future]]
+				try:
+					yield item, future.result(), None
+				except Exception as e:
+					yield item, None, e
+			if timeout:
+				now = time.monotonic()
+				for future in [f for f in pending if now - startTimes.get(futures[f], now) > timeout]:
+					pending.discard(future)
+					yield items[futures[future]], None, TimeoutError(f"no result after {timeout}s")
+	finally:
+		pool.shutdown(wait=False, cancel_futures=True)
+
+def timedMethod(method, stats, name=None):
+	"""
+	This function wraps a client method so that the latency of every call is recorded in `stats`
+	"""
+	name = name or method.__name__
+
+	def wrapper(*args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return method(*args, **kwargs)
+		finally:
+			stats.record(name, time.perf_counter() - start)
+	return wrapper
@@ -0,0 +1,261 @@
+# Incremental inventories: the last inventory is kept in a local SQLite snapshot, compartment by compartment,
+# and a refresh only lists again the compartments where the Audit service recorded a change since their last scan
+
+import datetime
+import json
+import os
+import sqlite3
+import time
+
+from oci_common.pagination import iterRecords
+from oci_common.scan import scanParallel, DEFAULT_WORKERS
+
+DEFAULT_SNAPSHOT_FILE = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-snapshot.db")
+# Version of the tables of the snapshot file, older snapshots are dropped and filled again by a full listing
+SCHEMA_VERSION = 2
+# Compartments not scanned for longer than this are listed again even without audit events, in seconds
+DEFAULT_MAX_AGE = 24 * 3600
+# Audit events can be delivered some minutes after the call, so the audit window starts this much earlier, in seconds
+AUDIT_DELAY = 20 * 60
+# Audit event types (lowercase prefixes) that can change the inventories of this repository
+AUDIT_EVENT_PREFIXES = ("com.oraclecloud.computeapi.", "com.oraclecloud.blockvolumes.", "com.oraclecloud.virtualnetworkapi.")
+READ_ACTIONS = ("GET", "HEAD")
+
+class SnapshotStore:
+	""" SQLite store of inventory records, keyed by kind (e.g. "volume") and OCID.
+	The time of the last scan of every compartment is kept per kind.
+	Several tenancies and regions can share a file: the store only sees the records of its `scope` (e.g. "tenancy/region").
+	"""
+	def __init__(self, path=DEFAULT_SNAPSHOT_FILE, scope=""):
+		self.scope = scope
+		os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+		self.db = sqlite3.connect(path)
+		if self.db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+			#The snapshot is only a cache, the records of an older file are not worth migrating
+			self.db.executescript(f"""
+				DROP TABLE IF EXISTS records;
+				DROP TABLE IF EXISTS scans;
+				PRAGMA user_version = {SCHEMA_VERSION};""")
+		self.db.executescript("""
+			CREATE TABLE IF NOT EXISTS records (
+				scope TEXT NOT NULL,
+				kind TEXT NOT NULL,
+				ocid TEXT NOT NULL,
+				compartment_ocid TEXT NOT NULL,
+				data TEXT NOT NULL,
+				PRIMARY KEY (scope, kind, ocid));
+			CREATE INDEX IF NOT EXISTS records_compartment ON records (scope, kind, compartment_ocid);
+			CREATE TABLE IF NOT EXISTS scans (
+				scope TEXT NOT NULL,
+				kind TEXT NOT NULL,
+				compartment_ocid TEXT NOT NULL,
+				scanned_at REAL NOT NULL,
+				PRIMARY KEY (scope, kind, compartment_ocid));""")
+
+	def scanTimes(self, kind):
+		"""
+		This function returns the time of the last scan of every compartment of the given kind, keyed by compartment OCID
+		"""
+		return dict(self.db.execute("SELECT compartment_ocid, scanned_at FROM scans WHERE scope = ? AND kind = ?", (self.scope, kind)))
+
+	def records(self, kind, compartments=None):
+		query = "SELECT compartment_ocid, data FROM records WHERE scope = ? AND kind = ? ORDER BY compartment_ocid, rowid"
+		for compartmentOCID, data in self.db.execute(query, (self.scope, kind)):
+			if compartments is None or compartmentOCID in compartments:
+				yield json.loads(data)
+
+	def replaceCompartment(self, kind, compartmentOCID, records, scannedAt, key="ocid"):
+		"""
+		This function replaces the records of a compartment and returns the records that were added and removed
+		"""
+		previous = {}
+		for data in self.db.execute("SELECT data FROM records WHERE scope = ? AND kind = ? AND compartment_ocid = ?", (self.scope, kind, compartmentOCID)):
+			record = json.loads(data[0])
+			previous[record[key]] = record
+		current = {record[key]: record for record in records}
+		with self.db:
+			self.db.execute("DELETE FROM records WHERE scope = ? AND kind = ? AND compartment_ocid = ?", (self.scope, kind, compartmentOCID))
+			self.db.executemany("INSERT OR REPLACE INTO records (scope, kind, ocid, compartment_ocid, data) VALUES (?, ?, ?, ?, ?)",
+				[(self.scope, kind, ocid, compartmentOCID, json.dumps(record)) for ocid, record in current.items()])
+			self.db.execute("INSERT OR REPLACE INTO scans (scope, kind, compartment_ocid, scanned_at) VALUES (?, ?, ?, ?)",
+				(self.scope, kind, compartmentOCID, scannedAt))
+		added = [record for ocid, record in current.items() if ocid not in previous]
+		removed = [record for ocid, record in previous.items() if ocid not in current]
+		return added, removed
+
+	def dropCompartmentsExcept(self, kind, compartments):
+		"""
+		This function forgets the compartments that no longer exist and returns their records
+		"""
+		removed = [r for r in self.records(kind) if r["compartment_ocid"] not in compartments]
+		with self.db:
+			for compartmentOCID in set(self.scanTimes(kind)) - set(compartments):
+				self.db.execute("DELETE FROM records WHERE scope = ? AND kind = ? AND compartment_ocid = ?", (self.scope, kind, compartmentOCID))
+				self.db.execute("DELETE FROM scans WHERE scope = ? AND kind = ? AND compartment_ocid = ?", (self.scope, kind, compartmentOCID))
+		return removed
+
+class AuditChangeDetector:
+	""" Finds the compartments where write calls to the compute, block volume or network APIs were audited since a given time.
+	The audit log is read once per compartment, in parallel.
+	"""
+	def __init__(self, audit_client, workers=DEFAULT_WORKERS):
+		self.audit_client = audit_client
+		self.workers = workers
+
+	def changedCompartments(self, compartments, since):
+		start = datetime.datetime.fromtimestamp(since - AUDIT_DELAY, datetime.timezone.utc)
+		end = datetime.datetime.now(datetime.timezone.utc)
+
+		def hasChanges(compartmentOCID):
+			for event in iterRecords(self.audit_client.list_events, compartment_id = compartmentOCID, start_time = start, end_time = end):
+				if isRelevantEvent(event):
+					return [compartmentOCID]
+			return []
+
+		return set(scanParallel(hasChanges, [(c,) for c in compartments], self.workers))
+
+def isRelevantEvent(event):
+	if not (event.event_type or "").lower().startswith(AUDIT_EVENT_PREFIXES):
+		return False
+	request = event.data.request if event.data else None
+	return not (request and (request.action or "").upper() in READ_ACTIONS)
+
+class SnapshotRefresher:
+	""" Decides which compartments must be listed again, and records the changes found while refreshing the snapshot.
+	`delta` holds, for each kind, the added and removed records; `previous` the records of the snapshot before the refresh.
+	"""
+	def __init__(self, store, detector, fullRefresh=False, maxAge=DEFAULT_MAX_AGE):
+		self.store = store
+		self.detector = detector
+		self.fullRefresh = fullRefresh
+		self.maxAge = maxAge
+		self.delta = {}
+		self.previous = {}
+		self._changed = None
+		self._changedSince = None
+		self._audited = set()
+
+	def _knownScans(self, kind, compartments):
+		"""
+		This function returns the time of the last scan of the compartments of the given kind scanned recently enough
+		to be trusted if the audit log has no change for them
+		"""
+		scanTimes = self.store.scanTimes(kind)
+		now = time.time()
+		return {c: scanTimes[c] for c in compartments if c in scanTimes and now - scanTimes[c] <= self.maxAge}
+
+	def _changedCompartments(self, compartments, since):
+		"""
+		This function returns the compartments with audited changes since `since`. The audit log is read once per run,
+		and again only if older scans or other compartments than those of the previous pass must be checked.
+		"""
+		if self._changed is None or since < self._changedSince or not set(compartments) <= self._audited:
+			since = since if self._changedSince is None else min(since, self._changedSince)
+			self._audited |= set(compartments)
+			self._changed = self.detector.changedCompartments(sorted(self._audited), since)
+			self._changedSince = since
+		return self._changed
+
+	def staleCompartments(self, kind, compartments):
+		"""
+		This function returns the compartments whose records of the given kind must be fetched again
+		"""
+		if self.fullRefresh:
+			return list(compartments)
+		known = self._knownScans(kind, compartments)
+		stale = [c for c in compartments if c not in known]
+		if known:
+			changed = self._changedCompartments(known, min(known.values()))
+			stale += [c for c in known if c in changed]
+		return stale
+
+	def refresh(self, kind, compartments, fetch):
+		"""
+		This function updates the snapshot of the given kind and yields all its records.
+		fetch(compartments) must return the current records of the given compartments, each with a compartment_ocid key.
+		"""
+		return self.refreshMany([kind], compartments, lambda stale: {kind: fetch(stale[kind])})[kind]
+
+	def refreshMany(self, kinds, compartments, fetchMany):
+		"""
+		This function updates the snapshot of several kinds at once and returns the records of each kind.
+		fetchMany({kind: compartments}) is called once with the stale compartments of each kind
+		and must return the current records of each kind, so that all the kinds can be fetched in a single traversal.
+		"""
+		if not self.fullRefresh:
+			#A single audit pass from the oldest scan of all the kinds, not only of the first one
+			known = {}
+			for kind in kinds:
+				for c, scannedAt in self._knownScans(kind, compartments).items():
+					known[c] = min(scannedAt, known.get(c, scannedAt))
+			if known:
+				self._changedCompartments(known, min(known.values()))
+		stale = {}
+		for kind in kinds:
+			self.previous[kind] = list(self.store.records(kind))
+			stale[kind] = self.staleCompartments(kind, compartments)
+		scannedAt = time.time()
+		toFetch = {kind: compartmentList for kind, compartmentList in stale.items() if compartmentList}
+		fetchedRecords = fetchMany(toFetch) if toFetch else {}
+		result = {}
+		for kind in kinds:
+			fetched = {c: [] for c in stale[kind]}
+			for record in fetchedRecords.get(kind, []):
+				fetched[record["compartment_ocid"]].append(record)
+			added, removed = [], self.store.dropCompartmentsExcept(kind, compartments)
+			for compartmentOCID, records in fetched.items():
+				compartmentAdded, compartmentRemoved = self.store.replaceCompartment(kind, compartmentOCID, records, scannedAt)
+				added += compartmentAdded
+				removed += compartmentRemoved
+			# A first run only fills the snapshot, it has no delta
+			if self.previous[kind]:
+				self.delta[kind] = {"new": added, "removed": removed}
+			result[kind] = self.store.records(kind, set(compartments))
+		return result
+
+class SnapshotBackend:
+	""" Query backend that serves the inventory from a SnapshotRefresher and lists only the stale compartments with `listBackend`.
+	"""
+	name = "snapshot"
+
+	def __init__(self, refresher, listBackend, topology):
+		self.refresher = refresher
+		self.listBackend = listBackend
+		self.topology = topology
+
+	def iterResources(self, resourceType, fields=None, compartments=None):
+		"""
+		This function yields the records of the given type in the whole tenancy, or only in the given compartment OCIDs.
+		The snapshot of all the compartments is refreshed either way, so that it keeps the other compartments.
+		"""
+		allCompartments = [c["ocid"] for c in self.topology.getCompartments(includeRoot=True, activeOnly=True)]
+		records = self.refresher.refresh(resourceType, allCompartments,
+			lambda stale: self.listBackend.iterResources(resourceType, compartments=stale))
+		compartments = None if compartments is None else set(compartments)
+		return (record for record in records if compartments is None or record["compartment_ocid"] in compartments)
+
+	def collectResources(self, resourceTypes):
+		compartments = [c["ocid"] for c in self.topology.getCompartments(includeRoot=True, activeOnly=True)]
+		records = self.refresher.refreshMany(resourceTypes, compartments, self.listBackend.collectResources)
+		return {resourceType: list(records[resourceType]) for resourceType in resourceTypes}
+
+def addSnapshotArguments(parser):
+	parser.add_argument("--snapshot", nargs="?", const=DEFAULT_SNAPSHOT_FILE, help=f"Keep the inventory in a SQLite file, per tenancy and region, and only list again the compartments changed since the last run. Defaults to {DEFAULT_SNAPSHOT_FILE}")
+	parser.add_argument("--full-refresh", action="store_true", help="With --snapshot, list all the compartments again")
+	parser.add_argument("--snapshot-max-age", type=int, default=DEFAULT_MAX_AGE, help=f"With --snapshot, list again the compartments not scanned for this many seconds. Defaults to {DEFAULT_MAX_AGE}")
+
+def refresherFromArgs(args, clients, workers=DEFAULT_WORKERS):
+	if not args.snapshot:
+		return None
+	detector = AuditChangeDetector(clients.get("audit"), workers)
+	return SnapshotRefresher(SnapshotStore(args.snapshot, f"{clients.tenancy}/{clients.region}"), detector, args.full_refresh, args.snapshot_max_age)
+
+def printDelta(delta, label, file=None):
+	"""
+	This function prints the records added and removed since the last run
+	"""
+	print(f"\nChanges since the last run: {len(delta['new'])} new, {len(delta['removed'])} removed {label}", file=file)
+	for record in delta["new"]:
+		print(f'  + {record["ocid"]} {record.get("name") or ""}', file=file)
+	for record in delta["removed"]:
+		print(f'  - {record["ocid"]} {record.get("name") or ""}', file=file)
@@ -0,0 +1,164 @@
+# Client-side rate limiting and retries for the parallel scans.
+# Every call of a throttled client takes a token from a shared bucket and a slot of an adaptive concurrency limit,
+# and is retried with jittered exponential backoff when the service throttles it (HTTP 429) or fails transiently (5xx).
+
+import random
+import sys
+import threading
+import time
+
+from oci_common.lazy import oci
+
+DEFAULT_RATE = 20
+DEFAULT_MAX_RETRIES = 6
+BASE_DELAY = 0.5
+MAX_DELAY = 30
+# Halve the concurrency at most once per this many seconds, so that a burst of 429s counts as one signal
+DECREASE_COOLDOWN = 1.0
+# Calls that are safe to repeat after a server error or a lost response
+IDEMPOTENT_PREFIXES = ("get_", "list_", "search_", "summarize_")
+
+class TokenBucket:
+	""" Allows on average `rate` calls per second, with bursts of up to `burst` calls.
+	A rate of None (or 0) disables the limit.
+	"""
+	def __init__(self, rate, burst=None):
+		self.rate = rate
+		self.capacity = burst or max(1, rate or 1)
+		self.tokens = self.capacity
+		self.updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def acquire(self):
+		if not self.rate:
+			return
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+				self.updated = now
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
+				wait = (1 - self.tokens) / self.rate
+			time.sleep(wait)
+
+class AdaptiveConcurrency:
+	""" Limits the number of calls in flight.
+	The limit is halved when the service throttles a call and grows by one after `limit` successful calls in a row,
+	so that it settles just below the level at which the service starts throttling.
+	"""
+	def __init__(self, maxLimit):
+		self.maxLimit = max(1, maxLimit)
+		self.limit = self.maxLimit
+		self.active = 0
+		self.successes = 0
+		self.lastDecrease = 0.0
+		self._cond = threading.Condition()
+
+	def acquire(self):
+		with self._cond:
+			while self.active >= self.limit:
+				self._cond.wait()
+			self.active += 1
+
+	def release(self, throttled=False):
+		with self._cond:
+			self.active -= 1
+			if throttled:
+				self.successes = 0
+				now = time.monotonic()
+				if now - self.lastDecrease >= DECREASE_COOLDOWN:
+					self.limit = max(1, self.limit // 2)
+					self.lastDecrease = now
+			else:
+				self.successes += 1
+				if self.successes >= self.limit and self.limit < self.maxLimit:
+					self.limit += 1
+					self.successes = 0
+			self._cond.notify_all()
+
+def isThrottled(error):
+	return isinstance(error, oci.exceptions.ServiceError) and error.status == 429
+
+def isTransient(error):
+	"""
+	This function tells if a failed call may succeed when repeated: server errors, timeouts and connection errors
+	"""
+	if isinstance(error, oci.exceptions.ServiceError):
+		return error.status >= 500
+	from oci._vendor.requests.exceptions import RequestException
+	return isinstance(error, RequestException)
+
+class Throttle:
+	""" The rate limit, concurrency limit and retry policy shared by the clients of one region.
+	Throttled calls (429) are always retried, transient failures only for the read-only calls (see IDEMPOTENT_PREFIXES);
+	any other error is raised at once. The counters can be read with counters().
+	"""
+	def __init__(self, rate=DEFAULT_RATE, maxConcurrency=8, maxRetries=DEFAULT_MAX_RETRIES):
+		self.bucket = TokenBucket(rate)
+		self.concurrency = AdaptiveConcurrency(maxConcurrency)
+		self.maxRetries = maxRetries
+		self._counters = {"calls": 0, "retries": 0, "throttled": 0, "transient_errors": 0, "failed": 0}
+		self._lock = threading.Lock()
+
+	def _count(self, name):
+		with self._lock:
+			self._counters[name] += 1
+
+	def counters(self):
+		with self._lock:
+			return dict(self._counters, concurrency_limit=self.concurrency.limit)
+
+	def attempt(self, method, args, kwargs):
+		"""
+		This function calls method(*args, **kwargs) until it succeeds or cannot be retried
+		and returns a (result, error, retries, seconds) tuple, where error is the exception of the last attempt or None
+		and seconds the time spent in the attempts, without the waits for the limits and the backoff delays
+		"""
+		idempotent = method.__name__.startswith(IDEMPOTENT_PREFIXES)
+		retries = 0
+		seconds = 0.0
+		while True:
+			self.bucket.acquire()
+			self.concurrency.acquire()
+			self._count("calls")
+			throttled = False
+			start = time.perf_counter()
+			try:
+				return method(*args, **kwargs), None, retries, seconds + time.perf_counter() - start
+			except Exception as e:
+				throttled = isThrottled(e)
+				if throttled:
+					self._count("throttled")
+				elif isTransient(e):
+					self._count("transient_errors")
+				retryable = throttled or (idempotent and isTransient(e))
+				if not retryable or retries >= self.maxRetries:
+					self._count("failed")
+					return None, e, retries, seconds + time.perf_counter() - start
+			finally:
+				self.concurrency.release(throttled)
+			seconds += time.perf_counter() - start
+			#Full jitter: a random delay up to the exponential backoff, so that the retries of parallel calls spread out
+			time.sleep(random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** retries)))
+			retries += 1
+			self._count("retries")
+
+	def call(self, method, *args, **kwargs):
+		result, error, _, _ = self.attempt(method, args, kwargs)
+		if error is not None:
+			raise error
+		return result
+
+	def printReport(self, file=sys.stderr):
+		c = self.counters()
+		print(f'API calls: {c["calls"]}, retries: {c["retries"]}, throttled: {c["throttled"]}, '
+			f'transient errors: {c["transient_errors"]}, failed: {c["failed"]}, concurrency limit: {c["concurrency_limit"]}', file=file)
+
+def addThrottleArguments(parser):
+	parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help=f"The maximum number of API calls per second. 0 disables the limit. Defaults to {DEFAULT_RATE}")
+	parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help=f"How many times a throttled or failed read call is retried. Defaults to {DEFAULT_MAX_RETRIES}")
+
+def throttleFromArgs(args, workers):
+	return Throttle(args.rate, workers, args.max_retries)
@@ -0,0 +1,105 @@
+# Cache of the tenancy topology (compartment tree and availability domains),
+# so that a run issues at most one call of each kind, or none on a warm on-disk cache
+
+import os
+import threading
+import time
+
+from oci_common.cachefile import readJsonFile, updateJsonFile
+from oci_common.lazy import Lazy
+from oci_common.pagination import iterRecords
+
+DEFAULT_TTL = 3600
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".oci", "oci-utilities-topology.json")
+
+class TopologyCache:
+	""" Lazily fetches the compartments and the availability domains of a tenancy and keeps them for `ttl` seconds.
+	If `cacheFile` is given, the topology is also persisted to that JSON file and reused by later runs.
+	"""
+	def __init__(self, iam_client, tenancyOCID, region=None, ttl=DEFAULT_TTL, cacheFile=None):
+		self.iam_client = iam_client
+		self.tenancyOCID = tenancyOCID
+		self.key = f"{tenancyOCID}/{region}" if region else tenancyOCID
+		self.ttl = ttl
+		self.cacheFile = cacheFile
+		self._topology = None
+		self._lock = threading.Lock()
+
+	def getCompartments(self, includeRoot=False, activeOnly=False):
+		"""
+		This function returns the compartments of the tenancy as dictionaries with the keys ocid, name, parent and lifecycle_state
+		"""
+		compartments = self._get()["compartments"]
+		if activeOnly:
+			compartments = [c for c in compartments if c["lifecycle_state"] == "ACTIVE"]
+		if includeRoot:
+			compartments = [self._get()["root"]] + compartments
+		return list(compartments)
+
+	def getAvailabilityDomains(self):
+		return list(self._get()["availability_domains"])
+
+	def compartmentOCIDByName(self, compartmentName):
+		for compartment in self.getCompartments(includeRoot=True):
+			if compartment["name"] == compartmentName:
+				return compartment["ocid"]
+		return None
+
+	def compartmentNamesByOCID(self):
+		return {c["ocid"]: c["name"] for c in self.getCompartments(includeRoot=True)}
+
+	def invalidate(self):
+		with self._lock:
+			self._topology = None
+			if self.cacheFile:
+				updateJsonFile(self.cacheFile, lambda stored: stored.pop(self.key, None))
+
+	def _get(self):
+		with self._lock:
+			if self._topology is None or self._isExpired(self._topology):
+				self._topology = self._load()
+			return self._topology
+
+	def _isExpired(self, topology):
+		return time.time() - topology["fetched_at"] > self.ttl
+
+	def _load(self):
+		if self.cacheFile:
+			stored = readJsonFile(self.cacheFile)
+			topology = stored.get(self.key)
+			if topology and not self._isExpired(topology):
+				return topology
+		topology = self._fetch()
+		if self.cacheFile:
+			updateJsonFile(self.cacheFile, lambda stored: stored.update({self.key: topology}))
+		return topology
+
+	def _fetch(self):
+		compartments = []
+		for compartment in iterRecords(
+				self.iam_client.list_compartments,
+				self.tenancyOCID,
+				compartment_id_in_subtree=True,
+				access_level="ANY"):
+			compartments.append({
+				"ocid": compartment.id,
+				"name": compartment.name,
+				"parent": compartment.compartment_id,
+				"lifecycle_state": compartment.lifecycle_state})
+		tenancy = self.iam_client.get_compartment(self.tenancyOCID).data
+		availabilityDomains = []
+		for ad in self.iam_client.list_availability_domains(compartment_id=self.tenancyOCID).data:
+			availabilityDomains.append({"ocid": ad.id, "name": ad.name})
+		return {
+			"fetched_at": time.time(),
+			"root": {"ocid": tenancy.id, "name": tenancy.name, "parent": None, "lifecycle_state": tenancy.lifecycle_state},
+			"compartments": compartments,
+			"availability_domains": availabilityDomains}
+
+def addTopologyArguments(parser):
+	parser.add_argument("--topology-cache", nargs="?", const=DEFAULT_CACHE_FILE, help=f"Persist the compartments and availability domains to a file and reuse them in later runs. Defaults to {DEFAULT_CACHE_FILE}")
+	parser.add_argument("--topology-ttl", type=int, default=DEFAULT_TTL, help=f"How many seconds the cached topology stays valid. Defaults to {DEFAULT_TTL}")
+
+def topologyFromArgs(args, clients):
+	#Created on first use, as the tenancy and region require the configuration of the pool
+	return Lazy(lambda: TopologyCache(clients.get("identity"), clients.tenancy, clients.region, args.topology_ttl, args.topology_cache))
@@ -0,0 +1,45 @@
+# OCID-keyed helpers to join volumes with their attachments
+
+# Lifecycle states of the attachments that attach a volume; the list calls keep returning detaching and detached
+# attachments for a while
+ATTACHED_STATES = ("ATTACHING", "ATTACHED")
+
+def indexByOcid(records, key="ocid"):
+	"""
+	This function takes a list of dictionaries and returns a dictionary mapping the value of the specified key to each element
+	"""
+	return {record[key]: record for record in records}
+
+def isAttached(att):
+	"""
+	This function tells if an attachment record attaches its volume. Records without a lifecycle_state count as attached.
+	"""
+	return att.get("lifecycle_state", "ATTACHED") in ATTACHED_STATES
+
+def attachmentIndex(attachments, volumeKey, instanceKey="instance_ocid"):
+	"""
+	This function returns a dictionary mapping each attached volume OCID to the list of instance OCIDs it is attached to.
+	Detaching and detached attachments are ignored.
+	"""
+	index = {}
+	for att in attachments:
+		if isAttached(att):
+			index.setdefault(att[volumeKey], []).append(att[instanceKey])
+	return index
+
+def joinAttachments(volumes, attachments, volumeKey):
+	"""
+	This function splits the volumes in a single pass over each input list.
+	It returns the unattached volumes and the attached ones, the latter with an extra
+	"instance_ocids" key listing the instances they are attached to. The order of `volumes` is kept.
+	"""
+	index = attachmentIndex(attachments, volumeKey)
+	unattached = []
+	attached = []
+	for vol in volumes:
+		instances = index.get(vol["ocid"])
+		if instances is None:
+			unattached.append(vol)
+		else:
+			attached.append(dict(vol, instance_ocids=instances))
+	return unattached, attached
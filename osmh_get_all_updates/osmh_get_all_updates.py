@@ -1,63 +1,74 @@
-import oci
+import argparse
 import json
+import os
 import sys
 
-try: 
-	wave = "wave_" + str(sys.argv[1])
-except:
-	wave = input("Insert only the wave number: ")
-	wave = "wave_" + str(wave)
-
-config = oci.config.from_file()
-compute_client = oci.core.ComputeClient(config)
-search_client = oci.resource_search.ResourceSearchClient(config)
-osmh_client = oci.os_management_hub.ManagedInstanceClient(config)
-
-def ocid_to_name(ocid):
-	res = compute_client.get_instance(
-		instance_id = ocid)
-	return res.data.display_name
-	
-print(f"Getting available security updates for all instances in {wave}...")
-
-#Get the OCIDs of all the instances in the wave
-search_details = oci.resource_search.models.StructuredSearchDetails(
-	type="Structured",
-	query=f"query instance resources where (definedTags.namespace = \'patching\' && definedTags.key = \'wave\' && definedTags.value = \'{wave}\')")
-search_response = search_client.search_resources(search_details)
-instances_in_wave = []
-for vm in search_response.data.items:
-	instances_in_wave.append(vm.identifier)
-
-all_updates = {}
-
-#Loop through all instances in wave
-for vm in instances_in_wave:
-	vm_name = ocid_to_name(vm)
-	try:
-		#Windows
-		response = osmh_client.list_managed_instance_available_windows_updates(
-			managed_instance_id = vm,
-			classification_type = ["SECURITY"],
-			limit=100)
-		vm_updates = response.data.items
-		vm_upd_list = []
-		for elem in vm_updates:
-			vm_upd_list.append(elem.name)
-		all_updates[vm_name] = vm_upd_list
-	except:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.osmh import iterWaveUpdates, DEFAULT_TIMEOUT, DEFAULT_OS_FAMILY_CACHE
+from oci_common.scan import DEFAULT_WORKERS
+from oci_common.daemon import addDaemonArguments, askDaemon
+
+parser = argparse.ArgumentParser(description="This program prints the available security updates of all the instances in one or more patching waves")
+parser.add_argument("wave", nargs="*", help="The wave numbers")
+parser.add_argument("--all-waves", action="store_true", help="Query all the instances that have a patching.wave tag")
+parser.add_argument("--jsonl", action="store_true", help="Print one JSON object per instance and line (instance, ocid, wave, os_family, updates) instead of a single JSON object")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of instances queried in parallel. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help=f"The maximum number of seconds spent on one instance. Defaults to {DEFAULT_TIMEOUT}")
+parser.add_argument("--os-family-cache", default=DEFAULT_OS_FAMILY_CACHE, help=f"The file where the OS family of each instance is remembered between runs. Defaults to {DEFAULT_OS_FAMILY_CACHE}")
+parser.add_argument("--no-os-family-cache", action="store_true", help="Do not read nor write the OS family cache")
+addThrottleArguments(parser)
+addProfileArguments(parser)
+addDaemonArguments(parser)
+args = parser.parse_args()
+apiProfile = profileFromArgs(args)
+
+if args.all_waves:
+	waves = []
+elif args.wave:
+	waves = ["wave_" + str(wave) for wave in args.wave]
+else:
+	#An empty answer would query every wave, which only --all-waves does
+	waves = []
+	while not waves:
 		try:
-			#Linux
-			response = oci.pagination.list_call_get_all_results(osmh_client.list_managed_instance_updatable_packages,
-				managed_instance_id = vm,
-			classification_type = ["SECURITY"])
-			vm_upd_list = []
-			for elem in response.data:
-				vm_upd_list.append(elem.display_name)
-			all_updates[vm_name] = vm_upd_list
-		except:
-			#Instance not registered
-			continue
-
-json_str = json.dumps(all_updates)
-print(json_str)
\ No newline at end of file
+			waves = ["wave_" + str(wave) for wave in input("Insert only the wave numbers, separated by spaces: ").split()]
+		except EOFError:
+			parser.error("no wave given, pass the wave numbers or --all-waves")
+
+clients = ClientPool(poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
+search_client = clients.get("search")
+osmh_client = clients.get("osmh", timeout=(10, args.timeout))
+
+#The daemon, if any, has already dropped the instances whose updates could not be queried
+records = askDaemon(args, "/wave-updates", {"wave": waves})
+
+print(f"Getting available security updates for all instances in {', '.join(waves) or 'all waves'}...", file=sys.stderr if args.jsonl else sys.stdout)
+
+#Query the instances in parallel and print each one as soon as its updates are known
+separator = ""
+if not args.jsonl:
+	sys.stdout.write("{")
+os_family_cache = None if args.no_os_family_cache else args.os_family_cache
+if records is not None:
+	results = ((record, None) for record in records)
+else:
+	results = iterWaveUpdates(search_client, osmh_client, waves, args.workers, args.timeout, os_family_cache)
+for record, error in results:
+	if error:
+		print(f"WARNING: skipping {record['instance']} ({record['ocid']}): {error}", file=sys.stderr)
+		continue
+	if args.jsonl:
+		sys.stdout.write(json.dumps(record) + "\n")
+	else:
+		sys.stdout.write(f"{separator}{json.dumps(record['instance'])}: {json.dumps(record['updates'])}")
+		separator = ", "
+	sys.stdout.flush()
+if not args.jsonl:
+	print("}")
+if clients.throttle.counters()["throttled"]:
+	clients.throttle.printReport()
+
+writeProfileReports(args, apiProfile)
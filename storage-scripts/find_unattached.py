@@ -0,0 +1,128 @@
+#!/bin/python3
+
+# This script lists the block volumes and/or the boot volumes that are not attached to any instance.
+# With --type all, the volumes and attachments of both types are listed in a single traversal of the tenancy.
+# With --terminate-ask or --terminate-force, the unattached volumes are then terminated, optionally after a backup.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from oci_common.profiling import addProfileArguments, profileFromArgs, writeProfileReports
+from oci_common.clients import ClientPool
+from oci_common.throttle import addThrottleArguments, throttleFromArgs
+from oci_common.scan import ScanStats, DEFAULT_WORKERS
+from oci_common.topology import addTopologyArguments, topologyFromArgs
+from oci_common.reports import findUnattachedVolumesByType, VOLUME_TYPES
+from oci_common.volumes import isAttached
+from oci_common.backends import addBackendArguments, makeBackend
+from oci_common.snapshot import addSnapshotArguments, refresherFromArgs, printDelta
+from oci_common.cleanup import addCleanupArguments, VolumeCleanup
+from oci_common.output import addOutputArguments, makeWriter, TableWriter
+from oci_common.daemon import addDaemonArguments, askDaemon
+
+# Volume type -> (label, path of the console URL)
+VOLUME_LABELS = {
+	"block": ("block volumes", "volumes"),
+	"boot": ("boot volumes", "boot-volumes")}
+
+parser = argparse.ArgumentParser(description="This program lists the block and boot volumes that are not attached to any instance")
+parser.add_argument("--type", "-t", choices=["block", "boot", "all"], default="all", help="The type of volumes to check. Defaults to all")
+parser.add_argument("--workers", "-w", type=int, default=DEFAULT_WORKERS, help=f"The number of parallel list calls. Defaults to {DEFAULT_WORKERS}")
+parser.add_argument("--stats", action="store_true", help="Print the wall-clock time and the per-call latency of the scan to stderr")
+addTopologyArguments(parser)
+addBackendArguments(parser)
+addSnapshotArguments(parser)
+addThrottleArguments(parser)
+addProfileArguments(parser)
+addCleanupArguments(parser)
+addOutputArguments(parser)
+addDaemonArguments(parser)
+args = parser.parse_args()
+if args.format == "table" and args.output:
+	parser.error("--output requires --format csv, jsonl or parquet")
+if args.daemon and (args.terminate_ask or args.terminate_force):
+	#Volumes are only terminated on a fresh crawl, never on an inventory that may be minutes old
+	parser.error("--terminate-ask and --terminate-force cannot be used with --daemon")
+writer = None
+if args.format != "table":
+	try:
+		writer = makeWriter(args.format, ["type", "ocid", "name", "compartment_ocid"], args.output)
+	except ValueError as e:
+		parser.error(str(e))
+apiProfile = profileFromArgs(args)
+
+start = time.perf_counter()
+
+#The clients are created on first use
+clients = ClientPool(poolSize=args.workers, throttle=throttleFromArgs(args, args.workers), apiProfile=apiProfile)
+stats = ScanStats()
+
+#With a machine-readable format, only the volumes are written to the output and everything else goes to stderr
+info = sys.stdout if args.format == "table" else sys.stderr
+
+volumeTypes = ["block", "boot"] if args.type == "all" else [args.type]
+refresher = None
+answer = askDaemon(args, "/unattached", {"type": volumeTypes})
+if answer is not None:
+	#The daemon only knows the unattached volumes, and has no delta since the last run
+	results = {volumeType: ([vol for vol in answer if vol["type"] == volumeType], []) for volumeType in volumeTypes}
+else:
+	topology = topologyFromArgs(args, clients)
+	refresher = refresherFromArgs(args, clients, args.workers)
+	backend = makeBackend(args.backend, topology, clients, args.workers, stats, refresher)
+	results = findUnattachedVolumesByType(backend, volumeTypes)
+
+if writer:
+	for volumeType in volumeTypes:
+		for vol in results[volumeType][0]:
+			writer.write(dict(vol, type=volumeType))
+	writer.close()
+
+for volumeType in volumeTypes:
+	label, urlPath = VOLUME_LABELS[volumeType]
+	resourceType, attachmentType = VOLUME_TYPES[volumeType]
+	unattachedVolumes, _ = results[volumeType]
+	if args.format == "table":
+		if volumeType != volumeTypes[0]:
+			print()
+		print(f'The following {label} are not attached to any instance:\n')
+		table = TableWriter(["ocid", "name"], align=not args.no_align)
+		for vol in unattachedVolumes:
+			table.write(vol)
+		table.close()
+		print('\nMore info:')
+		for elem in unattachedVolumes:
+			print(f'https://cloud.oracle.com/block-storage/{urlPath}/{elem["ocid"]}')
+
+	if refresher and resourceType in refresher.delta:
+		printDelta(refresher.delta[resourceType], label, file=info)
+		previouslyAttached = {att["volume_ocid"] for att in refresher.previous.get(attachmentType, []) if isAttached(att)}
+		newlyUnattached = [vol for vol in unattachedVolumes if vol["ocid"] in previouslyAttached]
+		print(f"{len(newlyUnattached)} newly unattached {label}", file=info)
+		for vol in newlyUnattached:
+			print(f'  ! {vol["ocid"]} {vol["name"]}', file=info)
+
+if args.terminate_ask or args.terminate_force:
+	toTerminate = [dict(vol, type=volumeType) for volumeType in volumeTypes for vol in results[volumeType][0]]
+	print(f'\n{len(toTerminate)} unattached volume(s) to {"back up and " if args.backup else ""}terminate', file=info)
+	confirmed = args.terminate_force or args.dry_run or not toTerminate
+	if not confirmed:
+		print("Type 'yes' to continue: ", end="", file=info, flush=True)
+		confirmed = input().strip().lower() == "yes"
+	if confirmed:
+		cleanup = VolumeCleanup(clients.get("storage"), args.workers, args.backup, args.checkpoint, args.dry_run, args.poll_interval,
+			args.cleanup_timeout, info, key=f"{clients.tenancy}/{clients.region}", retryFailed=not args.skip_failed)
+		counts = cleanup.run(toTerminate)
+		print(", ".join(f"{count} {state}" for state, count in counts.items()) or "Nothing to do", file=info)
+	else:
+		print("Aborted", file=info)
+
+if args.stats:
+	stats.addWallClock(time.perf_counter() - start)
+	stats.printReport()
+	clients.throttle.printReport()
+
+writeProfileReports(args, apiProfile)
@@ -0,0 +1,118 @@
+# Tests of the bulk clean-up of unattached volumes (oci_common/cleanup.py) against the fake OCI of benchmarks/fake_oci.py.
+# Run them from the repository root with: python -m unittest discover tests (or python -m pytest tests)
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import oci
+from oci_common.cleanup import VolumeCleanup, BACKING_UP, DELETED, DELETING, FAILED
+from fake_oci import FakeTenancy
+
+KEY = "ocid1.tenancy.oc1..faketenancy/eu-frankfurt-1"
+
+class CleanupTest(unittest.TestCase):
+	def setUp(self):
+		self.tenancy = FakeTenancy(compartments=2, instances=0, volumes=4, unattachedBootVolumes=2, latency=0, transitionDelay=0.05)
+		self.storage_client = self.tenancy.factory("storage", self.tenancy.config())
+		self.volumes = [{"ocid": v.id, "name": v.display_name, "compartment_ocid": v.compartment_id, "type": "block"} for v in self.tenancy.volumes]
+		self.volumes += [{"ocid": v.id, "name": v.display_name, "compartment_ocid": v.compartment_id, "type": "boot"} for v in self.tenancy.bootVolumes]
+		self.folder = tempfile.TemporaryDirectory()
+		self.checkpointFile = os.path.join(self.folder.name, "checkpoint.jsonl")
+
+	def tearDown(self):
+		self.folder.cleanup()
+
+	def cleanup(self, **kwargs):
+		kwargs = dict({"checkpointFile": self.checkpointFile, "pollInterval": 0.01, "timeout": 5, "file": io.StringIO(), "key": KEY}, **kwargs)
+		return VolumeCleanup(self.storage_client, 4, **kwargs)
+
+	def checkpointLines(self):
+		with open(self.checkpointFile) as f:
+			return [json.loads(line) for line in f]
+
+	def test_dry_run(self):
+		out = io.StringIO()
+		counts = self.cleanup(backup=True, dryRun=True, file=out).run(self.volumes)
+		self.assertEqual(counts, {"planned": len(self.volumes)})
+		self.assertEqual(out.getvalue().count("Would back up and terminate"), len(self.volumes))
+		self.assertEqual(self.tenancy.totalCalls(), 0)
+		self.assertFalse(os.path.exists(self.checkpointFile))
+
+	def test_backup_then_delete(self):
+		counts = self.cleanup(backup=True).run(self.volumes)
+		self.assertEqual(counts, {DELETED: len(self.volumes)})
+		backups = {b.volume_id: b for b in self.tenancy.volumeBackups}
+		backups.update({b.boot_volume_id: b for b in self.tenancy.bootVolumeBackups})
+		self.assertEqual(set(backups), {vol["ocid"] for vol in self.volumes})
+		self.assertTrue(all(b.lifecycle_state == "AVAILABLE" for b in backups.values()))
+		#The compacted checkpoint has one line per volume, with its backup
+		lines = self.checkpointLines()
+		self.assertEqual(len(lines), len(self.volumes))
+		self.assertTrue(all(line["state"] == DELETED and line["backup_ocid"] == backups[line["ocid"]].id and line["key"] == KEY for line in lines))
+
+	def test_timeout_then_resume(self):
+		self.tenancy.transitionDelay = 0.3
+		counts = self.cleanup(timeout=0.05).run(self.volumes)
+		self.assertEqual(counts, {DELETING: len(self.volumes)})
+		deleteCalls = self.tenancy.calls["delete_volume"] + self.tenancy.calls["delete_boot_volume"]
+		#The terminating volumes are no longer reported as unattached, the checkpoint alone resumes them
+		time.sleep(0.3)
+		counts = self.cleanup().run([])
+		self.assertEqual(counts, {DELETED: len(self.volumes)})
+		self.assertEqual(self.tenancy.calls["delete_volume"] + self.tenancy.calls["delete_boot_volume"], deleteCalls)
+		#Another tenancy or region does not see the volumes of this one
+		self.assertEqual(self.cleanup(key="other/eu-frankfurt-1").checkpoint, {})
+
+	def test_not_found_and_conflict(self):
+		gone, busy = self.volumes[0], self.volumes[1]
+		self.storage_client.delete_volume(volume_id=gone["ocid"])
+		delete_volume = self.storage_client.delete_volume
+		def conflict(volume_id, **kwargs):
+			if volume_id == busy["ocid"]:
+				raise oci.exceptions.ServiceError(409, "Conflict", {}, "The volume has a backup in progress (fake)")
+			return delete_volume(volume_id, **kwargs)
+		self.storage_client.delete_volume = conflict
+		blockVolumes = [vol for vol in self.volumes if vol["type"] == "block"]
+
+		counts = self.cleanup().run(blockVolumes)
+		self.assertEqual(counts, {DELETED: len(blockVolumes) - 1, FAILED: 1})
+		checkpoint = self.cleanup().checkpoint
+		self.assertEqual(checkpoint[busy["ocid"]]["state"], FAILED)
+		self.assertIn("Conflict", checkpoint[busy["ocid"]]["error"])
+		self.assertEqual(checkpoint[gone["ocid"]]["state"], DELETED)
+
+		#Skipped with retryFailed=False, tried again by default
+		self.assertEqual(self.cleanup(retryFailed=False).run([busy]), {})
+		self.storage_client.delete_volume = delete_volume
+		self.assertEqual(self.cleanup().run([busy]), {DELETED: 1})
+
+	def test_connection_error(self):
+		volume = self.volumes[0]
+		def unreachable(volume_id, **kwargs):
+			raise ConnectionError("Connection reset by peer (fake)")
+		self.storage_client.delete_volume = unreachable
+		counts = self.cleanup().run(self.volumes)
+		blockVolumes = [vol for vol in self.volumes if vol["type"] == "block"]
+		self.assertEqual(counts, {DELETED: len(self.volumes) - len(blockVolumes), FAILED: len(blockVolumes)})
+		self.assertIn("ConnectionError", self.cleanup().checkpoint[volume["ocid"]]["error"])
+
+	def test_unlisted_backup_not_deleted(self):
+		self.tenancy.transitionDelay = 0.3
+		counts = self.cleanup(backup=True, timeout=0.05).run(self.volumes)
+		self.assertEqual(counts, {BACKING_UP: len(self.volumes)})
+		#The first volume was attached again meanwhile, so the new scan no longer lists it
+		time.sleep(0.3)
+		counts = self.cleanup(backup=True).run(self.volumes[1:])
+		self.assertEqual(counts, {DELETED: len(self.volumes) - 1})
+		self.assertEqual(self.tenancy.volumes[0].lifecycle_state, "AVAILABLE")
+
+if __name__ == "__main__":
+	unittest.main()
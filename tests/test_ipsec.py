@@ -0,0 +1,72 @@
+# Tests of the resolution of compartment, DRG and CPE names (oci_common/ipsec.py) against the fake OCI of benchmarks/fake_oci.py.
+# Run them from the repository root with: python -m unittest discover tests (or python -m pytest tests)
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import oci
+from oci_common.ipsec import NetworkResolver
+from oci_common.topology import TopologyCache
+from fake_oci import FakeTenancy
+
+class LaggingSearchClient:
+	""" Resource Search client that does not return the resources of `hidden` yet, as if they were not indexed.
+	"""
+	def __init__(self, search_client, hidden):
+		self.search_client = search_client
+		self.hidden = hidden
+
+	def search_resources(self, search_details, **kwargs):
+		response = self.search_client.search_resources(search_details, **kwargs)
+		response.data.items = [r for r in response.data.items if r.identifier not in self.hidden]
+		return response
+
+class NetworkResolverTest(unittest.TestCase):
+	def setUp(self):
+		self.tenancy = FakeTenancy(compartments=3, instances=0, volumes=0, unattachedBootVolumes=0, latency=0)
+		self.hidden = set()
+		search_client = LaggingSearchClient(self.tenancy.factory("search", None), self.hidden)
+		topology = TopologyCache(self.tenancy.factory("identity", None), self.tenancy.tenancyOCID)
+		self.resolver = NetworkResolver(search_client, self.tenancy.factory("network", None), topology, self.tenancy.tenancyOCID)
+		self.compartments = [c.id for c in self.tenancy.compartments]
+
+	def addUnindexed(self, compartmentOCID, drgName, cpeIP):
+		drg = oci.core.models.Drg(id=f"ocid1.drg.oc1..{drgName}", display_name=drgName, compartment_id=compartmentOCID, lifecycle_state="AVAILABLE")
+		cpe = oci.core.models.Cpe(id=f"ocid1.cpe.oc1..{drgName}", display_name=drgName, compartment_id=compartmentOCID, ip_address=cpeIP)
+		self.tenancy.drgs.append(drg)
+		self.tenancy.cpes.append(cpe)
+		self.hidden |= {drg.id, cpe.id}
+		return drg.id, cpe.id
+
+	def test_indexed(self):
+		self.assertEqual(self.resolver.drgOCID("drg-1", self.compartments[1]), self.tenancy.drgs[1].id)
+		self.assertEqual(self.resolver.cpe("198.51.100.3"), (self.tenancy.cpes[2].id, "198.51.100.3"))
+		self.assertEqual(self.resolver.compartmentOCID("compartment-2"), self.compartments[2])
+		self.assertIsNone(self.resolver.drgOCID("no-such-drg"))
+
+	def test_unindexed_in_target_compartment(self):
+		drgOCID, cpeOCID = self.addUnindexed(self.compartments[1], "drg-new", "192.0.2.9")
+		self.assertEqual(self.resolver.drgOCID("drg-new", self.compartments[1]), drgOCID)
+		self.assertEqual(self.resolver.cpe("192.0.2.9", None, self.compartments[1]), (cpeOCID, "192.0.2.9"))
+		self.assertEqual(self.resolver.cpe(None, cpeOCID, self.compartments[1]), (cpeOCID, "192.0.2.9"))
+
+	def test_unindexed_with_same_name_elsewhere(self):
+		#drg-0 and the CPE 198.51.100.1 are indexed in the first compartment, the ones of the third are not yet
+		drgOCID, cpeOCID = self.addUnindexed(self.compartments[2], "drg-0", "198.51.100.1")
+		self.assertEqual(self.resolver.drgOCID("drg-0", self.compartments[2]), drgOCID)
+		self.assertEqual(self.resolver.cpe("198.51.100.1", None, self.compartments[2]), (cpeOCID, "198.51.100.1"))
+		#Without any in the given compartment, the only indexed one is kept
+		self.assertEqual(self.resolver.drgOCID("drg-0", self.compartments[1]), self.tenancy.drgs[0].id)
+
+	def test_ambiguous_compartment(self):
+		self.tenancy.compartments.append(oci.identity.models.Compartment(id="ocid1.compartment.oc1..twin", name="compartment-0",
+			compartment_id=self.tenancy.tenancyOCID, lifecycle_state="ACTIVE"))
+		with self.assertRaises(ValueError):
+			self.resolver.compartmentOCID("compartment-0")
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,50 @@
+# Tests of the OS Management Hub helpers (oci_common/osmh.py) against the fake OCI of benchmarks/fake_oci.py.
+# Run them from the repository root with: python -m unittest discover tests (or python -m pytest tests)
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from oci_common.cachefile import readJsonFile
+from oci_common.osmh import searchWaveInstances, getOsFamilies, iterWaveUpdates
+from fake_oci import FakeTenancy
+
+class OsmhTest(unittest.TestCase):
+	def setUp(self):
+		self.tenancy = FakeTenancy(compartments=3, instances=60, volumes=0, unattachedBootVolumes=0, waves=2, unregisteredShare=0.2, latency=0)
+		self.search_client = self.tenancy.factory("search", self.tenancy.config())
+		self.osmh_client = self.tenancy.factory("osmh", self.tenancy.config())
+
+	def test_os_families_of_all_registered_instances(self):
+		instances = searchWaveInstances(self.search_client, ["wave_0"])
+		osFamilies = getOsFamilies(self.osmh_client, instances)
+		registered = {ocid for ocid in instances if ocid in self.tenancy.osFamilies}
+		self.assertLess(len(registered), len(instances))
+		self.assertEqual(set(osFamilies), registered)
+		self.assertTrue(all(osFamilies[ocid] == self.tenancy.osFamilies[ocid][0] for ocid in registered))
+		#One listing per compartment, whatever the number of instances
+		self.assertEqual(self.tenancy.calls["list_managed_instances"], 3)
+
+	def test_os_family_cache(self):
+		with tempfile.TemporaryDirectory() as folder:
+			cacheFile = os.path.join(folder, "os-family.json")
+			instances = searchWaveInstances(self.search_client, [])
+			osFamilies = getOsFamilies(self.osmh_client, instances, cacheFile)
+			self.assertEqual(readJsonFile(cacheFile), osFamilies)
+			self.tenancy.resetCalls()
+			instances = {ocid: vm for ocid, vm in instances.items() if ocid in osFamilies}
+			self.assertEqual(getOsFamilies(self.osmh_client, instances, cacheFile), osFamilies)
+			self.assertEqual(self.tenancy.totalCalls(), 0)
+
+	def test_wave_updates(self):
+		records = [record for record, error in iterWaveUpdates(self.search_client, self.osmh_client, ["wave_1"]) if not error]
+		expected = [ocid for ocid, wave in self.tenancy.waves.items() if wave == "wave_1" and ocid in self.tenancy.osFamilies]
+		self.assertEqual(sorted(record["ocid"] for record in records), sorted(expected))
+		self.assertTrue(all(len(record["updates"]) == self.tenancy.osFamilies[record["ocid"]][1] for record in records))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,81 @@
+# Tests of the incremental inventories (oci_common/snapshot.py), with a stand-in for the audit log.
+# Run them from the repository root with: python -m unittest discover tests (or python -m pytest tests)
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from oci_common.backends import MemoryBackend
+from oci_common.snapshot import SnapshotStore, SnapshotRefresher, SnapshotBackend
+
+COMPARTMENTS = ["ocid1.compartment.oc1..a", "ocid1.compartment.oc1..b"]
+
+class RecordingDetector:
+	""" Reports `changed` as changed and records the (compartments, since) of every audit pass.
+	"""
+	def __init__(self, changed=()):
+		self.changed = set(changed)
+		self.passes = []
+
+	def changedCompartments(self, compartments, since):
+		self.passes.append((sorted(compartments), since))
+		return set(self.changed)
+
+class StaticTopology:
+	def getCompartments(self, includeRoot=False, activeOnly=False):
+		return [{"ocid": c} for c in COMPARTMENTS]
+
+def record(ocid, compartment):
+	return {"ocid": ocid, "name": ocid, "compartment_ocid": compartment}
+
+class SnapshotTest(unittest.TestCase):
+	def setUp(self):
+		self.folder = tempfile.TemporaryDirectory()
+		self.store = SnapshotStore(os.path.join(self.folder.name, "snapshot.db"), "tenancy/region")
+		now = time.time()
+		#The volumes were scanned an hour ago, the instances two hours ago by another script
+		for c in COMPARTMENTS:
+			self.store.replaceCompartment("volume", c, [record(f"volume-{c}", c)], now - 3600)
+			self.store.replaceCompartment("instance", c, [record(f"instance-{c}", c)], now - 7200)
+		self.oldest = now - 7200
+
+	def tearDown(self):
+		self.store.db.close()
+		self.folder.cleanup()
+
+	def test_audit_covers_the_oldest_kind(self):
+		detector = RecordingDetector()
+		refresher = SnapshotRefresher(self.store, detector)
+		refresher.refreshMany(["volume", "instance"], COMPARTMENTS, lambda stale: {})
+		self.assertEqual(detector.passes, [(COMPARTMENTS, self.oldest)])
+
+	def test_audit_again_for_older_kind(self):
+		detector = RecordingDetector(changed=[COMPARTMENTS[1]])
+		refresher = SnapshotRefresher(self.store, detector)
+		fetched = []
+		def fetch(stale):
+			fetched.append(stale)
+			return []
+		list(refresher.refresh("volume", COMPARTMENTS, fetch))
+		list(refresher.refresh("instance", COMPARTMENTS, fetch))
+		#The second kind has older scans than the first audit pass covered
+		self.assertEqual([since for _, since in detector.passes], [self.oldest + 3600, self.oldest])
+		self.assertEqual(fetched, [[COMPARTMENTS[1]], [COMPARTMENTS[1]]])
+		#A third refresh needs no new audit pass
+		list(refresher.refresh("volume", COMPARTMENTS, fetch))
+		self.assertEqual(len(detector.passes), 2)
+
+	def test_backend_compartments(self):
+		refresher = SnapshotRefresher(self.store, RecordingDetector(changed=COMPARTMENTS))
+		listBackend = MemoryBackend({"volume": [record("new-volume", COMPARTMENTS[0])]})
+		backend = SnapshotBackend(refresher, listBackend, StaticTopology())
+		records = list(backend.iterResources("volume", compartments=[COMPARTMENTS[0]]))
+		self.assertEqual([r["ocid"] for r in records], ["new-volume"])
+		self.assertEqual(refresher.delta["volume"]["removed"], [record(f"volume-{c}", c) for c in COMPARTMENTS])
+
+if __name__ == "__main__":
+	unittest.main()
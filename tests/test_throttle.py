@@ -0,0 +1,97 @@
+# Tests of the retries and adaptive concurrency of the throttled clients (oci_common/throttle.py).
+# Run them from the repository root with: python -m unittest discover tests (or python -m pytest tests)
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import oci
+from oci_common.throttle import Throttle, AdaptiveConcurrency
+
+def serviceError(status):
+	return oci.exceptions.ServiceError(status, "TooManyRequests" if status == 429 else "InternalServerError", {"opc-request-id": "fake"}, f"HTTP {status} (fake)")
+
+class FailingClient:
+	""" Fails the first `failures` calls of every method with an HTTP `status`, then returns the name of the method.
+	"""
+	def __init__(self, status, failures):
+		self.status = status
+		self.failures = failures
+		self.calls = {}
+
+	def _call(self, name):
+		self.calls[name] = self.calls.get(name, 0) + 1
+		if self.calls[name] <= self.failures:
+			raise serviceError(self.status)
+		return name
+
+	def list_volumes(self, **kwargs):
+		return self._call("list_volumes")
+
+	def create_volume_backup(self, details):
+		return self._call("create_volume_backup")
+
+	def delete_volume(self, volume_id):
+		return self._call("delete_volume")
+
+#No backoff delays
+@mock.patch("oci_common.throttle.BASE_DELAY", 0)
+class ThrottleTest(unittest.TestCase):
+	def test_throttled_call_is_retried(self):
+		throttle = Throttle(rate=None, maxConcurrency=4)
+		client = FailingClient(429, 2)
+		self.assertEqual(throttle.call(client.list_volumes), "list_volumes")
+		#Also for the calls that are not idempotent, as a throttled call was not executed
+		self.assertEqual(throttle.call(client.delete_volume, volume_id="volume"), "delete_volume")
+		counters = throttle.counters()
+		self.assertEqual((counters["calls"], counters["retries"], counters["throttled"], counters["failed"]), (6, 4, 4, 0))
+
+	def test_server_error_is_retried_for_read_calls_only(self):
+		throttle = Throttle(rate=None, maxConcurrency=4)
+		client = FailingClient(503, 1)
+		self.assertEqual(throttle.call(client.list_volumes, compartment_id="compartment"), "list_volumes")
+		for method, args in ((client.create_volume_backup, ("details",)), (client.delete_volume, ("volume",))):
+			with self.assertRaises(oci.exceptions.ServiceError):
+				throttle.call(method, *args)
+		self.assertEqual(client.calls, {"list_volumes": 2, "create_volume_backup": 1, "delete_volume": 1})
+		counters = throttle.counters()
+		self.assertEqual((counters["retries"], counters["transient_errors"], counters["failed"]), (1, 3, 2))
+
+	def test_retries_are_bounded(self):
+		throttle = Throttle(rate=None, maxConcurrency=4, maxRetries=3)
+		client = FailingClient(500, 10)
+		with self.assertRaises(oci.exceptions.ServiceError):
+			throttle.call(client.list_volumes)
+		self.assertEqual(client.calls["list_volumes"], 4)
+
+class AdaptiveConcurrencyTest(unittest.TestCase):
+	def complete(self, concurrency, calls, throttled=False):
+		for _ in range(calls):
+			concurrency.acquire()
+			concurrency.release(throttled)
+
+	@mock.patch("oci_common.throttle.DECREASE_COOLDOWN", 0)
+	def test_halves_on_throttling_and_grows_back(self):
+		concurrency = AdaptiveConcurrency(8)
+		self.complete(concurrency, 2, throttled=True)
+		self.assertEqual(concurrency.limit, 2)
+		#One more slot after as many successful calls in a row as the current limit
+		self.complete(concurrency, 1)
+		self.assertEqual(concurrency.limit, 2)
+		self.complete(concurrency, 1)
+		self.assertEqual(concurrency.limit, 3)
+		self.complete(concurrency, 3 + 4 + 5 + 6 + 7)
+		self.assertEqual(concurrency.limit, 8)
+		self.complete(concurrency, 100)
+		self.assertEqual(concurrency.limit, 8)
+
+	def test_burst_of_throttling_halves_once(self):
+		concurrency = AdaptiveConcurrency(8)
+		self.complete(concurrency, 5, throttled=True)
+		self.assertEqual(concurrency.limit, 4)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,44 @@
+# Tests of the join of volumes with their attachments (oci_common/volumes.py and oci_common/reports.py),
+# against the fake OCI of benchmarks/fake_oci.py.
+# Run them from the repository root with: python -m unittest discover tests (or python -m pytest tests)
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from oci_common.backends import ListBackend
+from oci_common.reports import findUnattachedVolumesByType
+from oci_common.topology import TopologyCache
+from oci_common.volumes import joinAttachments
+from fake_oci import FakeTenancy
+
+def attachment(volume, instance, state):
+	return {"volume_ocid": volume, "instance_ocid": instance, "lifecycle_state": state}
+
+class VolumesTest(unittest.TestCase):
+	def test_join_ignores_detached_attachments(self):
+		volumes = [{"ocid": f"volume-{v}"} for v in range(4)]
+		attachments = [attachment("volume-0", "instance-0", "ATTACHED"), attachment("volume-1", "instance-1", "ATTACHING"),
+			attachment("volume-2", "instance-2", "DETACHING"), attachment("volume-3", "instance-3", "DETACHED"),
+			attachment("volume-0", "instance-9", "DETACHED")]
+		unattached, attached = joinAttachments(volumes, attachments, "volume_ocid")
+		self.assertEqual([vol["ocid"] for vol in unattached], ["volume-2", "volume-3"])
+		self.assertEqual({vol["ocid"]: vol["instance_ocids"] for vol in attached}, {"volume-0": ["instance-0"], "volume-1": ["instance-1"]})
+
+	def test_recently_detached_volumes_are_unattached(self):
+		tenancy = FakeTenancy(compartments=3, instances=10, volumes=30, unattachedBootVolumes=0, latency=0)
+		detached = tenancy.volumeAttachments[:3]
+		for att in detached:
+			att.lifecycle_state = "DETACHED"
+		topology = TopologyCache(tenancy.factory("identity", None), tenancy.tenancyOCID)
+		backend = ListBackend(topology, tenancy.factory("compute", None), tenancy.factory("storage", None))
+		unattached, attached = findUnattachedVolumesByType(backend, ["block"])["block"]
+		stillAttached = {att.volume_id for att in tenancy.volumeAttachments if att.lifecycle_state == "ATTACHED"}
+		self.assertEqual({vol["ocid"] for vol in attached}, stillAttached)
+		self.assertTrue({att.volume_id for att in detached} - stillAttached <= {vol["ocid"] for vol in unattached})
+
+if __name__ == "__main__":
+	unittest.main()